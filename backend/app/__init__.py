@@ -47,7 +47,7 @@ def create_app(config_name='default'):
             response = make_response('', 200)
             response.headers['Access-Control-Allow-Origin'] = '*'
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Idempotency-Key'
             response.headers['Access-Control-Max-Age'] = '3600'
             return response
     
@@ -68,7 +68,7 @@ def create_app(config_name='default'):
     def after_request(response):
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Idempotency-Key'
         return response
     
     # Error handlers
@@ -81,6 +81,14 @@ def create_app(config_name='default'):
         db.session.rollback()
         return jsonify({'error': 'Erro interno do servidor'}), 500
     
+    from app.services.passwords import PasswordHasherBusy
+    
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        response = jsonify({'error': 'Servidor ocupado. Tente novamente em instantes.'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
     @jwt.unauthorized_loader
     def unauthorized_callback(error):
         return jsonify({'error': 'Token de autenticação não fornecido'}), 401
@@ -93,14 +101,36 @@ def create_app(config_name='default'):
     def expired_token_callback(jwt_header, jwt_payload):
         return jsonify({'error': 'Token expirado'}), 401
     
+    # Usuário da requisição a partir dos claims (empresa/papel), validado contra o estado em cache
+    @jwt.user_lookup_loader
+    def user_lookup_callback(jwt_header, jwt_payload):
+        from app.services.principal import resolve_principal
+        return resolve_principal(jwt_payload)
+    
+    @jwt.user_lookup_error_loader
+    def user_lookup_error_callback(jwt_header, jwt_payload):
+        return jsonify({'error': 'Sessão inválida. Faça login novamente.'}), 401
+    
     return app
 # Importar ao final para evitar circular imports
 def register_frontend(app):
     import os
     from flask import send_from_directory, send_file
+    from app.services.public_page import get_page
+    from app.services.public_snapshot import snapshot_path, load_index_template, render_shell
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+    PUBLIC_PAGE_PREFIXES = ('p', 'book')
     
     frontend_dist = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend_dist')
     frontend_dist = os.path.abspath(frontend_dist)
+    with app.app_context():
+        load_index_template()
+    
+    def public_page_cache_control():
+        """Navegador revalida cedo; a CDN absorve o tráfego e revalida em segundo plano"""
+        return (f"public, max-age={app.config['PUBLIC_SNAPSHOT_MAX_AGE']}, "
+                f"s-maxage={app.config['PUBLIC_SNAPSHOT_SHARED_MAX_AGE']}, "
+                f"stale-while-revalidate={app.config['PUBLIC_SNAPSHOT_STALE_WHILE_REVALIDATE']}")
     
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
@@ -109,5 +139,25 @@ def register_frontend(app):
             return jsonify({'error': 'Recurso não encontrado'}), 404
         full_path = os.path.join(frontend_dist, path)
         if path and os.path.exists(full_path):
+            if path.startswith('assets/'):
+                # Arquivos com hash no nome: podem ficar em cache indefinidamente
+                response = send_from_directory(frontend_dist, path, max_age=ASSETS_MAX_AGE)
+                response.headers['Cache-Control'] += ', immutable'
+                return response
             return send_from_directory(frontend_dist, path)
+        # Página pública: snapshot já renderizado (os dados vão embutidos no HTML)
+        parts = path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] in PUBLIC_PAGE_PREFIXES:
+            snapshot = snapshot_path(parts[1], 'html')
+            if snapshot and os.path.exists(snapshot):
+                response = send_file(snapshot, conditional=True)
+                response.headers['Cache-Control'] = public_page_cache_control()
+                return response
+            # Sem snapshot: embute a página em cache no index.html (evita o segundo round trip)
+            page = get_page(parts[1])
+            if page is not None:
+                response = app.response_class(render_shell(page['body'], page.get('title')), mimetype='text/html')
+                response.set_etag(page['etag'])
+                response.headers['Cache-Control'] = public_page_cache_control()
+                return response.make_conditional(request)
         return send_file(os.path.join(frontend_dist, 'index.html'))
@@ -4,4 +4,4 @@ from flask import Blueprint
 api_bp = Blueprint('api', __name__)
 
 # Importar rotas
-from app.api import routes, auth, customers, appointments, products, config, financial, public, payments, google_auth, employees
\ No newline at end of file
+from app.api import routes, auth, customers, appointments, products, config, financial, public, payments, google_auth, employees, stocktake, lookup
\ No newline at end of file
@@ -1,24 +1,19 @@
 import os
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta, time
 from app import db
 from app.api import api_bp
 from app.models.appointment import Appointment
 from app.models.customer import Customer
-from app.models.user import User
+from app.services.principal import get_user_company_id
 from app.schemas.appointment import AppointmentSchema
 from app.models.company import Company
 from app.utils.google_calendar import create_calendar_event, update_calendar_event, delete_calendar_event
 from app.services.email import send_booking_confirmation, send_booking_notification, send_reminder
+from app.services.report_cache import invalidate_reports
+from app.services.tenant_cache import invalidate_availability
 
-def get_user_company_id():
-    """Obter company_id do usuário logado"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    if not user or not user.company_id:
-        return None
-    return user.company_id
 
 @api_bp.route('/appointments', methods=['GET'])
 @jwt_required()
@@ -224,6 +219,7 @@ def create_appointment():
         
         db.session.add(appointment)
         db.session.commit()
+        invalidate_availability(company_id, appointment_date)
 
         # Sincronizar com Google Calendar (se empresa conectada)
         try:
@@ -318,6 +314,8 @@ def update_appointment(appointment_id):
     if errors:
         return jsonify({'errors': errors}), 400
     
+    previous_date = appointment.appointment_date
+    
     try:
         # Atualizar campos
         if 'appointment_date' in data:
@@ -373,6 +371,8 @@ def update_appointment(appointment_id):
                     db.session.add(transaction)
         
         db.session.commit()
+        invalidate_availability(company_id, previous_date, appointment.appointment_date)
+        invalidate_reports(company_id)  # Concluir gera transação de receita
 
         # Sincronizar com Google Calendar
         try:
@@ -418,8 +418,10 @@ def delete_appointment(appointment_id):
         except Exception as cal_err:
             print(f"[Calendar] Erro não crítico: {cal_err}")
 
+        appointment_date = appointment.appointment_date
         db.session.delete(appointment)
         db.session.commit()
+        invalidate_availability(company_id, appointment_date)
         
         return jsonify({'message': 'Agendamento deletado com sucesso'}), 200
         
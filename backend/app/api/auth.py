@@ -1,10 +1,16 @@
-from flask import request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+import math
+from flask import current_app, request, jsonify
+from flask_jwt_extended import create_refresh_token, jwt_required, get_jwt_identity
 from app import db
 from app.api import api_bp
 from app.models.user import User
 from app.models.company import Company
 from app.schemas.auth import RegisterSchema, LoginSchema
+from app.utils.text import make_slug, normalize_email
+from app.services.login_throttle import clear_login_failures, login_blocked, record_login_failure
+from app.services.passwords import PasswordHasherBusy
+from app.services.principal import issue_access_token
+from app.services.rate_limit import client_ip
 
 @api_bp.route('/auth/register', methods=['POST', 'OPTIONS'])
 def register():
@@ -29,15 +35,6 @@ def register():
         # Criar empresa se fornecida
         company = None
         if data.get('company_name'):
-            import unicodedata
-            def make_slug(text):
-                text = unicodedata.normalize('NFKD', text)
-                text = ''.join(c for c in text if not unicodedata.combining(c))
-                text = text.lower().strip()
-                text = text.replace(' ', '-')
-                text = ''.join(c for c in text if c.isalnum() or c == '-')
-                text = '-'.join(p for p in text.split('-') if p)
-                return text
             slug = make_slug(data['company_name'])
             
             counter = 1
@@ -66,7 +63,7 @@ def register():
         db.session.commit()
         
         # Gerar tokens
-        access_token = create_access_token(identity=str(user.id))
+        access_token = issue_access_token(user)
         refresh_token = create_refresh_token(identity=str(user.id))
         
         return jsonify({
@@ -77,6 +74,9 @@ def register():
             'refresh_token': refresh_token
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Erro ao criar usuário: {str(e)}'}), 500
@@ -96,19 +96,43 @@ def login():
     if errors:
         return jsonify({'errors': errors}), 400
     
+    # Email/IP com falhas recentes: recusar antes de consultar o banco ou rodar o bcrypt
+    throttled = current_app.config.get('RATE_LIMIT_ENABLED', True)
+    email_key, ip = normalize_email(data['email']), client_ip()
+    if throttled:
+        wait = login_blocked(email_key, ip)
+        if wait > 0:
+            response = jsonify({'error': 'Muitas tentativas de login. Tente novamente mais tarde.'})
+            response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+            return response, 429
+    
     # Buscar usuário
     user = User.query.filter_by(email=data['email']).first()
     
     # Verificar se existe e senha está correta
     if not user or not user.check_password(data['password']):
+        if throttled:
+            record_login_failure(email_key, ip)
         return jsonify({'error': 'Email ou senha incorretos'}), 401
     
+    if throttled:
+        clear_login_failures(email_key)
+    
     # Verificar se está ativo
     if not user.is_active:
         return jsonify({'error': 'Usuário inativo'}), 403
     
+    # Atualizar hash gravado com custo antigo (a senha em texto só existe agora)
+    if user.password_needs_rehash():
+        try:
+            user.set_password(data['password'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'[Auth] Erro ao atualizar hash da senha: {e}')
+    
     # Gerar tokens
-    access_token = create_access_token(identity=str(user.id))
+    access_token = issue_access_token(user)
     refresh_token = create_refresh_token(identity=str(user.id))
     
     # Buscar empresa
@@ -151,8 +175,11 @@ def refresh():
     if request.method == 'OPTIONS':
         return '', 200
     
-    user_id = get_jwt_identity()
-    access_token = create_access_token(identity=user_id)
+    # Claims atualizados (empresa/papel); usuário inativo ou removido não renova
+    user = User.query.get(int(get_jwt_identity()))
+    if not user or not user.is_active:
+        return jsonify({'error': 'Usuário inativo'}), 401
+    access_token = issue_access_token(user)
     
     return jsonify({
         'access_token': access_token
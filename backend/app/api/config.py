@@ -1,19 +1,14 @@
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.api import api_bp
 from app.models.business_config import BusinessConfig
 from app.models.company import Company
-from app.models.user import User
+from app.services.principal import get_user_company_id
 from app.utils.business_templates import get_template, BUSINESS_TEMPLATES
+from app.utils.text import make_slug
+from app.services.tenant_cache import invalidate_company, invalidate_tenant
 
-def get_user_company_id():
-    """Obter company_id do usuário logado"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    if not user or not user.company_id:
-        return None
-    return user.company_id
 
 @api_bp.route('/config', methods=['GET'])
 @jwt_required()
@@ -36,6 +31,7 @@ def get_config():
         )
         db.session.add(config)
         db.session.commit()
+        invalidate_company(company_id)
     
     return jsonify(config.to_dict()), 200
 
@@ -106,6 +102,7 @@ def update_config():
             config.public_footer_text = text.get('footer', config.public_footer_text)
         
         db.session.commit()
+        invalidate_company(company_id)
         
         return jsonify({
             'message': 'Configurações atualizadas com sucesso',
@@ -155,6 +152,7 @@ def apply_template(business_type):
             db.session.add(config)
         
         db.session.commit()
+        invalidate_company(company_id)
         
         return jsonify({
             'message': f'Template "{template["name"]}" aplicado com sucesso',
@@ -225,15 +223,11 @@ def update_company():
     if not company:
         return jsonify({'error': 'Empresa não encontrada'}), 404
 
+    old_slug = company.slug
     try:
         if 'name' in data:
-            import unicodedata
             company.name = data['name']
-            new_slug = unicodedata.normalize('NFKD', data['name'])
-            new_slug = ''.join(ch for ch in new_slug if not unicodedata.combining(ch))
-            new_slug = new_slug.lower().strip().replace(' ', '-')
-            new_slug = ''.join(ch for ch in new_slug if ch.isalnum() or ch == '-')
-            new_slug = '-'.join(p for p in new_slug.split('-') if p)
+            new_slug = make_slug(data['name'])
             # Garantir slug único
             base_slug = new_slug
             counter = 1
@@ -248,6 +242,7 @@ def update_company():
         if 'primary_color' in data: company.primary_color = data['primary_color']
         if 'header_image_url' in data: company.header_image_url = data['header_image_url']
         db.session.commit()
+        invalidate_tenant(old_slug, company.slug)
         return jsonify({'message': 'Empresa atualizada com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,49 +1,253 @@
+import base64
+import os
+from datetime import datetime, date
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, func, case, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from app import db
 from app.api import api_bp
+from app.models.appointment import Appointment
+from app.models.business_config import BusinessConfig
+from app.models.company import Company
 from app.models.customer import Customer
-from app.models.user import User
+from app.models.customer_duplicate import CustomerDuplicate
+from app.models.customer_metrics import CustomerMetrics, RFM_SEGMENTS
+from app.models.financial import Transaction, AccountReceivable
+from app.services.principal import get_user_company_id
 from app.schemas.customer import CustomerSchema
+from app.services.customer_dedup import find_duplicates, merge_customers
+from app.services.rfm import compute_rfm
+from app.utils.text import fold_name, normalize_email, phone_search_digits
 
-def get_user_company_id():
-    """Obter company_id do usuário logado"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))  
-    
-    if not user or not user.company_id:
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Resumo do cliente
+UPCOMING_STATUSES = ('pending', 'confirmed')
+UPCOMING_LIMIT = 5
+
+# Campos disponíveis para projeção (?fields=)
+CUSTOMER_FIELDS = {
+    'id': Customer.id,
+    'name': Customer.name,
+    'email': Customer.email,
+    'phone': Customer.phone,
+    'cpf': Customer.cpf,
+    'birth_date': Customer.birth_date,
+    'address': Customer.address,
+    'notes': Customer.notes,
+    'custom_data': Customer.custom_data,
+    'company_id': Customer.company_id,
+    'is_active': Customer.is_active,
+    'created_at': Customer.created_at,
+    'updated_at': Customer.updated_at
+}
+
+def _parse_fields(raw):
+    """Lista de campos pedidos (sempre com id); None se houver campo inválido"""
+    if not raw:
+        return list(CUSTOMER_FIELDS)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    if any(f not in CUSTOMER_FIELDS for f in fields):
         return None
-    return user.company_id
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def _customer_fields(company_id):
+    config = BusinessConfig.query.filter_by(company_id=company_id).first()
+    return config.customer_fields if config else None
+
+def _custom_data_filters(company_id, args):
+    """Filtros ?custom.<campo>=valor; o Postgres usa @> (índice GIN em custom_data)"""
+    requested = {k[len('custom.'):]: v for k, v in args.items() if k.startswith('custom.')}
+    if not requested:
+        return []
+    
+    definitions = CustomerSchema.field_definitions(_customer_fields(company_id))
+    postgres = db.session.get_bind().dialect.name == 'postgresql'
+    filters = []
+    for key, raw in requested.items():
+        if key not in definitions:
+            raise ValueError(f'Campo customizado não configurado: {key}')
+        field_type = definitions[key]['type']
+        try:
+            value = CustomerSchema.coerce_custom_value(field_type, raw)
+        except (TypeError, ValueError):
+            raise ValueError(f'Valor inválido para {key} ({field_type})')
+        
+        if postgres:
+            filters.append(type_coerce(Customer.custom_data, JSONB).contains({key: value}))
+        elif field_type == 'number':
+            filters.append(Customer.custom_data[key].as_float() == value)
+        elif field_type == 'boolean':
+            filters.append(Customer.custom_data[key].as_boolean() == value)
+        else:
+            filters.append(Customer.custom_data[key].as_string() == value)
+    return filters
+
+def _email_in_use(company_id, email, exclude_id=None):
+    """Email já usado por outro cliente ativo da empresa (índice único)"""
+    email_normalized = normalize_email(email)
+    if not email_normalized:
+        return False
+    query = Customer.query.filter_by(company_id=company_id, email_normalized=email_normalized, is_active=True)
+    if exclude_id:
+        query = query.filter(Customer.id != exclude_id)
+    return db.session.query(query.exists()).scalar()
+
+def _row_to_dict(fields, row):
+    return {
+        field: value.isoformat() if hasattr(value, 'isoformat') else value
+        for field, value in zip(fields, row)
+    }
+
+def _encode_cursor(*values):
+    raw = '|'.join(
+        v.isoformat() if hasattr(v, 'isoformat') else ('' if v is None else str(v))
+        for v in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor, types=(datetime.fromisoformat, int)):
+    try:
+        parts = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if len(parts) != len(types):
+            raise ValueError
+        return [t(p) for t, p in zip(types, parts)]
+    except Exception:
+        raise ValueError('cursor inválido')
 
 @api_bp.route('/customers', methods=['GET'])
 @jwt_required()
 def get_customers():
-    """Listar clientes da empresa (apenas ativos)"""
+    """Listar clientes da empresa (apenas ativos), paginado por cursor
+    
+    Parâmetros: limit (padrão 50), cursor (next_cursor da página anterior),
+    fields (ex.: "id,name,phone"), include_total=1 e all=1 (lista completa, sem paginação).
+    segment (ex.: "champions,loyal") e sort=segment usam as métricas RFM da última
+    execução noturna; clientes ainda sem métricas não entram nessas listagens.
+    """
     company_id = get_user_company_id()
     if not company_id:
         return jsonify({'error': 'Usuário sem empresa associada'}), 403
     
     # Parâmetros de busca
     search = request.args.get('search', '')
+    fields = _parse_fields(request.args.get('fields'))
+    if fields is None:
+        return jsonify({'error': f'Campos válidos: {", ".join(CUSTOMER_FIELDS)}'}), 400
+    
+    segments = [v.strip() for v in request.args.get('segment', '').split(',') if v.strip()]
+    if any(v not in RFM_SEGMENTS for v in segments):
+        return jsonify({'error': f'Segmentos válidos: {", ".join(RFM_SEGMENTS)}'}), 400
+    by_segment = request.args.get('sort') == 'segment'
+    
+    try:
+        custom_filters = _custom_data_filters(company_id, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Query base - APENAS CLIENTES ATIVOS
     query = Customer.query.filter_by(company_id=company_id, is_active=True)
+    if custom_filters:
+        query = query.filter(*custom_filters)
+    
+    # Segmento RFM: a junção parte do índice de customer_metrics da empresa
+    if segments or by_segment:
+        query = query.join(CustomerMetrics, CustomerMetrics.customer_id == Customer.id).filter(
+            CustomerMetrics.company_id == company_id
+        )
+        if segments:
+            query = query.filter(CustomerMetrics.segment.in_(segments))
     
-    # Busca por nome, email ou telefone
+    # Busca por nome, email ou telefone (pelas chaves normalizadas)
     if search:
-        query = query.filter(
-            db.or_(
-                Customer.name.ilike(f'%{search}%'),
-                Customer.email.ilike(f'%{search}%'),
-                Customer.phone.ilike(f'%{search}%')
+        name, email, digits = fold_name(search), normalize_email(search), phone_search_digits(search)
+        conditions = []
+        if name:
+            conditions.append(Customer.name_folded.contains(name, autoescape=True))
+        if email:
+            conditions.append(Customer.email_normalized.contains(email, autoescape=True))
+        if digits:
+            conditions.append(Customer.phone_digits.contains(digits, autoescape=True))
+        if conditions:
+            query = query.filter(db.or_(*conditions))
+    
+    total = query.count() if request.args.get('include_total') in ('1', 'true') else None
+    
+    # Chave de ordenação (e do cursor): mais recentes, ou segmento e valor gasto
+    if by_segment:
+        sort_keys = (CustomerMetrics.segment_rank, CustomerMetrics.monetary, Customer.id)
+        cursor_types = (int, float, int)
+        ordered = query.order_by(CustomerMetrics.segment_rank, CustomerMetrics.monetary.desc(), Customer.id.desc())
+    else:
+        sort_keys = (Customer.created_at, Customer.id)
+        cursor_types = (datetime.fromisoformat, int)
+        ordered = query.order_by(Customer.created_at.desc(), Customer.id.desc())
+    
+    extra = (CustomerMetrics.segment,) if segments or by_segment else ()
+    
+    def serialize(row):
+        data = _row_to_dict(fields, row[:len(fields)])
+        if extra:
+            data['segment'] = row[len(fields)]
+        return data
+    
+    # Lista completa apenas quando pedida explicitamente
+    if request.args.get('all') in ('1', 'true'):
+        rows = ordered.with_entities(*[CUSTOMER_FIELDS[f] for f in fields], *extra).all()
+        response = {'customers': [serialize(row) for row in rows]}
+        if total is not None:
+            response['total'] = total
+        return jsonify(response), 200
+    
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_values = _decode_cursor(cursor, cursor_types)
+        except ValueError:
+            return jsonify({'error': 'Cursor inválido'}), 400
+        if by_segment:
+            rank, monetary, cursor_id = cursor_values
+            ordered = ordered.filter(
+                db.or_(
+                    CustomerMetrics.segment_rank > rank,
+                    db.and_(CustomerMetrics.segment_rank == rank, CustomerMetrics.monetary < monetary),
+                    db.and_(CustomerMetrics.segment_rank == rank, CustomerMetrics.monetary == monetary,
+                            Customer.id < cursor_id)
+                )
+            )
+        else:
+            cursor_created_at, cursor_id = cursor_values
+            ordered = ordered.filter(
+                db.or_(
+                    Customer.created_at < cursor_created_at,
+                    db.and_(Customer.created_at == cursor_created_at, Customer.id < cursor_id)
+                )
             )
-        )
     
-    customers = query.order_by(Customer.created_at.desc()).all()
+    # Buscar um a mais para saber se há próxima página
+    columns = [CUSTOMER_FIELDS[f] for f in fields]
+    rows = ordered.with_entities(*columns, *extra, *sort_keys).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     
-    return jsonify({
-        'customers': [customer.to_dict() for customer in customers]
-    }), 200
+    response = {
+        'customers': [serialize(row) for row in rows],
+        'next_cursor': _encode_cursor(*rows[-1][-len(sort_keys):]) if has_more else None,
+        'has_more': has_more,
+        'limit': limit
+    }
+    if total is not None:
+        response['total'] = total
+    
+    return jsonify(response), 200
 
 @api_bp.route('/customers', methods=['POST'])
 @jwt_required()
@@ -57,6 +261,12 @@ def create_customer():
     
     # Validar dados
     errors = CustomerSchema.validate(data)
+    custom_data, custom_errors = CustomerSchema.validate_custom_data(
+        data.get('custom_data'), _customer_fields(company_id)
+    )
+    errors.update(custom_errors)
+    if not errors.get('email') and _email_in_use(company_id, data.get('email')):
+        errors['email'] = 'Email já cadastrado para outro cliente'
     if errors:
         return jsonify({'errors': errors}), 400
     
@@ -68,6 +278,7 @@ def create_customer():
             cpf=data.get('cpf'),
             address=data.get('address'),
             notes=data.get('notes'),
+            custom_data=custom_data or None,
             company_id=company_id
         )
         
@@ -104,6 +315,101 @@ def get_customer(customer_id):
         'customer': customer.to_dict()
     }), 200
 
+@api_bp.route('/customers/<int:customer_id>/summary', methods=['GET'])
+@jwt_required()
+def get_customer_summary(customer_id):
+    """Resumo do cliente: visitas, última visita, total gasto, contas em aberto, faltas e próximos agendamentos
+    
+    Os indicadores saem de uma única consulta agregada (uma subconsulta por tabela,
+    todas filtradas pelo índice de customer_id).
+    """
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    customer = Customer.query.filter_by(
+        id=customer_id,
+        company_id=company_id,
+        is_active=True
+    ).first()
+    
+    if not customer:
+        return jsonify({'error': 'Cliente não encontrado'}), 404
+    
+    today = date.today()
+    completed = Appointment.status == 'completed'
+    upcoming = db.and_(
+        Appointment.appointment_date >= today,
+        Appointment.status.in_(UPCOMING_STATUSES)
+    )
+    
+    appointments = select(
+        func.count(case((completed, 1))).label('visits'),
+        func.max(case((completed, Appointment.appointment_date))).label('last_visit'),
+        func.count(case((Appointment.status == 'no_show', 1))).label('no_shows'),
+        func.count(case((upcoming, 1))).label('upcoming')
+    ).where(
+        Appointment.customer_id == customer_id,
+        Appointment.company_id == company_id
+    ).subquery()
+    
+    spent = select(
+        func.coalesce(func.sum(Transaction.amount), 0).label('total_spent')
+    ).where(
+        Transaction.customer_id == customer_id,
+        Transaction.company_id == company_id,
+        Transaction.type == 'income',
+        Transaction.status == 'completed'
+    ).subquery()
+    
+    receivables = select(
+        func.count(AccountReceivable.id).label('open_count'),
+        func.coalesce(func.sum(AccountReceivable.amount), 0).label('open_amount')
+    ).where(
+        AccountReceivable.customer_id == customer_id,
+        AccountReceivable.company_id == company_id,
+        AccountReceivable.status.in_(('pending', 'overdue'))
+    ).subquery()
+    
+    # Cada subconsulta devolve uma linha: junção 1x1x1
+    totals = db.session.execute(
+        select(appointments, spent, receivables).select_from(
+            appointments.join(spent, db.true()).join(receivables, db.true())
+        )
+    ).one()
+    
+    # Lista dos próximos agendamentos só quando existem
+    next_appointments = []
+    if totals.upcoming:
+        next_appointments = Appointment.query.filter(
+            Appointment.customer_id == customer_id,
+            Appointment.company_id == company_id,
+            upcoming
+        ).order_by(
+            Appointment.appointment_date,
+            Appointment.appointment_time
+        ).limit(UPCOMING_LIMIT).all()
+    
+    last_visit = totals.last_visit
+    if last_visit is not None and not isinstance(last_visit, date):
+        last_visit = date.fromisoformat(str(last_visit)[:10])  # SQLite devolve texto
+    
+    return jsonify({
+        'customer': customer.to_dict(),
+        'summary': {
+            'visit_count': totals.visits,
+            'last_visit': last_visit.isoformat() if last_visit else None,
+            'total_spent': float(totals.total_spent or 0),
+            'open_receivables': {
+                'count': totals.open_count,
+                'amount': float(totals.open_amount or 0)
+            },
+            'no_show_count': totals.no_shows,
+            'upcoming_count': totals.upcoming
+        },
+        'upcoming_appointments': [a.to_dict() for a in next_appointments]
+    }), 200
+
 @api_bp.route('/customers/<int:customer_id>', methods=['PUT'])
 @jwt_required()
 def update_customer(customer_id):
@@ -124,6 +430,13 @@ def update_customer(customer_id):
     
     # Validar dados
     errors = CustomerSchema.validate(data, is_update=True)
+    if 'custom_data' in data:
+        custom_data, custom_errors = CustomerSchema.validate_custom_data(
+            data['custom_data'], _customer_fields(company_id)
+        )
+        errors.update(custom_errors)
+    if not errors.get('email') and _email_in_use(company_id, data.get('email'), exclude_id=customer.id):
+        errors['email'] = 'Email já cadastrado para outro cliente'
     if errors:
         return jsonify({'errors': errors}), 400
     
@@ -141,6 +454,8 @@ def update_customer(customer_id):
             customer.address = data['address']
         if 'notes' in data:
             customer.notes = data['notes']
+        if 'custom_data' in data:
+            customer.custom_data = custom_data or None
         
         db.session.commit()
         
@@ -180,4 +495,197 @@ def delete_customer(customer_id):
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': f'Erro ao desativar cliente: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Erro ao desativar cliente: {str(e)}'}), 500
+
+@api_bp.route('/customers/duplicates', methods=['GET'])
+@jwt_required()
+def get_customer_duplicates():
+    """Listar grupos de clientes possivelmente duplicados (maior pontuação primeiro)"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    min_score = request.args.get('min_score', 0, type=float)
+    
+    pairs = CustomerDuplicate.query.filter(
+        CustomerDuplicate.company_id == company_id,
+        CustomerDuplicate.status == 'pending',
+        CustomerDuplicate.score >= min_score
+    ).order_by(CustomerDuplicate.score.desc(), CustomerDuplicate.id).all()
+    
+    groups = {}
+    for pair in pairs:
+        if pair.customer_id not in groups and len(groups) >= limit:
+            continue
+        groups.setdefault(pair.customer_id, []).append(pair)
+    
+    ids = set(groups) | {p.duplicate_id for group in groups.values() for p in group}
+    customers = {c.id: c for c in Customer.query.filter(Customer.id.in_(ids)).all()} if ids else {}
+    
+    return jsonify({
+        'groups': [
+            {
+                'customer': customers[primary_id].to_dict(),
+                'duplicates': [
+                    dict(pair.to_dict(), customer=customers[pair.duplicate_id].to_dict())
+                    for pair in group
+                ]
+            }
+            for primary_id, group in groups.items()
+        ],
+        'total_pairs': len(pairs)
+    }), 200
+
+@api_bp.route('/customers/duplicates/scan', methods=['POST'])
+@jwt_required()
+def scan_customer_duplicates():
+    """Recalcular os candidatos a duplicidade da empresa"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    try:
+        return jsonify({'candidates': find_duplicates(company_id)}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao buscar duplicados: {str(e)}'}), 500
+
+@api_bp.route('/customers/duplicates/<int:duplicate_id>/dismiss', methods=['POST'])
+@jwt_required()
+def dismiss_customer_duplicate(duplicate_id):
+    """Descartar sugestão de duplicidade (não volta a ser sugerida)"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    pair = CustomerDuplicate.query.filter_by(id=duplicate_id, company_id=company_id, status='pending').first()
+    if not pair:
+        return jsonify({'error': 'Sugestão não encontrada'}), 404
+    
+    try:
+        pair.status = 'dismissed'
+        pair.resolved_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify({'message': 'Sugestão descartada'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao descartar sugestão: {str(e)}'}), 500
+
+@api_bp.route('/customers/<int:customer_id>/merge', methods=['POST'])
+@jwt_required()
+def merge_customer(customer_id):
+    """Mesclar clientes duplicados neste cliente
+    
+    Body: {"duplicate_ids": [12, 34]}
+    """
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    primary = Customer.query.filter_by(id=customer_id, company_id=company_id, is_active=True).first()
+    if not primary:
+        return jsonify({'error': 'Cliente não encontrado'}), 404
+    
+    data = request.get_json() or {}
+    try:
+        duplicate_ids = {int(i) for i in data.get('duplicate_ids') or []}
+    except (TypeError, ValueError):
+        return jsonify({'error': 'duplicate_ids inválido'}), 400
+    duplicate_ids.discard(primary.id)
+    if not duplicate_ids:
+        return jsonify({'error': 'Informe os clientes a mesclar (duplicate_ids)'}), 400
+    
+    duplicates = Customer.query.filter(
+        Customer.id.in_(duplicate_ids),
+        Customer.company_id == company_id,
+        Customer.is_active == True
+    ).all()
+    if len(duplicates) != len(duplicate_ids):
+        return jsonify({'error': 'Cliente duplicado não encontrado'}), 404
+    
+    try:
+        moved = merge_customers(primary, duplicates)
+        
+        return jsonify({
+            'message': 'Clientes mesclados com sucesso',
+            'customer': primary.to_dict(),
+            'merged_ids': sorted(duplicate_ids),
+            'moved': moved
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao mesclar clientes: {str(e)}'}), 500
+
+@api_bp.route('/internal/customer-dedup', methods=['POST'])
+def run_customer_dedup():
+    """Endpoint chamado por cron externo para recalcular duplicados de todas as empresas"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    company_ids = [c.id for c in Company.query.with_entities(Company.id).filter_by(is_active=True)]
+    
+    candidates = 0
+    for company_id in company_ids:
+        try:
+            candidates += find_duplicates(company_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f'[Dedup] Erro empresa {company_id}: {e}')
+    
+    return jsonify({'companies': len(company_ids), 'candidates': candidates}), 200
+
+@api_bp.route('/customers/segments', methods=['GET'])
+@jwt_required()
+def get_customer_segments():
+    """Quantidade de clientes e valor gasto por segmento RFM"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    rows = db.session.query(
+        CustomerMetrics.segment,
+        func.count(CustomerMetrics.customer_id),
+        func.coalesce(func.sum(CustomerMetrics.monetary), 0),
+        func.max(CustomerMetrics.computed_at)
+    ).filter(
+        CustomerMetrics.company_id == company_id
+    ).group_by(CustomerMetrics.segment).all()
+    
+    by_segment = {segment: (count, monetary) for segment, count, monetary, _ in rows}
+    computed_at = max((r[3] for r in rows if r[3]), default=None)
+    
+    return jsonify({
+        'segments': [
+            {
+                'segment': segment,
+                'customers': by_segment.get(segment, (0, 0))[0],
+                'monetary': round(float(by_segment.get(segment, (0, 0))[1]), 2)
+            }
+            for segment in RFM_SEGMENTS
+        ],
+        'computed_at': computed_at.isoformat() if computed_at else None
+    }), 200
+
+@api_bp.route('/internal/customer-rfm', methods=['POST'])
+def run_customer_rfm():
+    """Endpoint chamado por cron externo para recalcular os segmentos RFM"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    company_ids = [c.id for c in Company.query.with_entities(Company.id).filter_by(is_active=True)]
+    
+    processed = 0
+    for company_id in company_ids:
+        try:
+            processed += compute_rfm(company_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f'[RFM] Erro empresa {company_id}: {e}')
+    
+    return jsonify({'companies': len(company_ids), 'customers': processed}), 200
@@ -1,14 +1,15 @@
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 from app import db
 from app.api import api_bp
 from app.models.user import User
 from app.models.company import Company
+from app.services.principal import invalidate_principal
 import bcrypt
 
 def get_current_user():
-    user_id = get_jwt_identity()
-    return User.query.get(int(user_id))
+    """Principal da requisição (id, company_id, role), sem consultar o banco"""
+    return current_user
 
 # ── Listar funcionários da empresa ──
 @api_bp.route('/employees', methods=['GET'])
@@ -61,6 +62,7 @@ def update_employee(employee_id):
     if 'password' in data and data['password']: employee.set_password(data['password'])
     if 'is_active' in data: employee.is_active = data['is_active']
     db.session.commit()
+    invalidate_principal(employee.id)
     return jsonify({'message': 'Funcionário atualizado', 'employee': employee.to_dict()}), 200
 
 # ── Deletar funcionário ──
@@ -75,8 +77,10 @@ def delete_employee(employee_id):
         return jsonify({'error': 'Funcionário não encontrado'}), 404
     if employee.id == user.id:
         return jsonify({'error': 'Não é possível remover a si mesmo'}), 400
+    employee_id = employee.id
     db.session.delete(employee)
     db.session.commit()
+    invalidate_principal(employee_id)
     return jsonify({'message': 'Funcionário removido'}), 200
 
 # ── Relatório de comissão ──
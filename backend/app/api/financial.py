@@ -1,5 +1,5 @@
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime, date
 from app import db
 from app.api import api_bp
@@ -10,15 +10,8 @@ from app.models.financial import (
     AccountReceivable, 
     Invoice
 )
-from app.models.user import User
-
-def get_user_company_id():
-    """Obter company_id do usuário logado"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    if not user or not user.company_id:
-        return None
-    return user.company_id
+from app.services.principal import get_user_company_id
+from app.services.report_cache import cached_report, invalidate_reports
 
 
 # ==================== CATEGORIAS FINANCEIRAS ====================
@@ -156,6 +149,7 @@ def create_transaction():
         
         db.session.add(transaction)
         db.session.commit()
+        invalidate_reports(company_id)
         
         return jsonify({
             'message': 'Transação criada com sucesso',
@@ -197,6 +191,7 @@ def update_transaction(transaction_id):
             transaction.notes = data['notes']
         
         db.session.commit()
+        invalidate_reports(company_id)
         
         return jsonify({
             'message': 'Transação atualizada com sucesso',
@@ -224,6 +219,7 @@ def delete_transaction(transaction_id):
     try:
         db.session.delete(transaction)
         db.session.commit()
+        invalidate_reports(company_id)
         return jsonify({'message': 'Transação deletada com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
@@ -258,6 +254,8 @@ def get_payables():
         account.status = 'overdue'
     
     db.session.commit()
+    if overdue:
+        invalidate_reports(company_id)
     
     payables = query.order_by(AccountPayable.due_date.asc()).all()
     
@@ -291,6 +289,7 @@ def create_payable():
         
         db.session.add(payable)
         db.session.commit()
+        invalidate_reports(company_id)
         
         return jsonify({
             'message': 'Conta a pagar criada com sucesso',
@@ -326,6 +325,7 @@ def pay_payable(payable_id):
         payable.payment_method = data.get('payment_method')
         
         db.session.commit()
+        invalidate_reports(company_id)
         
         return jsonify({
             'message': 'Conta marcada como paga',
@@ -353,6 +353,7 @@ def delete_payable(payable_id):
     try:
         db.session.delete(payable)
         db.session.commit()
+        invalidate_reports(company_id)
         return jsonify({'message': 'Conta deletada com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
@@ -387,6 +388,8 @@ def get_receivables():
         account.status = 'overdue'
     
     db.session.commit()
+    if overdue:
+        invalidate_reports(company_id)
     
     receivables = query.order_by(AccountReceivable.due_date.asc()).all()
     
@@ -420,6 +423,7 @@ def create_receivable():
         
         db.session.add(receivable)
         db.session.commit()
+        invalidate_reports(company_id)
         
         return jsonify({
             'message': 'Conta a receber criada com sucesso',
@@ -455,6 +459,7 @@ def receive_receivable(receivable_id):
         receivable.payment_method = data.get('payment_method')
         
         db.session.commit()
+        invalidate_reports(company_id)
         
         return jsonify({
             'message': 'Conta marcada como recebida',
@@ -482,6 +487,7 @@ def delete_receivable(receivable_id):
     try:
         db.session.delete(receivable)
         db.session.commit()
+        invalidate_reports(company_id)
         return jsonify({'message': 'Conta deletada com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
@@ -627,40 +633,45 @@ def financial_summary():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Transaction.query.filter_by(company_id=company_id)
+    def build():
+        query = Transaction.query.filter_by(company_id=company_id)
     
-    if start_date:
-        query = query.filter(Transaction.transaction_date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.transaction_date <= end_date)
+        if start_date:
+            query = query.filter(Transaction.transaction_date >= start_date)
+        if end_date:
+            query = query.filter(Transaction.transaction_date <= end_date)
     
-    transactions = query.all()
+        transactions = query.all()
     
-    income = sum(float(t.amount) for t in transactions if t.type == 'income')
-    expenses = sum(float(t.amount) for t in transactions if t.type == 'expense')
-    balance = income - expenses
+        income = sum(float(t.amount) for t in transactions if t.type == 'income')
+        expenses = sum(float(t.amount) for t in transactions if t.type == 'expense')
+        balance = income - expenses
     
-    # Contas a pagar pendentes
-    payables_pending = AccountPayable.query.filter_by(
-        company_id=company_id, 
-        status='pending'
-    ).all()
+        # Contas a pagar pendentes
+        payables_pending = AccountPayable.query.filter_by(
+            company_id=company_id, 
+            status='pending'
+        ).all()
     
-    total_payables = sum(float(p.amount) for p in payables_pending)
+        total_payables = sum(float(p.amount) for p in payables_pending)
     
-    # Contas a receber pendentes
-    receivables_pending = AccountReceivable.query.filter_by(
-        company_id=company_id, 
-        status='pending'
-    ).all()
+        # Contas a receber pendentes
+        receivables_pending = AccountReceivable.query.filter_by(
+            company_id=company_id, 
+            status='pending'
+        ).all()
     
-    total_receivables = sum(float(r.amount) for r in receivables_pending)
+        total_receivables = sum(float(r.amount) for r in receivables_pending)
     
-    return jsonify({
-        'income': income,
-        'expenses': expenses,
-        'balance': balance,
-        'payables_pending': total_payables,
-        'receivables_pending': total_receivables,
-        'projected_balance': balance - total_payables + total_receivables
-    }), 200
\ No newline at end of file
+        return {
+            'income': income,
+            'expenses': expenses,
+            'balance': balance,
+            'payables_pending': total_payables,
+            'receivables_pending': total_receivables,
+            'projected_balance': balance - total_payables + total_receivables
+        }
+    
+    # Em cache por empresa e período (invalidado ao alterar transações e contas)
+    summary = cached_report(company_id, 'financial_summary', (start_date, end_date), build)
+    return jsonify(summary), 200
\ No newline at end of file
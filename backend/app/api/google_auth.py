@@ -3,7 +3,7 @@ from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 import google.auth.transport.requests
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 from app.models.company import Company
 from app.models.user import User
 from app import db
@@ -65,8 +65,8 @@ def google_login():
 # ── 2. Callback do Google (login) ────────────────────────────────────────────
 @google_auth_bp.route('/auth/google/callback')
 def google_callback():
-    from flask_jwt_extended import create_access_token
     from app.models.company import Company
+    from app.services.principal import issue_access_token
     from app.models.user import User
     import requests as http_requests
 
@@ -121,7 +121,7 @@ def google_callback():
                 db.session.commit()
 
         # Gerar JWT do sistema
-        token = create_access_token(identity=str(user.id))
+        token = issue_access_token(user)
         return redirect(f"{_frontend()}/auth/google/success?token={token}")
 
     except Exception as e:
@@ -179,9 +179,7 @@ def calendar_callback():
 @google_auth_bp.route('/auth/google/calendar/status')
 @jwt_required()
 def calendar_status():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    company = Company.query.get(user.company_id)
+    company = Company.query.get(current_user.company_id) if current_user.company_id else None
     connected = bool(company and company.google_refresh_token)
     return jsonify({'connected': connected})
 
@@ -190,9 +188,7 @@ def calendar_status():
 @google_auth_bp.route('/auth/google/calendar/disconnect', methods=['POST'])
 @jwt_required()
 def calendar_disconnect():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    company = Company.query.get(user.company_id)
+    company = Company.query.get(current_user.company_id) if current_user.company_id else None
     if company:
         company.google_refresh_token = None
         db.session.commit()
@@ -0,0 +1,109 @@
+from flask import request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, func
+from app import db
+from app.api import api_bp
+from app.models.customer import Customer
+from app.models.product import Product
+from app.services.principal import get_user_company_id
+from app.utils.text import fold_name, phone_search_digits
+
+LOOKUP_LIMIT = 10
+MIN_QUERY_LENGTH = 2
+
+
+def _prefix_then_contains(base, columns, prefix_filter, contains_filter, order_by):
+    """Primeiro os que começam com o termo (índice de prefixo), depois os que contêm (trigram)"""
+    rows = db.session.execute(
+        base.where(prefix_filter).order_by(order_by).limit(LOOKUP_LIMIT)
+    ).all()
+    
+    if len(rows) < LOOKUP_LIMIT:
+        found = [r[0] for r in rows]
+        more = base.where(contains_filter)
+        if found:
+            more = more.where(columns[0].notin_(found))
+        rows += db.session.execute(
+            more.order_by(order_by).limit(LOOKUP_LIMIT - len(rows))
+        ).all()
+    
+    return rows
+
+@api_bp.route('/lookup/customers', methods=['GET'])
+@jwt_required()
+def lookup_customers():
+    """Busca rápida de clientes para campos de seleção (até 10 resultados)"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    q = (request.args.get('q') or '').strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        return jsonify({'results': []}), 200
+    
+    columns = (Customer.id, Customer.name, Customer.phone)
+    base = select(*columns).where(
+        Customer.company_id == company_id,
+        Customer.is_active == True
+    )
+    
+    # Termo só com dígitos e formatação de telefone: buscar pelos dígitos normalizados
+    digits = phone_search_digits(q, min_digits=MIN_QUERY_LENGTH)
+    if digits:
+        rows = _prefix_then_contains(
+            base, columns,
+            Customer.phone_digits.startswith(digits, autoescape=True),
+            Customer.phone_digits.contains(digits, autoescape=True),
+            Customer.name
+        )
+    else:
+        term = fold_name(q) or ''
+        rows = _prefix_then_contains(
+            base, columns,
+            Customer.name_folded.startswith(term, autoescape=True),
+            Customer.name_folded.contains(term, autoescape=True),
+            Customer.name
+        )
+    
+    return jsonify({
+        'results': [{'id': r[0], 'name': r[1], 'phone': r[2]} for r in rows]
+    }), 200
+
+@api_bp.route('/lookup/products', methods=['GET'])
+@jwt_required()
+def lookup_products():
+    """Busca rápida de produtos por nome, SKU ou código de barras (até 10 resultados)"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    q = (request.args.get('q') or '').strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        return jsonify({'results': []}), 200
+    
+    columns = (Product.id, Product.name, Product.sku)
+    base = select(*columns).where(
+        Product.company_id == company_id,
+        Product.is_active == True
+    )
+    
+    term = q.lower()
+    name = func.lower(Product.name)
+    sku = func.lower(Product.sku)
+    rows = _prefix_then_contains(
+        base, columns,
+        db.or_(
+            name.startswith(term, autoescape=True),
+            sku.startswith(term, autoescape=True),
+            Product.barcode == q
+        ),
+        db.or_(
+            name.contains(term, autoescape=True),
+            sku.contains(term, autoescape=True)
+        ),
+        Product.name
+    )
+    
+    return jsonify({
+        'results': [{'id': r[0], 'name': r[1], 'sku': r[2]} for r in rows]
+    }), 200
@@ -1,9 +1,12 @@
 from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
 from app.api import api_bp
 from app.models.user import User
 from app.models.company import Company
 from app.models.subscription import Subscription
+from app.services.idempotency import idempotent
+from app.services.entitlements import invalidate_entitlement
+from app.services.principal import get_user_company_id
 from app import db
 import mercadopago
 import os
@@ -29,12 +32,9 @@ PLANS = {
 }
 
 def get_user_company():
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    if not user or not user.company_id:
-        return None, None
-    company = Company.query.get(user.company_id)
-    return user, company
+    """Empresa do usuário logado (a empresa vem do token, sem consultar o usuário)"""
+    company_id = get_user_company_id()
+    return db.session.get(Company, company_id) if company_id else None
 
 
 @api_bp.route('/payments/plans', methods=['GET'])
@@ -47,7 +47,7 @@ def list_plans():
 @jwt_required()
 def get_subscription():
     """Retorna a assinatura atual da empresa"""
-    _, company = get_user_company()
+    company = get_user_company()
     if not company:
         return jsonify({'error': 'Empresa não encontrada'}), 404
 
@@ -60,9 +60,10 @@ def get_subscription():
 
 @api_bp.route('/payments/create-checkout', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_checkout():
     """Cria um link de pagamento no Mercado Pago"""
-    user, company = get_user_company()
+    company = get_user_company()
     if not company:
         return jsonify({'error': 'Empresa não encontrada'}), 404
 
@@ -74,6 +75,9 @@ def create_checkout():
 
     plan = PLANS[plan_key]
 
+    # Dados do pagador: só nesta rota, só as colunas usadas
+    payer = User.query.with_entities(User.email, User.name).filter_by(id=current_user.id).first()
+
     sdk = mercadopago.SDK(MP_ACCESS_TOKEN)
 
     preference_data = {
@@ -85,8 +89,8 @@ def create_checkout():
             'unit_price': plan['price'],
         }],
         'payer': {
-            'email': user.email,
-            'name': user.name,
+            'email': payer.email,
+            'name': payer.name,
         },
         'back_urls': {
             'success': 'https://www.sahjo.com.br/dashboard?payment=success',
@@ -150,6 +154,7 @@ def mp_webhook():
                         company.subscription_status = 'active'
 
                     db.session.commit()
+                    invalidate_entitlement(company_id)
 
         except Exception as e:
             print(f'Erro no webhook MP: {e}')
@@ -161,7 +166,7 @@ def mp_webhook():
 @jwt_required()
 def cancel_subscription():
     """Cancelar assinatura"""
-    _, company = get_user_company()
+    company = get_user_company()
     if not company:
         return jsonify({'error': 'Empresa não encontrada'}), 404
 
@@ -173,5 +178,6 @@ def cancel_subscription():
     sub.cancelled_at = datetime.utcnow()
     company.subscription_status = 'cancelled'
     db.session.commit()
+    invalidate_entitlement(company.id)
 
     return jsonify({'message': 'Assinatura cancelada'}), 200
\ No newline at end of file
@@ -1,19 +1,22 @@
+import os
+from datetime import datetime
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.api import api_bp
 from app.models.product import Product
 from app.models.stock_movement import StockMovement
-from app.models.user import User
+from app.services.principal import get_user_company_id
 from app.schemas.product import ProductSchema, StockMovementSchema
+from app.models.stock_alert import LowStockAlert
+from app.models.product_forecast import ProductForecast
+from app.models.company import Company
+from app.services.stock_snapshot import MIN_KEEP_DAYS, stock_at, take_snapshots, compact_movements
+from app.services.stock_alerts import record_stock_change, open_alerts_query, send_low_stock_digests
+from app.services.forecast import run_forecast, LEAD_TIME_DAYS
+from app.services import abc_analysis
+from app.services.tenant_cache import invalidate_public_page
 
-def get_user_company_id():
-    """Obter company_id do usuário logado"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    if not user or not user.company_id:
-        return None
-    return user.company_id
 
 @api_bp.route('/products', methods=['GET'])
 @jwt_required()
@@ -70,18 +73,113 @@ def low_stock_products():
     if not company_id:
         return jsonify({'error': 'Usuário sem empresa associada'}), 403
     
-    products = Product.query.filter_by(
-        company_id=company_id,
-        is_active=True
-    ).filter(
-        Product.quantity <= Product.min_quantity
+    # Lê a tabela de alertas abertos (mantida nas movimentações) em vez de varrer o catálogo
+    alerts = open_alerts_query(company_id).options(
+        db.contains_eager(LowStockAlert.product)
     ).order_by(Product.quantity).all()
     
     return jsonify({
-        'products': [p.to_dict() for p in products],
-        'total': len(products)
+        'products': [a.product.to_dict() for a in alerts],
+        'alerts': [a.to_dict() for a in alerts],
+        'total': len(alerts)
+    }), 200
+
+@api_bp.route('/products/stock-at', methods=['GET'])
+@jwt_required()
+def stock_at_date():
+    """Estoque (quantidade e valor) ao final de uma data"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    date_str = request.args.get('date')
+    if not date_str:
+        return jsonify({'error': 'Parâmetro "date" é obrigatório'}), 400
+    
+    try:
+        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Data inválida. Use formato YYYY-MM-DD'}), 400
+    
+    if target_date > datetime.utcnow().date():
+        return jsonify({'error': 'Data no futuro'}), 400
+    
+    product_id = request.args.get('product_id', type=int)
+    
+    return jsonify(stock_at(company_id, target_date, product_id)), 200
+
+@api_bp.route('/products/reorder-suggestions', methods=['GET'])
+@jwt_required()
+def reorder_suggestions():
+    """Sugestões de reposição calculadas pela previsão de demanda"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    include_all = request.args.get('all') in ('1', 'true')
+    
+    query = ProductForecast.query.join(
+        Product, Product.id == ProductForecast.product_id
+    ).options(
+        db.contains_eager(ProductForecast.product)
+    ).filter(
+        ProductForecast.company_id == company_id,
+        Product.is_active == True
+    )
+    
+    if not include_all:
+        query = query.filter(ProductForecast.suggested_quantity > 0)
+    
+    forecasts = query.order_by(ProductForecast.suggested_quantity.desc(), Product.name).all()
+    
+    return jsonify({
+        'suggestions': [f.to_dict(include_product=True) for f in forecasts],
+        'total': len(forecasts),
+        'computed_at': forecasts[0].computed_at.isoformat() if forecasts and forecasts[0].computed_at else None
     }), 200
 
+@api_bp.route('/products/reorder-suggestions/refresh', methods=['POST'])
+@jwt_required()
+def refresh_reorder_suggestions():
+    """Recalcular a previsão de demanda da empresa"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        lead_time_days = int(data.get('lead_time_days', LEAD_TIME_DAYS))
+        if lead_time_days <= 0:
+            return jsonify({'error': 'Prazo de entrega deve ser maior que zero'}), 400
+        
+        count = run_forecast(company_id, lead_time_days=lead_time_days)
+        return jsonify({'message': 'Previsão recalculada', 'products': count}), 200
+        
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Prazo de entrega deve ser um número'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao calcular previsão: {str(e)}'}), 500
+
+@api_bp.route('/products/abc', methods=['GET'])
+@jwt_required()
+def abc_products():
+    """Classificação ABC (Pareto) dos produtos pelo valor movimentado"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    days = request.args.get('days', 90, type=int)
+    movement_type = request.args.get('type', 'saida')
+    
+    if days <= 0 or days > abc_analysis.MAX_WINDOW_DAYS:
+        return jsonify({'error': f'Janela deve ser entre 1 e {abc_analysis.MAX_WINDOW_DAYS} dias'}), 400
+    if movement_type not in ('entrada', 'saida', 'all'):
+        return jsonify({'error': 'Tipo deve ser "entrada", "saida" ou "all"'}), 400
+    
+    return jsonify(abc_analysis.abc_classification(company_id, days, movement_type)), 200
+
 @api_bp.route('/products', methods=['POST'])
 @jwt_required()
 def create_product():
@@ -109,11 +207,15 @@ def create_product():
             category=data.get('category'),
             sku=data.get('sku'),
             barcode=data.get('barcode'),
+            is_featured=bool(data.get('is_featured', False)),
             company_id=company_id
         )
         
         db.session.add(product)
+        db.session.flush()
+        record_stock_change(product, previous_quantity=None)
         db.session.commit()
+        invalidate_public_page(company_id)
         
         return jsonify({
             'message': 'Produto criado com sucesso',
@@ -171,12 +273,15 @@ def update_product(product_id):
             product.name = data['name']
         if 'description' in data:
             product.description = data['description']
+        previous_min_quantity = product.min_quantity
         if 'min_quantity' in data:
             product.min_quantity = data['min_quantity']
         if 'unit' in data:
             product.unit = data['unit']
         if 'cost_price' in data:
             product.cost_price = data['cost_price']
+            # Custo entra no valor das movimentações sem preço unitário
+            abc_analysis.invalidate(company_id)
         if 'sale_price' in data:
             product.sale_price = data['sale_price']
         if 'category' in data:
@@ -187,11 +292,17 @@ def update_product(product_id):
             product.barcode = data['barcode']
         if 'is_active' in data:
             product.is_active = data['is_active']
+        if 'is_featured' in data:
+            product.is_featured = bool(data['is_featured'])
         
         # NÃO permitir alterar quantidade diretamente
         # Use movimentações para isso
         
+        # Alterar o mínimo pode cruzar o limite de estoque baixo
+        record_stock_change(product, product.quantity, previous_min_quantity)
+        
         db.session.commit()
+        invalidate_public_page(company_id)
         
         return jsonify({
             'message': 'Produto atualizado com sucesso',
@@ -222,6 +333,7 @@ def delete_product(product_id):
         # Soft delete - apenas marcar como inativo
         product.is_active = False
         db.session.commit()
+        invalidate_public_page(company_id)
         
         return jsonify({'message': 'Produto deletado com sucesso'}), 200
         
@@ -282,13 +394,17 @@ def create_stock_movement():
         )
         
         # Atualizar quantidade do produto
+        previous_quantity = product.quantity
         if movement_type == 'entrada':
             product.quantity += quantity
         else:  # saida
             product.quantity -= quantity
         
+        record_stock_change(product, previous_quantity)
+        
         db.session.add(movement)
         db.session.commit()
+        invalidate_public_page(company_id)  # Vitrine pode exibir o estoque
         
         return jsonify({
             'message': 'Movimentação registrada com sucesso',
@@ -336,4 +452,68 @@ def product_movements(product_id):
         'page': page,
         'per_page': per_page,
         'pages': pagination.pages
-    }), 200
\ No newline at end of file
+    }), 200
+
+@api_bp.route('/internal/stock-snapshots', methods=['POST'])
+def run_stock_snapshots():
+    """Endpoint chamado por cron externo para gravar o snapshot diário de estoque"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    snapshot_date = None
+    if request.args.get('date'):
+        try:
+            snapshot_date = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Data inválida. Use formato YYYY-MM-DD'}), 400
+    
+    try:
+        result = {'snapshots': take_snapshots(snapshot_date)}
+        
+        # Compactação opcional: arquivar movimentações já cobertas por snapshots
+        if request.args.get('compact') in ('1', 'true'):
+            keep_days = request.args.get('keep_days', MIN_KEEP_DAYS, type=int)
+            result['archived_movements'] = compact_movements(keep_days=keep_days)
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao gravar snapshots: {str(e)}'}), 500
+
+@api_bp.route('/internal/low-stock-digest', methods=['POST'])
+def run_low_stock_digest():
+    """Endpoint chamado por cron externo para enviar o resumo de estoque baixo"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        return jsonify({'sent': send_low_stock_digests()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao enviar resumo: {str(e)}'}), 500
+
+@api_bp.route('/internal/reorder-forecast', methods=['POST'])
+def run_reorder_forecast():
+    """Endpoint chamado por cron externo para recalcular a previsão de demanda"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    lead_time_days = request.args.get('lead_time_days', LEAD_TIME_DAYS, type=int)
+    company_ids = [c.id for c in Company.query.with_entities(Company.id).filter_by(is_active=True)]
+    
+    processed = 0
+    for company_id in company_ids:
+        try:
+            processed += run_forecast(company_id, lead_time_days=lead_time_days)
+        except Exception as e:
+            db.session.rollback()
+            print(f'[Forecast] Erro empresa {company_id}: {e}')
+    
+    return jsonify({'companies': len(company_ids), 'products': processed}), 200
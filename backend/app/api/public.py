@@ -1,75 +1,161 @@
 from app.services.email import send_booking_confirmation, send_booking_notification
-from flask import jsonify, request
+import base64
+import json
+import os
+from flask import current_app, jsonify, request
 from app.api import api_bp
-from app.models.company import Company
 from app.models.appointment import Appointment
-from app.models.customer import Customer
 from app.models.product import Product
-from app.models.business_config import BusinessConfig
 from app import db
 from datetime import datetime, date, timedelta
+from app.utils.text import normalize_email
+from app.services.customers import upsert_customer_by_email
+from app.services.idempotency import idempotent, purge_expired
+from app.services.rate_limit import rate_limit
+from app.services.tenant_cache import get_tenant, get_occupied_slots, invalidate_availability
+from app.services.public_page import get_page, public_product, publish_all
+
+PUBLIC_MAX_AGE = 60  # Navegador/CDN revalidam com If-None-Match depois disso
+PRODUCTS_PAGE_SIZE = 24
+PRODUCTS_MAX_PAGE_SIZE = 100
 
 
 # ─── Página pública da empresa ───────────────────────────────────────────────
 
 @api_bp.route('/public/<slug>', methods=['GET'])
+@rate_limit('public_page')
 def get_public_company(slug):
-    """Retorna dados públicos da empresa pelo slug"""
-    company = Company.query.filter_by(slug=slug, is_active=True).first()
-    if not company:
+    """Retorna dados públicos da empresa pelo slug
+
+    A resposta pronta fica em cache por slug (invalidado ao alterar empresa,
+    configuração ou produtos) e sai com ETag forte: If-None-Match igual devolve 304.
+    """
+    page = get_page(slug)
+    if page is None:
         return jsonify({'error': 'Empresa não encontrada'}), 404
 
-    # Buscar configurações
-    config = BusinessConfig.query.filter_by(company_id=company.id).first()
+    response = current_app.response_class(page['body'], mimetype='application/json')
+    response.set_etag(page['etag'])
+    response.headers['Cache-Control'] = f'public, max-age={PUBLIC_MAX_AGE}'
+    return response.make_conditional(request)
 
-    # Buscar serviços disponíveis
-    services = []
-    if config and config.services_list:
-        services = config.services_list
 
-    # Buscar produtos ativos (vitrine)
-    products = Product.query.filter_by(
-        company_id=company.id, is_active=True
-    ).order_by(Product.name).all()
+@api_bp.route('/internal/public-snapshots', methods=['POST'])
+def run_public_snapshots():
+    """Endpoint chamado por cron externo para republicar os snapshots estáticos"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
 
-    return jsonify({
-        'company': {
-            'id': company.id,
-            'name': company.name,
-            'slug': company.slug,
-            'business_type': company.business_type,
-            'email': company.email,
-            'phone': company.phone,
-            'address': company.address,
-            'primary_color': company.primary_color,
-            'logo_url': company.logo_url,
-            'header_image_url': company.header_image_url,
-            'opening_hours': (config.business_hours if config and config.business_hours else company.opening_hours) or {},
-            'welcome_text': config.public_welcome_text if config else '',
-            'footer_text': config.public_footer_text if config else '',
-        },
-        'services': services,
-        'products': [
-            {
-                'id': p.id,
-                'name': p.name,
-                'description': p.description,
-                'price': p.price,
-                'image_url': getattr(p, 'image_url', None),
-                'category': p.category,
-            }
-            for p in products
+    try:
+        return jsonify({'published': publish_all()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao publicar snapshots: {str(e)}'}), 500
+
+
+@api_bp.route('/internal/idempotency-cleanup', methods=['POST'])
+def run_idempotency_cleanup():
+    """Endpoint chamado por cron externo para apagar Idempotency-Keys vencidas"""
+    secret = request.headers.get('X-Cron-Secret', '')
+    expected = os.environ.get('CRON_SECRET', 'sahjo-cron-2026')
+    if secret != expected:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        return jsonify({'deleted': purge_expired()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao limpar chaves: {str(e)}'}), 500
+
+
+# ─── Vitrine de produtos ─────────────────────────────────────────────────────
+
+def _encode_product_cursor(name, product_id):
+    return base64.urlsafe_b64encode(json.dumps([name, product_id]).encode()).decode()
+
+
+def _decode_product_cursor(cursor):
+    try:
+        name, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(name), int(product_id)
+    except Exception:
+        raise ValueError('cursor inválido')
+
+
+@api_bp.route('/public/<slug>/products', methods=['GET'])
+@rate_limit('public_products')
+def get_public_products(slug):
+    """Produtos ativos da vitrine, paginados por cursor (nome, id)
+
+    Parâmetros: cursor, limit (padrão 24, máximo 100), category e q (busca no nome).
+    A primeira página (sem cursor) traz as categorias com a quantidade de produtos.
+    """
+    tenant = get_tenant(slug)
+    if not tenant:
+        return jsonify({'error': 'Empresa não encontrada'}), 404
+    config = tenant['config']
+
+    limit = max(1, min(request.args.get('limit', PRODUCTS_PAGE_SIZE, type=int), PRODUCTS_MAX_PAGE_SIZE))
+    category = (request.args.get('category') or '').strip()
+    q = (request.args.get('q') or '').strip().lower()
+
+    query = Product.query.filter(
+        Product.company_id == tenant['company_id'],
+        Product.is_active == True
+    )
+    if q:
+        query = query.filter(db.func.lower(Product.name).contains(q, autoescape=True))
+
+    # Facetas: contagem por categoria (respeita a busca, não o filtro de categoria)
+    facets = None
+    cursor = request.args.get('cursor')
+    if not cursor:
+        facets = [
+            {'category': name, 'count': count}
+            for name, count in query.with_entities(
+                Product.category, db.func.count(Product.id)
+            ).group_by(Product.category).order_by(Product.category).all()
         ]
-    }), 200
+
+    if category:
+        query = query.filter(Product.category == category)
+
+    if cursor:
+        try:
+            cursor_name, cursor_id = _decode_product_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Cursor inválido'}), 400
+        query = query.filter(
+            db.or_(
+                Product.name > cursor_name,
+                db.and_(Product.name == cursor_name, Product.id > cursor_id)
+            )
+        )
+
+    products = query.order_by(Product.name, Product.id).limit(limit + 1).all()
+    has_more = len(products) > limit
+    products = products[:limit]
+
+    response = {
+        'products': [public_product(p, config) for p in products],
+        'next_cursor': _encode_product_cursor(products[-1].name, products[-1].id) if has_more else None,
+        'has_more': has_more,
+    }
+    if facets is not None:
+        response['categories'] = facets
+    return jsonify(response), 200
 
 
 # ─── Disponibilidade de horários ─────────────────────────────────────────────
 
 @api_bp.route('/public/<slug>/availability', methods=['GET'])
+@rate_limit('public_availability')
 def get_availability(slug):
     """Retorna horários disponíveis para uma data"""
-    company = Company.query.filter_by(slug=slug, is_active=True).first()
-    if not company:
+    tenant = get_tenant(slug)
+    if not tenant:
         return jsonify({'error': 'Empresa não encontrada'}), 404
 
     date_str = request.args.get('date')
@@ -87,50 +173,44 @@ def get_availability(slug):
     if target_date < date.today():
         return jsonify({'slots': [], 'message': 'Data no passado'}), 200
 
-    # Verificar horário de funcionamento
-    day_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-    day_name = day_names[target_date.weekday()]
-    # Buscar horários da BusinessConfig (onde são realmente salvos)
-    from app.models.business_config import BusinessConfig
-    bconfig = BusinessConfig.query.filter_by(company_id=company.id).first()
-    opening_hours = (bconfig.business_hours if bconfig and bconfig.business_hours else company.opening_hours) or {}
-    day_config = opening_hours.get(day_name, {})
-
-    open_time_str = (day_config or {}).get('open', '')
-    close_time_str = (day_config or {}).get('close', '')
-    if not open_time_str or not close_time_str or open_time_str == close_time_str:
+    # Horário de funcionamento já compilado no cache da empresa (minutos de abertura/fechamento)
+    day_hours = tenant['config']['hours'].get(str(target_date.weekday()))
+    if not day_hours:
         return jsonify({'slots': [], 'message': 'Estabelecimento fechado neste dia'}), 200
 
-    open_h, open_m = map(int, open_time_str.split(':'))
-    close_h, close_m = map(int, close_time_str.split(':'))
-
     # Gerar todos os slots possíveis
     slots = []
-    current = datetime.combine(target_date, datetime.min.time()).replace(hour=open_h, minute=open_m)
-    end = datetime.combine(target_date, datetime.min.time()).replace(hour=close_h, minute=close_m)
+    day_start = datetime.combine(target_date, datetime.min.time())
+    current = day_start + timedelta(minutes=day_hours[0])
+    end = day_start + timedelta(minutes=day_hours[1])
 
     while current + timedelta(minutes=service_duration) <= end:
         slots.append(current.strftime('%H:%M'))
         current += timedelta(minutes=30)
 
-    # Buscar agendamentos já existentes na data
-    existing = Appointment.query.filter_by(
-        company_id=company.id,
-        appointment_date=target_date
-    ).filter(
-        Appointment.status.notin_(['cancelled'])
-    ).all()
-
-    # Remover slots ocupados
-    occupied = set()
-    for appt in existing:
-        appt_start = datetime.combine(target_date, appt.appointment_time)
-        appt_end = appt_start + timedelta(minutes=appt.duration_minutes or 60)
-        t = appt_start
-        while t < appt_end:
-            occupied.add(t.strftime('%H:%M'))
-            t += timedelta(minutes=30)
-
+    def load_occupied():
+        # Buscar agendamentos já existentes na data
+        existing = Appointment.query.with_entities(
+            Appointment.appointment_time, Appointment.duration_minutes
+        ).filter_by(
+            company_id=tenant['company_id'],
+            appointment_date=target_date
+        ).filter(
+            Appointment.status.notin_(['cancelled'])
+        ).all()
+
+        occupied = set()
+        for appointment_time, duration_minutes in existing:
+            appt_start = datetime.combine(target_date, appointment_time)
+            appt_end = appt_start + timedelta(minutes=duration_minutes or 60)
+            t = appt_start
+            while t < appt_end:
+                occupied.add(t.strftime('%H:%M'))
+                t += timedelta(minutes=30)
+        return sorted(occupied)
+
+    # Remover slots ocupados (em cache por empresa e dia; um único cálculo para acessos simultâneos)
+    occupied = set(get_occupied_slots(tenant['company_id'], target_date, load_occupied))
     available_slots = [s for s in slots if s not in occupied]
 
     return jsonify({'slots': available_slots, 'date': date_str}), 200
@@ -139,11 +219,14 @@ def get_availability(slug):
 # ─── Criar agendamento público ────────────────────────────────────────────────
 
 @api_bp.route('/public/<slug>/book', methods=['POST'])
+@rate_limit('public_book')
+@idempotent
 def book_appointment(slug):
     """Cria um agendamento público (sem login)"""
-    company = Company.query.filter_by(slug=slug, is_active=True).first()
-    if not company:
+    tenant = get_tenant(slug)
+    if not tenant:
         return jsonify({'error': 'Empresa não encontrada'}), 404
+    company = tenant['company']
 
     data = request.get_json()
     required = ['name', 'email', 'phone', 'service_name', 'date', 'time']
@@ -160,21 +243,11 @@ def book_appointment(slug):
     if appt_date < date.today():
         return jsonify({'error': 'Não é possível agendar em datas passadas'}), 400
 
-    # Buscar ou criar cliente
-    customer = Customer.query.filter_by(
-        email=data['email'],
-        company_id=company.id
-    ).first()
-
-    if not customer:
-        customer = Customer(
-            name=data['name'],
-            email=data['email'],
-            phone=data['phone'],
-            company_id=company.id
-        )
-        db.session.add(customer)
-        db.session.flush()
+    # Cliente ativo pelo email normalizado, criado se não existir (um INSERT ... ON CONFLICT).
+    # Só pelo email: a rota é pública e o telefone de outra pessoa não pode puxar o cadastro dela
+    if not normalize_email(data['email']):
+        return jsonify({'error': 'Email inválido'}), 400
+    customer = upsert_customer_by_email(company['id'], data['name'], data['email'], data['phone'])
 
     # Verificar conflito de horário
     duration = int(data.get('duration', 60))
@@ -182,7 +255,7 @@ def book_appointment(slug):
     new_end = new_start + timedelta(minutes=duration)
 
     conflicts = Appointment.query.filter_by(
-        company_id=company.id,
+        company_id=company['id'],
         appointment_date=appt_date
     ).filter(Appointment.status.notin_(['cancelled'])).all()
 
@@ -194,7 +267,7 @@ def book_appointment(slug):
 
     # Criar agendamento
     appointment = Appointment(
-        company_id=company.id,
+        company_id=company['id'],
         customer_id=customer.id,
         appointment_date=appt_date,
         appointment_time=appt_time,
@@ -206,6 +279,7 @@ def book_appointment(slug):
     )
     db.session.add(appointment)
     db.session.commit()
+    invalidate_availability(company['id'], appt_date)
 
     # Enviar emails
     date_formatted = appt_date.strftime('%d/%m/%Y')
@@ -213,22 +287,22 @@ def book_appointment(slug):
 
     # Email para o cliente
     send_booking_confirmation(
-        customer_email=customer.email,
-        customer_name=customer.name,
+        customer_email=data['email'],
+        customer_name=data['name'],
         service_name=data['service_name'],
         date=date_formatted,
         time=time_formatted,
-        company_name=company.name,
-        company_phone=company.phone,
+        company_name=company['name'],
+        company_phone=company['phone'],
     )
 
     # Email para o dono (usar email da empresa)
-    if company.email:
+    if company['email']:
         send_booking_notification(
-            owner_email=company.email,
-            company_name=company.name,
-            customer_name=customer.name,
-            customer_email=customer.email,
+            owner_email=company['email'],
+            company_name=company['name'],
+            customer_name=data['name'],
+            customer_email=data['email'],
             customer_phone=data['phone'],
             service_name=data['service_name'],
             date=date_formatted,
@@ -244,8 +318,8 @@ def book_appointment(slug):
             'service': data['service_name'],
             'status': 'pending',
             'customer': {
-                'name': customer.name,
-                'email': customer.email,
+                'name': data['name'],
+                'email': data['email'],
             }
         }
     }), 201
\ No newline at end of file
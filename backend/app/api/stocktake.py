@@ -0,0 +1,273 @@
+from datetime import datetime
+from flask import request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.api import api_bp
+from app.models.product import Product
+from app.models.stocktake import StocktakeSession, StocktakeLine
+from app.services.principal import get_user_company_id
+from app.services.stocktake import close_session, upsert_lines
+from app.services.tenant_cache import invalidate_public_page
+
+MAX_LINES_PER_REQUEST = 10000
+
+
+def _get_session(session_id, company_id):
+    return StocktakeSession.query.filter_by(id=session_id, company_id=company_id).first()
+
+
+def _product_id(value):
+    """product_id da linha como inteiro, ou None se não for um número"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+@api_bp.route('/stocktakes', methods=['GET'])
+@jwt_required()
+def list_stocktakes():
+    """Listar sessões de inventário"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    status_filter = request.args.get('status')
+    
+    query = StocktakeSession.query.filter_by(company_id=company_id)
+    if status_filter:
+        query = query.filter(StocktakeSession.status == status_filter)
+    
+    sessions = query.order_by(StocktakeSession.created_at.desc()).limit(50).all()
+    
+    # Contagem de linhas de todas as sessões em uma consulta
+    counts = dict(db.session.query(
+        StocktakeLine.session_id, db.func.count(StocktakeLine.id)
+    ).filter(
+        StocktakeLine.session_id.in_([s.id for s in sessions])
+    ).group_by(StocktakeLine.session_id).all()) if sessions else {}
+    
+    return jsonify({
+        'stocktakes': [s.to_dict(lines_count=counts.get(s.id, 0)) for s in sessions]
+    }), 200
+
+@api_bp.route('/stocktakes', methods=['POST'])
+@jwt_required()
+def open_stocktake():
+    """Abrir sessão de inventário"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        session = StocktakeSession(
+            company_id=company_id,
+            user_id=int(get_jwt_identity()),
+            notes=data.get('notes')
+        )
+        db.session.add(session)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Inventário aberto',
+            'stocktake': session.to_dict(lines_count=0)
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao abrir inventário: {str(e)}'}), 500
+
+@api_bp.route('/stocktakes/<int:session_id>', methods=['GET'])
+@jwt_required()
+def get_stocktake(session_id):
+    """Detalhes do inventário com as linhas contadas e a diferença atual"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    session = _get_session(session_id, company_id)
+    if not session:
+        return jsonify({'error': 'Inventário não encontrado'}), 404
+    
+    rows = db.session.query(
+        StocktakeLine, Product.name, Product.sku, Product.quantity
+    ).join(
+        Product, Product.id == StocktakeLine.product_id
+    ).filter(
+        StocktakeLine.session_id == session.id
+    ).order_by(Product.name).all()
+    
+    lines = []
+    for line, name, sku, quantity in rows:
+        item = line.to_dict()
+        item.update({
+            'name': name,
+            'sku': sku,
+            'current_quantity': quantity,
+            'difference': line.counted_quantity - (quantity or 0)
+        })
+        lines.append(item)
+    
+    return jsonify({
+        'stocktake': session.to_dict(lines_count=len(lines)),
+        'lines': lines
+    }), 200
+
+@api_bp.route('/stocktakes/<int:session_id>/lines', methods=['POST'])
+@jwt_required()
+def add_stocktake_lines(session_id):
+    """Registrar quantidades contadas em lote.
+
+    Cada linha identifica o produto por product_id, barcode ou sku. Com
+    mode="add" as quantidades são somadas à contagem (uma leitura = +1 por padrão).
+    """
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    session = _get_session(session_id, company_id)
+    if not session:
+        return jsonify({'error': 'Inventário não encontrado'}), 404
+    if session.status != 'open':
+        return jsonify({'error': 'Inventário já encerrado'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    lines = data.get('lines') or []
+    mode = data.get('mode', 'set')
+    
+    if mode not in ('set', 'add'):
+        return jsonify({'error': 'Modo deve ser "set" ou "add"'}), 400
+    if not isinstance(lines, list) or not lines:
+        return jsonify({'error': 'Nenhuma linha informada'}), 400
+    if len(lines) > MAX_LINES_PER_REQUEST:
+        return jsonify({'error': f'Máximo de {MAX_LINES_PER_REQUEST} linhas por requisição'}), 400
+    
+    # Resolver códigos de barras / SKUs de todas as linhas em uma consulta
+    barcodes = {str(l['barcode']) for l in lines if isinstance(l, dict) and l.get('barcode')}
+    skus = {str(l['sku']) for l in lines if isinstance(l, dict) and l.get('sku')}
+    ids = {_product_id(l['product_id']) for l in lines if isinstance(l, dict) and l.get('product_id')}
+    ids.discard(None)
+    
+    conditions = []
+    if ids:
+        conditions.append(Product.id.in_(ids))
+    if barcodes:
+        conditions.append(Product.barcode.in_(barcodes))
+    if skus:
+        conditions.append(Product.sku.in_(skus))
+    
+    by_id, by_barcode, by_sku = set(), {}, {}
+    if conditions:
+        for pid, barcode, sku in db.session.query(Product.id, Product.barcode, Product.sku).filter(
+            Product.company_id == company_id, db.or_(*conditions)
+        ):
+            by_id.add(pid)
+            if barcode:
+                by_barcode[barcode] = pid
+            if sku:
+                by_sku[sku] = pid
+    
+    counts = {}
+    errors = []
+    for index, line in enumerate(lines):
+        if not isinstance(line, dict):
+            errors.append({'line': index, 'error': 'Linha inválida'})
+            continue
+        
+        if line.get('product_id'):
+            product_id = _product_id(line['product_id'])
+            if product_id is None:
+                errors.append({'line': index, 'error': 'product_id deve ser um número'})
+                continue
+            if product_id not in by_id:
+                product_id = None
+        elif line.get('barcode'):
+            product_id = by_barcode.get(str(line['barcode']))
+        else:
+            product_id = by_sku.get(str(line.get('sku')))
+        
+        if not product_id:
+            errors.append({'line': index, 'error': 'Produto não encontrado'})
+            continue
+        
+        try:
+            quantity = int(line.get('quantity', 1 if mode == 'add' else None))
+        except (ValueError, TypeError):
+            errors.append({'line': index, 'error': 'Quantidade deve ser um número'})
+            continue
+        if quantity < 0:
+            errors.append({'line': index, 'error': 'Quantidade não pode ser negativa'})
+            continue
+        
+        if mode == 'add':
+            counts[product_id] = counts.get(product_id, 0) + quantity
+        else:
+            counts[product_id] = quantity
+    
+    try:
+        upsert_lines(session.id, counts, mode)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Contagem registrada',
+            'accepted': len(counts),
+            'errors': errors
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao registrar contagem: {str(e)}'}), 500
+
+@api_bp.route('/stocktakes/<int:session_id>/close', methods=['POST'])
+@jwt_required()
+def close_stocktake(session_id):
+    """Fechar inventário e ajustar o estoque pelas diferenças"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    session = StocktakeSession.query.filter_by(
+        id=session_id, company_id=company_id
+    ).with_for_update().first()
+    if not session:
+        return jsonify({'error': 'Inventário não encontrado'}), 404
+    if session.status != 'open':
+        return jsonify({'error': 'Inventário já encerrado'}), 400
+    
+    try:
+        differences = close_session(session, int(get_jwt_identity()))
+        invalidate_public_page(company_id)
+        
+        return jsonify({
+            'message': 'Inventário fechado com sucesso',
+            'stocktake': session.to_dict(),
+            'adjustments': differences
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao fechar inventário: {str(e)}'}), 500
+
+@api_bp.route('/stocktakes/<int:session_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_stocktake(session_id):
+    """Cancelar inventário aberto (sem ajustes de estoque)"""
+    company_id = get_user_company_id()
+    if not company_id:
+        return jsonify({'error': 'Usuário sem empresa associada'}), 403
+    
+    session = _get_session(session_id, company_id)
+    if not session:
+        return jsonify({'error': 'Inventário não encontrado'}), 404
+    if session.status != 'open':
+        return jsonify({'error': 'Inventário já encerrado'}), 400
+    
+    try:
+        session.status = 'cancelled'
+        session.closed_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify({'message': 'Inventário cancelado'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao cancelar inventário: {str(e)}'}), 500
@@ -1,18 +1,16 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from app.models.user import User
-from app.models.company import Company
+from app.services.entitlements import get_entitlement, has_access
+from app.services.principal import get_user_company_id
 
 def subscription_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        if not user or not user.company_id:
+        company_id = get_user_company_id()
+        if not company_id:
             return jsonify({'error': 'Empresa não encontrada'}), 404
-        company = Company.query.get(user.company_id)
-        if not company or not company.can_access():
+        # Empresa vem dos claims do token e a assinatura do cache: sem consultas
+        if not has_access(get_entitlement(company_id)):
             return jsonify({'error': 'subscription_expired', 'message': 'Periodo de teste encerrado. Assine um plano para continuar.'}), 403
         return f(*args, **kwargs)
     return decorated
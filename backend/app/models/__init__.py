@@ -1,10 +1,17 @@
 from app.models.user import User
 from app.models.company import Company
 from app.models.customer import Customer
+from app.models.customer_duplicate import CustomerDuplicate
+from app.models.customer_metrics import CustomerMetrics
 from app.models.appointment import Appointment
 from app.models.product import Product
 from app.models.stock_movement import StockMovement
+from app.models.stock_snapshot import StockSnapshot, StockMovementArchive
+from app.models.stock_alert import LowStockAlert
+from app.models.product_forecast import ProductForecast
+from app.models.stocktake import StocktakeSession, StocktakeLine
 from app.models.business_config import BusinessConfig
 from app.models.subscription import Subscription
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ['User', 'Company', 'Customer', 'Appointment', 'Product', 'StockMovement', 'BusinessConfig', 'Subscription']
\ No newline at end of file
+__all__ = ['User', 'Company', 'Customer', 'CustomerDuplicate', 'CustomerMetrics', 'Appointment', 'Product', 'StockMovement', 'StockSnapshot', 'StockMovementArchive', 'LowStockAlert', 'ProductForecast', 'StocktakeSession', 'StocktakeLine', 'BusinessConfig', 'Subscription', 'IdempotencyKey']
\ No newline at end of file
@@ -5,6 +5,10 @@ class Appointment(db.Model):
     """Modelo de agendamento"""
     
     __tablename__ = 'appointments'
+    __table_args__ = (
+        # Histórico e resumo do cliente
+        db.Index('idx_appointments_customer_date', 'customer_id', 'appointment_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
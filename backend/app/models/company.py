@@ -1,6 +1,8 @@
 from app import db
 from datetime import datetime, timedelta
 
+TRIAL_DAYS = 30
+
 class Company(db.Model):
     """Modelo de empresa/negócio"""
     
@@ -67,7 +69,7 @@ class Company(db.Model):
     def trial_days_remaining(self):
         if not self.created_at:
             return 0
-        delta = timedelta(days=30) - (datetime.utcnow() - self.created_at)
+        delta = timedelta(days=TRIAL_DAYS) - (datetime.utcnow() - self.created_at)
         return max(0, delta.days)
 
     def is_trial_expired(self):
@@ -1,32 +1,66 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import validates
+from app.utils.text import fold_name, normalize_email, normalize_phone
 
 class Customer(db.Model):
     """Modelo de cliente"""
     
     __tablename__ = 'customers'
+    __table_args__ = (
+        # Listagem paginada por cursor (created_at, id) dentro da empresa
+        db.Index('idx_customers_company_created', 'company_id', 'created_at', 'id'),
+        # Chaves de busca normalizadas (índices trigram ficam na migration, só Postgres)
+        db.Index('idx_customers_company_phone_digits', 'company_id', 'phone_digits'),
+        # Um cliente ativo por email na empresa (alvo do upsert do agendamento público)
+        db.Index('uq_customers_company_email', 'company_id', 'email_normalized', unique=True,
+                 postgresql_where=db.text('is_active = true'),
+                 sqlite_where=db.text('is_active = 1')),
+        db.Index('idx_customers_company_name_folded', 'company_id', 'name_folded'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), index=True)
     phone = db.Column(db.String(20), nullable=False)
     
+    # Chaves de busca, mantidas automaticamente a partir dos campos acima
+    phone_digits = db.Column(db.String(20))  # Dígitos no formato nacional
+    email_normalized = db.Column(db.String(120))  # Minúsculo
+    name_folded = db.Column(db.String(100))  # Sem acentos, minúsculo
+    
     # Informações adicionais
     cpf = db.Column(db.String(14))
     birth_date = db.Column(db.Date)
     address = db.Column(db.String(200))
     notes = db.Column(db.Text)
     
+    # Campos customizados do negócio (BusinessConfig.customer_fields.custom_fields)
+    # JSONB com índice GIN no Postgres (criado na migration)
+    custom_data = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))
+    
     # Relacionamento com empresa
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     
     # Status
     is_active = db.Column(db.Boolean, default=True)
+    merged_into_id = db.Column(db.Integer, db.ForeignKey('customers.id'))  # Mesclado em outro cliente
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @validates('name', 'email', 'phone')
+    def _sync_search_keys(self, key, value):
+        if key == 'name':
+            self.name_folded = fold_name(value)
+        elif key == 'email':
+            self.email_normalized = normalize_email(value)
+        else:
+            self.phone_digits = normalize_phone(value)
+        return value
+    
     def to_dict(self):
         """Converter para dicionário"""
         return {
@@ -38,6 +72,7 @@ class Customer(db.Model):
             'birth_date': self.birth_date.isoformat() if self.birth_date else None,
             'address': self.address,
             'notes': self.notes,
+            'custom_data': self.custom_data or {},
             'company_id': self.company_id,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
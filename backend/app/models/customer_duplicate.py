@@ -0,0 +1,45 @@
+from app import db
+from datetime import datetime
+
+class CustomerDuplicate(db.Model):
+    """Par de clientes possivelmente duplicados (candidato a mesclagem)"""
+
+    __tablename__ = 'customer_duplicates'
+    __table_args__ = (
+        db.UniqueConstraint('customer_id', 'duplicate_id', name='uq_customer_duplicates_pair'),
+        db.Index('idx_customer_duplicates_company_status', 'company_id', 'status', 'score'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Relacionamentos: customer_id é o cliente principal do grupo (o mais antigo)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
+    duplicate_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
+
+    # Pontuação 0-1 e chaves que coincidiram (ex.: "phone,name")
+    score = db.Column(db.Float, nullable=False)
+    matched_on = db.Column(db.String(50))
+
+    # Status: pending, merged, dismissed
+    status = db.Column(db.String(20), default='pending', nullable=False)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'id': self.id,
+            'customer_id': self.customer_id,
+            'duplicate_id': self.duplicate_id,
+            'score': round(self.score or 0, 3),
+            'matched_on': self.matched_on.split(',') if self.matched_on else [],
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+        }
+
+    def __repr__(self):
+        return f'<CustomerDuplicate {self.customer_id}<-{self.duplicate_id}>'
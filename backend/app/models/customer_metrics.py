@@ -0,0 +1,62 @@
+from app import db
+from datetime import datetime
+
+# Segmentos RFM, do mais valioso para o menos (segment_rank = posição na lista)
+RFM_SEGMENTS = (
+    'champions',        # Compram com frequência e recentemente
+    'loyal',            # Frequentes
+    'potential_loyal',  # Recentes, frequência média
+    'new',              # Recentes, primeira visita
+    'needs_attention',  # Medianos em tudo
+    'at_risk',          # Eram frequentes, sumiram
+    'hibernating',      # Pouco frequentes e sem visitas recentes
+    'no_activity',      # Sem visitas na janela
+)
+
+class CustomerMetrics(db.Model):
+    """Métricas RFM (recência, frequência, valor) por cliente, recalculadas todas as noites"""
+
+    __tablename__ = 'customer_metrics'
+    __table_args__ = (
+        # Listagem de clientes filtrada/ordenada por segmento
+        db.Index('idx_customer_metrics_company_segment', 'company_id', 'segment', 'customer_id'),
+        db.Index('idx_customer_metrics_company_rank', 'company_id', 'segment_rank', 'monetary', 'customer_id'),
+    )
+
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+
+    # Valores brutos na janela
+    last_visit = db.Column(db.Date)
+    recency_days = db.Column(db.Integer)
+    frequency = db.Column(db.Integer, default=0)  # Dias com visita ou compra
+    monetary = db.Column(db.Float, default=0)  # Receitas concluídas
+
+    # Notas 1-5 (quintis dentro da empresa)
+    r_score = db.Column(db.SmallInteger)
+    f_score = db.Column(db.SmallInteger)
+    m_score = db.Column(db.SmallInteger)
+
+    segment = db.Column(db.String(20), nullable=False)
+    segment_rank = db.Column(db.SmallInteger, nullable=False)
+
+    # Timestamp
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'customer_id': self.customer_id,
+            'last_visit': self.last_visit.isoformat() if self.last_visit else None,
+            'recency_days': self.recency_days,
+            'frequency': self.frequency,
+            'monetary': round(self.monetary or 0, 2),
+            'r_score': self.r_score,
+            'f_score': self.f_score,
+            'm_score': self.m_score,
+            'segment': self.segment,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f'<CustomerMetrics customer={self.customer_id} {self.segment}>'
@@ -33,6 +33,9 @@ class FinancialCategory(db.Model):
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('idx_transactions_customer', 'customer_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
@@ -120,6 +123,9 @@ class AccountPayable(db.Model):
 
 class AccountReceivable(db.Model):
     __tablename__ = 'accounts_receivable'
+    __table_args__ = (
+        db.Index('idx_accounts_receivable_customer', 'customer_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
@@ -164,6 +170,9 @@ class AccountReceivable(db.Model):
 
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        db.Index('idx_invoices_customer', 'customer_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
@@ -0,0 +1,35 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Resposta guardada de uma requisição com Idempotency-Key (repetições devolvem a mesma)"""
+
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key'),
+        db.Index('idx_idempotency_keys_expires', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Escopo (rota + usuário) e chave enviada pelo cliente
+    scope = db.Column(db.String(255), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+
+    # Hash do corpo: a mesma chave com outro corpo é rejeitada
+    request_hash = db.Column(db.String(64), nullable=False)
+
+    # Status: processing (primeira requisição em andamento), completed
+    status = db.Column(db.String(20), default='processing', nullable=False)
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+
+    # Prazo da requisição em processamento: depois dele (worker caiu) outra pode assumir a chave
+    locked_until = db.Column(db.DateTime)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.scope} {self.key}>'
@@ -5,6 +5,10 @@ class Product(db.Model):
     """Modelo de produto/estoque"""
     
     __tablename__ = 'products'
+    __table_args__ = (
+        # Vitrine pública: destaques e paginação por (name, id)
+        db.Index('idx_products_company_showcase', 'company_id', 'is_active', 'name', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -29,6 +33,7 @@ class Product(db.Model):
     
     # Status
     is_active = db.Column(db.Boolean, default=True)
+    is_featured = db.Column(db.Boolean, default=False)  # Destaque na página pública
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -65,6 +70,7 @@ class Product(db.Model):
             'barcode': self.barcode,
             'company_id': self.company_id,
             'is_active': self.is_active,
+            'is_featured': bool(self.is_featured),
             'is_low_stock': self.is_low_stock,
             'stock_value': self.stock_value,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -0,0 +1,58 @@
+from app import db
+from datetime import datetime
+
+class ProductForecast(db.Model):
+    """Previsão de demanda e ponto de reposição por produto"""
+
+    __tablename__ = 'product_forecasts'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Relacionamentos
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, unique=True)
+
+    # Demanda diária (saídas)
+    avg_daily_demand = db.Column(db.Float, default=0)  # Média móvel
+    ema_daily_demand = db.Column(db.Float, default=0)  # Suavização exponencial
+    demand_std = db.Column(db.Float, default=0)
+
+    # Reposição
+    lead_time_days = db.Column(db.Integer, nullable=False)
+    safety_stock = db.Column(db.Float, default=0)
+    reorder_point = db.Column(db.Float, default=0)
+    suggested_quantity = db.Column(db.Integer, default=0)  # 0 = não precisa repor
+
+    # Timestamp
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    product = db.relationship('Product', lazy=True)
+
+    def to_dict(self, include_product=False):
+        """Converter para dicionário"""
+        data = {
+            'product_id': self.product_id,
+            'avg_daily_demand': round(self.avg_daily_demand or 0, 3),
+            'ema_daily_demand': round(self.ema_daily_demand or 0, 3),
+            'demand_std': round(self.demand_std or 0, 3),
+            'lead_time_days': self.lead_time_days,
+            'safety_stock': round(self.safety_stock or 0, 2),
+            'reorder_point': round(self.reorder_point or 0, 2),
+            'suggested_quantity': self.suggested_quantity,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+        if include_product and self.product:
+            data['product'] = {
+                'id': self.product.id,
+                'name': self.product.name,
+                'sku': self.product.sku,
+                'unit': self.product.unit,
+                'quantity': self.product.quantity,
+                'min_quantity': self.product.min_quantity
+            }
+
+        return data
+
+    def __repr__(self):
+        return f'<ProductForecast product={self.product_id}>'
@@ -0,0 +1,52 @@
+from app import db
+from datetime import datetime
+
+class LowStockAlert(db.Model):
+    """Alerta de estoque baixo (um alerta aberto por produto até a reposição)"""
+
+    __tablename__ = 'low_stock_alerts'
+    __table_args__ = (
+        # Deduplicação: no máximo um alerta aberto por produto
+        db.Index('uq_low_stock_alerts_open_product', 'product_id', unique=True,
+                 postgresql_where=db.text('resolved_at IS NULL'),
+                 sqlite_where=db.text('resolved_at IS NULL')),
+        db.Index('idx_low_stock_alerts_company_open', 'company_id', 'resolved_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Relacionamentos
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+
+    # Situação no momento em que o limite foi cruzado
+    quantity = db.Column(db.Integer, nullable=False)
+    min_quantity = db.Column(db.Integer)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    notified_at = db.Column(db.DateTime)  # Incluído no resumo por email
+    resolved_at = db.Column(db.DateTime)  # Estoque reposto acima do mínimo
+
+    product = db.relationship('Product', lazy=True)
+
+    def to_dict(self, include_product=False):
+        """Converter para dicionário"""
+        data = {
+            'id': self.id,
+            'company_id': self.company_id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'min_quantity': self.min_quantity,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'notified_at': self.notified_at.isoformat() if self.notified_at else None,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+        }
+
+        if include_product and self.product:
+            data['product'] = self.product.to_dict()
+
+        return data
+
+    def __repr__(self):
+        return f'<LowStockAlert product={self.product_id}>'
@@ -5,6 +5,9 @@ class StockMovement(db.Model):
     """Modelo de movimentação de estoque"""
     
     __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('idx_stock_movements_company_product_date', 'company_id', 'product_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -0,0 +1,67 @@
+from app import db
+from datetime import datetime
+
+class StockSnapshot(db.Model):
+    """Foto diária do estoque de um produto (fim do dia, UTC)"""
+
+    __tablename__ = 'stock_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'snapshot_date', name='uq_stock_snapshots_product_date'),
+        db.Index('idx_stock_snapshots_company_date', 'company_id', 'snapshot_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Relacionamentos
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+
+    # Data de referência (estoque ao final deste dia)
+    snapshot_date = db.Column(db.Date, nullable=False)
+
+    # Quantidade e valor (quantidade x preço de custo) no fechamento do dia
+    quantity = db.Column(db.Integer, nullable=False)
+    value = db.Column(db.Float, default=0)
+
+    # Timestamp
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'product_id': self.product_id,
+            'snapshot_date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'quantity': self.quantity,
+            'value': self.value,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<StockSnapshot product={self.product_id} {self.snapshot_date}>'
+
+
+class StockMovementArchive(db.Model):
+    """Movimentações antigas já cobertas por snapshots (compactação)"""
+
+    __tablename__ = 'stock_movements_archive'
+    __table_args__ = (
+        db.Index('idx_stock_movements_archive_product_date', 'company_id', 'product_id', 'created_at'),
+    )
+
+    # Mesmo id da movimentação original
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    company_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    movement_type = db.Column(db.String(20), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float)
+    reason = db.Column(db.String(100))
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StockMovementArchive {self.id}>'
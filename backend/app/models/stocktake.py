@@ -0,0 +1,77 @@
+from app import db
+from datetime import datetime
+
+class StocktakeSession(db.Model):
+    """Sessão de inventário (contagem física de estoque)"""
+
+    __tablename__ = 'stocktake_sessions'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Relacionamentos
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    closed_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+    # Status
+    status = db.Column(db.String(20), default='open', nullable=False)
+    # Opções: 'open', 'closed', 'cancelled'
+
+    notes = db.Column(db.Text)
+
+    # Resultado do fechamento
+    adjustments_count = db.Column(db.Integer, default=0)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    closed_at = db.Column(db.DateTime)
+
+    lines = db.relationship('StocktakeLine', backref='session', lazy='dynamic', cascade='all, delete-orphan')
+
+    def to_dict(self, lines_count=None):
+        """Converter para dicionário"""
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'user_id': self.user_id,
+            'closed_by_id': self.closed_by_id,
+            'status': self.status,
+            'notes': self.notes,
+            'lines_count': lines_count if lines_count is not None else self.lines.count(),
+            'adjustments_count': self.adjustments_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None
+        }
+
+    def __repr__(self):
+        return f'<StocktakeSession {self.id} {self.status}>'
+
+
+class StocktakeLine(db.Model):
+    """Quantidade contada de um produto em uma sessão de inventário"""
+
+    __tablename__ = 'stocktake_lines'
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'product_id', name='uq_stocktake_lines_session_product'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('stocktake_sessions.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+
+    counted_quantity = db.Column(db.Integer, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'id': self.id,
+            'session_id': self.session_id,
+            'product_id': self.product_id,
+            'counted_quantity': self.counted_quantity,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<StocktakeLine session={self.session_id} product={self.product_id}>'
@@ -1,6 +1,6 @@
 from app import db
 from datetime import datetime
-import bcrypt
+from app.services.passwords import hash_password, verify_password, needs_rehash
 
 class User(db.Model):
     """Modelo de usuário do sistema"""
@@ -23,18 +23,16 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
-        """Criar hash da senha"""
-        self.password_hash = bcrypt.hashpw(
-            password.encode('utf-8'), 
-            bcrypt.gensalt()
-        ).decode('utf-8')
+        """Criar hash da senha (bcrypt no pool limitado; ver app/services/passwords.py)"""
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Verificar se a senha está correta"""
-        return bcrypt.checkpw(
-            password.encode('utf-8'), 
-            self.password_hash.encode('utf-8')
-        )
+        return verify_password(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """Hash gravado com custo diferente do BCRYPT_ROUNDS atual"""
+        return needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Converter para dicionário (para JSON)"""
@@ -1,3 +1,7 @@
+from datetime import date
+
+CUSTOM_TEXT_MAX_LENGTH = 500
+
 class CustomerSchema:
     """Schema para validar dados de cliente"""
     
@@ -20,4 +24,70 @@ class CustomerSchema:
             if '@' not in data['email']:
                 errors['email'] = 'Email inválido'
         
-        return errors
\ No newline at end of file
+        return errors
+
+    @staticmethod
+    def field_definitions(customer_fields):
+        """Campos customizados da configuração do negócio: {chave: {'type', 'required'}}
+        
+        Aceita a lista simples (["alergia"]) ou objetos ({"key": "idade", "type": "number"}).
+        """
+        definitions = {}
+        for field in (customer_fields or {}).get('custom_fields') or []:
+            if isinstance(field, str):
+                definitions[field] = {'type': 'text', 'required': False}
+            elif isinstance(field, dict) and field.get('key'):
+                definitions[field['key']] = {
+                    'type': field.get('type', 'text'),
+                    'required': bool(field.get('required'))
+                }
+        return definitions
+    
+    @staticmethod
+    def coerce_custom_value(field_type, value):
+        """Converter valor para o tipo do campo; ValueError se não for compatível"""
+        if field_type == 'number':
+            if isinstance(value, bool):
+                raise ValueError
+            return float(value) if '.' in str(value) else int(value)
+        if field_type == 'boolean':
+            if isinstance(value, bool):
+                return value
+            if str(value).lower() in ('true', '1', 'sim'):
+                return True
+            if str(value).lower() in ('false', '0', 'nao', 'não'):
+                return False
+            raise ValueError
+        if field_type == 'date':
+            return date.fromisoformat(str(value)).isoformat()
+        value = str(value)
+        if len(value) > CUSTOM_TEXT_MAX_LENGTH:
+            raise ValueError
+        return value
+    
+    @staticmethod
+    def validate_custom_data(custom_data, customer_fields):
+        """Validar custom_data contra os campos configurados; retorna (dados, erros)"""
+        if custom_data is None:
+            custom_data = {}
+        if not isinstance(custom_data, dict):
+            return None, {'custom_data': 'Deve ser um objeto'}
+        
+        definitions = CustomerSchema.field_definitions(customer_fields)
+        errors = {}
+        clean = {}
+        
+        for key, value in custom_data.items():
+            if key not in definitions:
+                errors[f'custom_data.{key}'] = 'Campo não configurado'
+            elif value is not None and value != '':
+                try:
+                    clean[key] = CustomerSchema.coerce_custom_value(definitions[key]['type'], value)
+                except (TypeError, ValueError):
+                    errors[f'custom_data.{key}'] = f'Valor inválido ({definitions[key]["type"]})'
+        
+        for key, definition in definitions.items():
+            if definition['required'] and key not in clean and f'custom_data.{key}' not in errors:
+                errors[f'custom_data.{key}'] = 'Campo obrigatório'
+        
+        return clean, errors
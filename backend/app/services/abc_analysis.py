@@ -0,0 +1,197 @@
+import threading
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+from sqlalchemy import func, select
+from app import db
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.services.cache import Generations, TwoTierCache
+
+CLASS_A_LIMIT = 0.80
+CLASS_B_LIMIT = 0.95
+MAX_WINDOW_DAYS = 730        # Maior janela aceita (movimentações mais novas que isso não são compactadas)
+FULL_REFRESH_SECONDS = 3600  # Recalcular do zero periodicamente (ex.: mudança de preço de custo)
+OVERLAP_SECONDS = 300        # Movimentações commitadas com atraso (created_at antigo) entram na próxima leitura
+STATE_MAX_ITEMS = 1000       # Estados guardados por processo (empresa x janela x tipo)
+
+# Estado por (empresa, geração, janela, tipo): valores agregados por produto, em memória + Redis.
+# A geração da empresa entra na chave: invalidate() descarta o estado em todos os workers.
+_states = TwoTierCache('abc:', FULL_REFRESH_SECONDS, FULL_REFRESH_SECONDS, max_items=STATE_MAX_ITEMS)
+_generations = Generations('abc:gen:')
+_key_locks = [threading.Lock() for _ in range(64)]
+
+
+def _movement_value():
+    """Valor da movimentação: quantidade x preço unitário (ou custo do produto)"""
+    return StockMovement.quantity * func.coalesce(StockMovement.unit_price, Product.cost_price, 0)
+
+
+def _base_filter(stmt, company_id, movement_type):
+    stmt = stmt.join(Product, Product.id == StockMovement.product_id).where(StockMovement.company_id == company_id)
+    if movement_type != 'all':
+        stmt = stmt.where(StockMovement.movement_type == movement_type)
+    return stmt
+
+
+def _grouped(company_id, movement_type, *conditions):
+    """{produto: valor} das movimentações que atendem às condições (GROUP BY no banco)"""
+    rows = db.session.execute(
+        _base_filter(
+            select(StockMovement.product_id, func.sum(_movement_value())).where(*conditions),
+            company_id, movement_type
+        ).group_by(StockMovement.product_id)
+    ).all()
+    return {pid: float(v or 0) for pid, v in rows}
+
+
+def _full_state(company_id, window_start, movement_type, now):
+    """Agregado da janela até now - OVERLAP_SECONDS; o trecho recente entra por _apply_delta"""
+    settled = now - timedelta(seconds=OVERLAP_SECONDS)
+    values = _grouped(
+        company_id, movement_type,
+        StockMovement.created_at >= window_start, StockMovement.created_at < settled
+    )
+    return {
+        'values': sorted(values.items()),
+        'recent_ids': [],
+        'window_start': window_start.isoformat(),
+        'synced_at': now.isoformat(),
+        'built_at': now.isoformat(),
+        'computed_at': now.isoformat(),
+    }
+
+
+def _apply_delta(state, company_id, window_start, movement_type, now):
+    """Novo estado com as movimentações novas e sem as que saíram da janela.
+
+    Invariante: o estado contém todas as movimentações com created_at < synced_at - OVERLAP
+    e, das mais recentes, exatamente as de recent_ids. Cada leitura relê o trecho recente
+    (por created_at, não por id), então commits fora de ordem não se perdem.
+    """
+    synced_at = datetime.fromisoformat(state['synced_at'])
+    previous_start = datetime.fromisoformat(state['window_start'])
+    counted = set(state['recent_ids'])
+    settled = now - timedelta(seconds=OVERLAP_SECONDS)
+    values = dict((pid, v) for pid, v in state['values'])
+    changed = False
+
+    # Trecho que ficou "assentado" desde a última leitura: agregado no banco
+    since = max(synced_at - timedelta(seconds=OVERLAP_SECONDS), window_start)
+    if since < settled:
+        conditions = [StockMovement.created_at >= since, StockMovement.created_at < settled]
+        if counted:
+            conditions.append(StockMovement.id.notin_(counted))
+        for pid, v in _grouped(company_id, movement_type, *conditions).items():
+            values[pid] = values.get(pid, 0.0) + v
+            changed = True
+
+    # Trecho recente: linha a linha, para lembrar quais já foram somadas
+    recent_ids = []
+    for movement_id, pid, v in db.session.execute(
+        _base_filter(
+            select(StockMovement.id, StockMovement.product_id, _movement_value())
+            .where(StockMovement.created_at >= max(settled, window_start)),
+            company_id, movement_type
+        )
+    ).all():
+        recent_ids.append(movement_id)
+        if movement_id not in counted:
+            values[pid] = values.get(pid, 0.0) + float(v or 0)
+            changed = True
+
+    # Movimentações que saíram da janela
+    if window_start > previous_start:
+        for pid, v in _grouped(
+            company_id, movement_type,
+            StockMovement.created_at >= previous_start, StockMovement.created_at < window_start
+        ).items():
+            remaining = values.get(pid, 0.0) - v
+            if remaining > 1e-9:
+                values[pid] = remaining
+            else:
+                values.pop(pid, None)
+            changed = True
+
+    return dict(
+        state,
+        values=sorted(values.items()),
+        recent_ids=recent_ids,
+        window_start=window_start.isoformat(),
+        synced_at=now.isoformat(),
+        computed_at=now.isoformat() if changed else state['computed_at'],
+    )
+
+
+def _rank(values):
+    ordered = sorted(values.items(), key=lambda item: (-item[1], item[0]))
+    cumulative = accumulate(v for _, v in ordered)
+    return [(pid, v, cum) for (pid, v), cum in zip(ordered, cumulative)]
+
+
+def _classify(ranked):
+    """Classe pela participação acumulada antes do produto"""
+    total = ranked[-1][2] if ranked else 0
+    result = []
+    for pid, value, cumulative in ranked:
+        previous_share = (cumulative - value) / total if total else 1
+        if previous_share < CLASS_A_LIMIT:
+            abc_class = 'A'
+        elif previous_share < CLASS_B_LIMIT:
+            abc_class = 'B'
+        else:
+            abc_class = 'C'
+        result.append({
+            'product_id': pid,
+            'value': round(value, 2),
+            'share': round(value / total, 4) if total else 0,
+            'cumulative_share': round(cumulative / total, 4) if total else 0,
+            'class': abc_class,
+        })
+    return result, total
+
+
+def abc_classification(company_id, days=90, movement_type='saida'):
+    """Classificação ABC (Pareto) dos produtos pelo valor movimentado na janela"""
+    now = datetime.utcnow()
+    window_start = datetime.combine(now.date() - timedelta(days=days - 1), time.min)
+    key = f'{company_id}:{_generations.get(company_id)}:{days}:{movement_type}'
+
+    with _key_locks[hash(key) % len(_key_locks)]:
+        state = _states.get(key)
+        cached = state is not None and (
+            now - datetime.fromisoformat(state['built_at'])
+        ).total_seconds() <= FULL_REFRESH_SECONDS
+        if not cached:
+            state = _full_state(company_id, window_start, movement_type, now)
+        state = _apply_delta(state, company_id, window_start, movement_type, now)
+        _states.set(key, state)
+
+    ranked = _rank(dict(state['values']))
+    computed_at = datetime.fromisoformat(state['computed_at'])
+
+    items, total = _classify(ranked)
+
+    names = dict(
+        (p.id, (p.name, p.sku)) for p in db.session.query(Product.id, Product.name, Product.sku)
+        .filter(Product.company_id == company_id)
+    )
+    summary = {c: {'products': 0, 'value': 0.0} for c in ('A', 'B', 'C')}
+    for item in items:
+        item['name'], item['sku'] = names.get(item['product_id'], (None, None))
+        summary[item['class']]['products'] += 1
+        summary[item['class']]['value'] = round(summary[item['class']]['value'] + item['value'], 2)
+
+    return {
+        'window_days': days,
+        'movement_type': movement_type,
+        'total_value': round(total, 2),
+        'summary': summary,
+        'products': items,
+        'computed_at': computed_at.isoformat(),
+        'cached': cached,
+    }
+
+
+def invalidate(company_id):
+    """Descartar o estado em cache da empresa em todos os workers (força recálculo completo)"""
+    _generations.bump(company_id)
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import redis
+from flask import current_app
+
+REDIS_RETRY_SECONDS = 30  # Após uma falha, não tentar o Redis de novo por este tempo
+
+_redis = {'client': None, 'url': None, 'down_until': 0.0}
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """Cliente Redis compartilhado, ou None se não configurado/indisponível.
+
+    O cache é sempre opcional: quem chama deve seguir sem Redis quando receber None.
+    """
+    url = current_app.config.get('REDIS_URL')
+    if not url or time.monotonic() < _redis['down_until']:
+        return None
+
+    if _redis['client'] is None or _redis['url'] != url:
+        with _redis_lock:
+            if _redis['client'] is None or _redis['url'] != url:
+                _redis['client'] = redis.Redis.from_url(
+                    url, socket_connect_timeout=0.2, socket_timeout=0.2, health_check_interval=30
+                )
+                _redis['url'] = url
+    return _redis['client']
+
+
+def redis_failed(error):
+    """Registrar falha do Redis e desligar o segundo nível por alguns segundos"""
+    _redis['down_until'] = time.monotonic() + REDIS_RETRY_SECONDS
+    print(f'[Cache] Redis indisponível: {error}')
+
+
+class LocalCache:
+    """Cache em memória do processo, com expiração por item (thread-safe)"""
+
+    def __init__(self, ttl, max_items=10000):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._items.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if len(self._items) >= self.max_items:
+                # Descarta os expirados; se ainda cheio, o mais antigo inserido
+                now = time.monotonic()
+                for k in [k for k, (_, exp) in self._items.items() if exp < now]:
+                    del self._items[k]
+                if len(self._items) >= self.max_items:
+                    del self._items[next(iter(self._items))]
+            self._items[key] = (value, time.monotonic() + (ttl or self.ttl))
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class TwoTierCache:
+    """Cache em dois níveis: memória do processo (TTL curto) + Redis (compartilhado).
+
+    Guarda valores serializáveis em JSON; sem Redis funciona só com o nível local.
+    """
+
+    def __init__(self, prefix, local_ttl, redis_ttl, max_items=10000):
+        self.prefix = prefix
+        self.redis_ttl = redis_ttl
+        self.local = LocalCache(local_ttl, max_items)
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self.prefix + key)
+        except Exception as e:
+            redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(self.prefix + key, json.dumps(value), ex=self.redis_ttl)
+            except Exception as e:
+                redis_failed(e)
+
+    def delete(self, *keys):
+        keys = [k for k in keys if k]
+        if not keys:
+            return
+        self.local.delete(*keys)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(*[self.prefix + k for k in keys])
+            except Exception as e:
+                redis_failed(e)
+
+
+class Generations:
+    """Geração por grupo de chaves: trocar a geração descarta o grupo em todos os workers.
+
+    Quem usa inclui a geração no nome da chave. Fica no Redis; sem Redis, num arquivo
+    por grupo em CACHE_GENERATION_DIR, compartilhado pelos workers da mesma máquina.
+    Cada troca grava um valor novo (não um contador), então trocas simultâneas não se anulam.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def _path(self, group):
+        directory = current_app.config.get('CACHE_GENERATION_DIR') or os.path.join(
+            tempfile.gettempdir(), 'cache_generations'
+        )
+        return os.path.join(directory, hashlib.sha1(f'{self.prefix}{group}'.encode()).hexdigest())
+
+    def get(self, group):
+        client = get_redis()
+        if client is not None:
+            try:
+                value = client.get(f'{self.prefix}{group}')
+                return value.decode() if value else '0'
+            except Exception as e:
+                redis_failed(e)
+        try:
+            with open(self._path(group)) as f:
+                return f.read() or '0'
+        except OSError:
+            return '0'
+
+    def bump(self, group):
+        """Nova geração (chamar ao invalidar); grava no Redis e no arquivo, para o caso de o Redis cair"""
+        token = uuid.uuid4().hex
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(f'{self.prefix}{group}', token)
+            except Exception as e:
+                redis_failed(e)
+        path = self._path(group)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{token}.tmp'
+            with open(tmp, 'w') as f:
+                f.write(token)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f'[Cache] Erro ao gravar geração {self.prefix}{group}: {e}')
@@ -0,0 +1,220 @@
+from datetime import datetime
+from difflib import SequenceMatcher
+from itertools import combinations
+from sqlalchemy import select, update, delete, insert, func, or_
+from app import db
+from app.models.customer import Customer
+from app.models.customer_duplicate import CustomerDuplicate
+from app.models.appointment import Appointment
+from app.models.financial import Transaction, AccountReceivable, Invoice
+
+# Chaves de bloqueio: só clientes que compartilham uma delas são comparados
+BLOCK_KEYS = (
+    ('phone', Customer.phone_digits),
+    ('email', Customer.email_normalized),
+    ('name', Customer.name_folded),
+)
+MAX_BLOCK_SIZE = 50     # Blocos maiores (ex.: nome muito comum) não são comparados
+MIN_SCORE = 0.5         # Pontuação mínima para sugerir a mesclagem
+NAME_SIMILARITY = 0.85  # Nomes diferentes, mas parecidos (abreviações, erros de digitação)
+LOAD_CHUNK = 5000
+
+# Tabelas com customer_id re-apontadas na mesclagem
+CUSTOMER_REFERENCES = (
+    ('appointments', Appointment),
+    ('transactions', Transaction),
+    ('accounts_receivable', AccountReceivable),
+    ('invoices', Invoice),
+)
+
+
+def _blocks(company_id):
+    """Grupos de ids com a mesma chave normalizada (GROUP BY ... HAVING count > 1)"""
+    active = (Customer.company_id == company_id, Customer.is_active == True)
+    blocks = []
+    for _, column in BLOCK_KEYS:
+        shared = select(column).where(*active, column.isnot(None)).group_by(column).having(
+            func.count() > 1, func.count() <= MAX_BLOCK_SIZE
+        )
+        rows = db.session.execute(
+            select(column, Customer.id).where(*active, column.in_(shared)).order_by(column)
+        ).all()
+        current, ids = None, []
+        for value, customer_id in rows:
+            if value != current and ids:
+                blocks.append(ids)
+                ids = []
+            current = value
+            ids.append(customer_id)
+        if len(ids) > 1:
+            blocks.append(ids)
+    return blocks
+
+
+def _load(ids):
+    """Chaves normalizadas dos clientes candidatos, em lotes"""
+    ids = sorted(ids)
+    customers = {}
+    for start in range(0, len(ids), LOAD_CHUNK):
+        rows = db.session.execute(
+            select(Customer.id, Customer.phone_digits, Customer.email_normalized,
+                   Customer.name_folded, Customer.created_at)
+            .where(Customer.id.in_(ids[start:start + LOAD_CHUNK]))
+        ).all()
+        customers.update({r[0]: r for r in rows})
+    return customers
+
+
+def score_pair(a, b):
+    """Pontuação 0-1 de dois clientes (id, phone_digits, email_normalized, name_folded, ...)"""
+    score, matched = 0.0, []
+    _, phone_a, email_a, name_a = a[:4]
+    _, phone_b, email_b, name_b = b[:4]
+
+    if phone_a and phone_b:
+        if phone_a == phone_b:
+            score += 0.5
+            matched.append('phone')
+        elif len(phone_a) >= 8 and phone_a[-8:] == phone_b[-8:]:
+            # Mesmo número com/sem DDD ou nono dígito
+            score += 0.3
+            matched.append('phone')
+
+    if email_a and email_a == email_b:
+        score += 0.5
+        matched.append('email')
+
+    if name_a and name_b:
+        if name_a == name_b:
+            score += 0.3
+            matched.append('name')
+        else:
+            ratio = SequenceMatcher(None, name_a, name_b).ratio()
+            if ratio >= NAME_SIMILARITY:
+                score += 0.2 * ratio
+                matched.append('name')
+
+    return min(score, 1.0), matched
+
+
+def find_duplicates(company_id):
+    """Recalcular os candidatos a duplicidade da empresa.
+
+    Compara apenas pares dentro dos blocos, agrupa os pares aceitos (union-find)
+    e sugere mesclar cada grupo no cliente mais antigo. Pares já descartados
+    ou mesclados são preservados.
+    """
+    blocks = _blocks(company_id)
+    customers = _load({cid for block in blocks for cid in block})
+
+    # Pares únicos dentro dos blocos
+    best = {}
+    seen = set()
+    for block in blocks:
+        for a, b in combinations(sorted(block), 2):
+            if (a, b) in seen:
+                continue
+            seen.add((a, b))
+            score, matched = score_pair(customers[a], customers[b])
+            if score >= MIN_SCORE:
+                best[(a, b)] = (score, matched)
+
+    # Union-find dos pares aceitos
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in best:
+        parent[find(a)] = find(b)
+
+    clusters = {}
+    for cid in parent:
+        clusters.setdefault(find(cid), []).append(cid)
+
+    resolved = {tuple(r) for r in db.session.execute(
+        select(CustomerDuplicate.customer_id, CustomerDuplicate.duplicate_id).where(
+            CustomerDuplicate.company_id == company_id,
+            CustomerDuplicate.status != 'pending'
+        )
+    )}
+
+    now = datetime.utcnow()
+    rows = []
+    for members in clusters.values():
+        primary = min(members, key=lambda cid: (customers[cid][4] or now, cid))
+        for cid in members:
+            if cid == primary or (primary, cid) in resolved:
+                continue
+            # Pontuação contra o principal (não contra outro membro do grupo)
+            pair = (min(primary, cid), max(primary, cid))
+            score, matched = best.get(pair) or score_pair(customers[primary], customers[cid])
+            rows.append({
+                'company_id': company_id,
+                'customer_id': primary,
+                'duplicate_id': cid,
+                'score': score,
+                'matched_on': ','.join(matched),
+                'status': 'pending',
+                'created_at': now,
+            })
+
+    db.session.execute(delete(CustomerDuplicate).where(
+        CustomerDuplicate.company_id == company_id,
+        CustomerDuplicate.status == 'pending'
+    ))
+    if rows:
+        db.session.execute(insert(CustomerDuplicate), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def merge_customers(primary, duplicates):
+    """Mesclar clientes duplicados no principal.
+
+    Re-aponta agendamentos, transações, contas a receber e notas com um UPDATE
+    em lote por tabela, completa os dados em branco do principal e desativa
+    os duplicados (merged_into_id). Retorna o número de registros movidos por tabela.
+    """
+    duplicate_ids = [d.id for d in duplicates]
+    moved = {}
+
+    for name, model in CUSTOMER_REFERENCES:
+        result = db.session.execute(
+            update(model).where(
+                model.company_id == primary.company_id,
+                model.customer_id.in_(duplicate_ids)
+            ).values(customer_id=primary.id).execution_options(synchronize_session=False)
+        )
+        moved[name] = result.rowcount
+
+    # Desativar antes de copiar o email (índice único de email entre clientes ativos)
+    for duplicate in duplicates:
+        duplicate.is_active = False
+        duplicate.merged_into_id = primary.id
+    db.session.flush()
+
+    # Completar campos vazios do principal com os dos duplicados (mais antigo primeiro)
+    for duplicate in sorted(duplicates, key=lambda d: d.id):
+        for field in ('email', 'cpf', 'birth_date', 'address'):
+            if not getattr(primary, field) and getattr(duplicate, field):
+                setattr(primary, field, getattr(duplicate, field))
+        if duplicate.notes and duplicate.notes not in (primary.notes or ''):
+            primary.notes = f'{primary.notes}\n{duplicate.notes}' if primary.notes else duplicate.notes
+
+    # Os clientes mesclados saem de todos os pares pendentes
+    db.session.execute(
+        update(CustomerDuplicate).where(
+            CustomerDuplicate.company_id == primary.company_id,
+            CustomerDuplicate.status == 'pending',
+            or_(CustomerDuplicate.customer_id.in_(duplicate_ids),
+                CustomerDuplicate.duplicate_id.in_(duplicate_ids))
+        ).values(status='merged', resolved_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    )
+
+    db.session.commit()
+    return moved
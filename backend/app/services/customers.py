@@ -0,0 +1,62 @@
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.customer import Customer
+from app.utils.text import fold_name, normalize_email, normalize_phone
+
+# Dialetos com INSERT ... ON CONFLICT
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+# Colunas do cliente que o agendamento público usa (sem carregar a entidade inteira)
+CustomerRef = namedtuple('CustomerRef', 'id name email')
+CUSTOMER_REF_COLUMNS = (Customer.id, Customer.name, Customer.email)
+
+
+def upsert_customer_by_email(company_id, name, email, phone):
+    """CustomerRef (id, nome, email) do cliente ativo com este email, criando-o se não existir.
+
+    Usa INSERT ... ON CONFLICT DO UPDATE ... RETURNING sobre o índice único
+    (company_id, email_normalized), sem janela de corrida entre busca e criação.
+    Em outros bancos, tenta o INSERT num savepoint e relê em caso de conflito.
+    """
+    now = datetime.utcnow()
+    email_normalized = normalize_email(email)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in _UPSERT_INSERTS:
+        stmt = _UPSERT_INSERTS[dialect](Customer).values(
+            company_id=company_id,
+            name=name,
+            email=email,
+            phone=phone,
+            name_folded=fold_name(name),
+            email_normalized=email_normalized,
+            phone_digits=normalize_phone(phone),
+            is_active=True,
+            created_at=now,
+            updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['company_id', 'email_normalized'],
+            index_where=Customer.is_active == True,
+            set_={'updated_at': stmt.excluded.updated_at}
+        ).returning(*CUSTOMER_REF_COLUMNS)
+        return CustomerRef(*db.session.execute(stmt).one())
+
+    try:
+        with db.session.begin_nested():
+            customer = Customer(name=name, email=email, phone=phone, company_id=company_id)
+            db.session.add(customer)
+        return CustomerRef(customer.id, customer.name, customer.email)
+    except IntegrityError:
+        row = db.session.query(*CUSTOMER_REF_COLUMNS).filter_by(
+            company_id=company_id,
+            email_normalized=email_normalized,
+            is_active=True
+        ).one()
+        return CustomerRef(*row)
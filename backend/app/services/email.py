@@ -1,3 +1,4 @@
+from html import escape
 import resend
 import os
 
@@ -99,3 +100,27 @@ def send_reminder(recipient_email, recipient_name, service_name,
     except Exception as e:
         print(f'[Email] Erro lembrete: {e}')
         return False
+
+
+def send_low_stock_digest(owner_email, company_name, items):
+    """Resumo de produtos que atingiram o estoque mínimo"""
+    try:
+        rows = ''.join(
+            f'<tr style="border-top:1px solid #F3F4F6;"><td style="padding:8px 0;color:#111827;font-size:14px;">{escape(item["name"] or "")}</td>'
+            f'<td style="padding:8px 0;text-align:right;font-weight:600;color:#DC2626;">{item["quantity"]} {escape(item["unit"])}</td>'
+            f'<td style="padding:8px 0;text-align:right;color:#6B7280;font-size:13px;">mín. {item["min_quantity"]}</td></tr>'
+            for item in items
+        )
+        card = f'<div style="background:white;border-radius:8px;padding:20px;border:1px solid #E5E7EB;margin-bottom:24px;"><table style="width:100%;border-collapse:collapse;">{rows}</table></div>'
+        body = f'<p style="color:#6B7280;margin:0 0 20px;">{len(items)} produto(s) atingiram o estoque mínimo.</p>' + card
+        html = _base_html('#DC2626', '📦 Estoque Baixo', company_name, body)
+        resend.Emails.send({
+            'from': f'Sahjo <{FROM_EMAIL}>',
+            'to': [owner_email],
+            'subject': f'Estoque baixo — {len(items)} produto(s)',
+            'html': html
+        })
+        return True
+    except Exception as e:
+        print(f'[Email] Erro resumo estoque baixo: {e}')
+        return False
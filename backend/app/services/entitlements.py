@@ -0,0 +1,66 @@
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models.company import Company, TRIAL_DAYS
+from app.models.subscription import Subscription
+from app.services.cache import TwoTierCache
+
+LOCAL_TTL = 60     # Mudanças em outro worker sem Redis aparecem em até 60s
+REDIS_TTL = 3600
+
+EPOCH = datetime(1970, 1, 1)
+
+# Direito de acesso por empresa: {'status', 'trial_ends_at', 'period_end'} (epoch UTC)
+_entitlements = TwoTierCache('entitlement:', LOCAL_TTL, REDIS_TTL)
+
+
+def _epoch(value):
+    return (value - EPOCH).total_seconds() if value else None
+
+
+def _build(company_id):
+    row = db.session.query(
+        Company.subscription_status, Company.created_at, Subscription.current_period_end
+    ).outerjoin(
+        Subscription, Subscription.company_id == Company.id
+    ).filter(Company.id == company_id).first()
+    if not row:
+        return None
+    status, created_at, period_end = row
+    return {
+        'status': status,
+        'trial_ends_at': _epoch(created_at + timedelta(days=TRIAL_DAYS)) if created_at else None,
+        'period_end': _epoch(period_end),
+    }
+
+
+def get_entitlement(company_id):
+    """Situação da assinatura da empresa: processo -> Redis -> banco (uma consulta)"""
+    key = str(company_id)
+    entitlement = _entitlements.get(key)
+    if entitlement is None:
+        entitlement = _build(company_id)
+        if entitlement is not None:
+            _entitlements.set(key, entitlement)
+    return entitlement
+
+
+def has_access(entitlement, now=None):
+    """Mesma regra de Company.can_access(), calculada sobre o cache.
+
+    O fim do teste é comparado com o relógio a cada chamada: a expiração vale
+    na hora certa sem precisar invalidar nada.
+    """
+    if not entitlement:
+        return False
+    if entitlement['status'] == 'active':
+        return True
+    if entitlement['status'] == 'trial' and entitlement['trial_ends_at']:
+        # Company.trial_days_remaining() > 0: falta pelo menos um dia inteiro
+        return entitlement['trial_ends_at'] - (now or time.time()) >= 86400
+    return False
+
+
+def invalidate_entitlement(company_id):
+    """Descartar o cache (chamar após pagamento confirmado ou cancelamento)"""
+    _entitlements.delete(str(company_id))
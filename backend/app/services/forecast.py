@@ -0,0 +1,103 @@
+from datetime import datetime, date, time, timedelta
+import numpy as np
+from sqlalchemy import delete, insert, func
+from app import db
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.models.product_forecast import ProductForecast
+
+WINDOW_DAYS = 90        # Histórico considerado
+MOVING_AVERAGE_DAYS = 28
+SMOOTHING_ALPHA = 0.3
+LEAD_TIME_DAYS = 7      # Prazo de entrega do fornecedor
+REVIEW_DAYS = 14        # Cobertura desejada após a reposição
+SERVICE_Z = 1.65        # ~95% de nível de serviço
+
+
+def _demand_matrix(company_id, product_ids, start, window_days):
+    """Matriz [produto x dia] com as saídas diárias, montada a partir de um único GROUP BY"""
+    day = func.date(StockMovement.created_at)
+    rows = db.session.query(
+        StockMovement.product_id, day, func.sum(StockMovement.quantity)
+    ).filter(
+        StockMovement.company_id == company_id,
+        StockMovement.movement_type == 'saida',
+        StockMovement.created_at >= datetime.combine(start, time.min)
+    ).group_by(StockMovement.product_id, day).all()
+
+    demand = np.zeros((len(product_ids), window_days))
+    if not rows:
+        return demand
+
+    position = {pid: i for i, pid in enumerate(product_ids)}
+    keep = [r for r in rows if r[0] in position]
+    if not keep:
+        return demand
+
+    # func.date devolve date no Postgres e texto no SQLite
+    product_idx = np.fromiter((position[r[0]] for r in keep), dtype=np.int64, count=len(keep))
+    day_idx = np.fromiter(((date.fromisoformat(str(r[1])[:10]) - start).days for r in keep),
+                          dtype=np.int64, count=len(keep))
+    quantities = np.fromiter((r[2] or 0 for r in keep), dtype=np.float64, count=len(keep))
+
+    valid = (day_idx >= 0) & (day_idx < window_days)
+    np.add.at(demand, (product_idx[valid], day_idx[valid]), quantities[valid])
+    return demand
+
+
+def run_forecast(company_id, window_days=WINDOW_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                 review_days=REVIEW_DAYS, alpha=SMOOTHING_ALPHA):
+    """Calcular demanda e ponto de reposição de todos os produtos ativos da empresa"""
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=window_days - 1)
+
+    products = db.session.query(Product.id, Product.quantity).filter(
+        Product.company_id == company_id,
+        Product.is_active == True
+    ).order_by(Product.id).all()
+
+    db.session.execute(delete(ProductForecast).where(ProductForecast.company_id == company_id))
+    if not products:
+        db.session.commit()
+        return 0
+
+    product_ids = [p.id for p in products]
+    stock = np.array([p.quantity or 0 for p in products], dtype=np.float64)
+    demand = _demand_matrix(company_id, product_ids, start, window_days)
+
+    # Média móvel dos últimos dias
+    ma_days = min(MOVING_AVERAGE_DAYS, window_days)
+    moving_average = demand[:, -ma_days:].mean(axis=1)
+
+    # Suavização exponencial em forma fechada: pesos alpha*(1-alpha)^k do dia mais recente
+    # para o mais antigo, com o restante do peso no primeiro dia da janela
+    decay = (1 - alpha) ** np.arange(window_days - 1, -1, -1)
+    weights = alpha * decay
+    weights[0] = decay[0]
+    ema = demand @ weights
+
+    demand_std = demand.std(axis=1)
+    safety_stock = SERVICE_Z * demand_std * np.sqrt(lead_time_days)
+    reorder_point = ema * lead_time_days + safety_stock
+    target = reorder_point + ema * review_days
+    suggested = np.where(stock <= reorder_point, np.ceil(np.maximum(target - stock, 0)), 0).astype(np.int64)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'company_id': company_id,
+            'product_id': pid,
+            'avg_daily_demand': float(moving_average[i]),
+            'ema_daily_demand': float(ema[i]),
+            'demand_std': float(demand_std[i]),
+            'lead_time_days': lead_time_days,
+            'safety_stock': float(safety_stock[i]),
+            'reorder_point': float(reorder_point[i]),
+            'suggested_quantity': int(suggested[i]),
+            'computed_at': now,
+        }
+        for i, pid in enumerate(product_ids)
+    ]
+    db.session.execute(insert(ProductForecast), rows)
+    db.session.commit()
+    return len(rows)
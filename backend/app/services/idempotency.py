@@ -0,0 +1,173 @@
+import hashlib
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+TTL_SECONDS = 24 * 3600      # Por quanto tempo uma repetição devolve a resposta guardada
+WAIT_SECONDS = 10            # Espera máxima por uma requisição igual ainda em andamento
+LEASE_SECONDS = 60           # Acima do timeout do gunicorn: "processing" mais antigo é de um worker que caiu
+POLL_INTERVAL = 0.1
+
+# Chave em uso por outra requisição cujo registro não foi possível ler (tratada como "processing")
+Pending = namedtuple('Pending', 'status request_hash')
+
+
+def _scope():
+    """Rota + usuário autenticado (se houver): a mesma chave em outra conta não colide"""
+    try:
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    scope = f'{request.method} {request.path}'
+    return f'{scope} user:{identity}' if identity else scope
+
+
+def _replay(record):
+    response = make_response(record.response_body or '', record.response_status)
+    response.mimetype = 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _lease_expired(record, now):
+    return record.status == 'processing' and (record.locked_until is None or record.locked_until < now)
+
+
+def _claim(scope, key, request_hash):
+    """Registrar a chave como "processing"; devolve o registro existente se já havia um.
+
+    None significa que esta requisição ficou com a chave (e deve executar a rota).
+    """
+    for _ in range(2):
+        now = datetime.utcnow()
+        try:
+            db.session.add(IdempotencyKey(
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                status='processing',
+                locked_until=now + timedelta(seconds=LEASE_SECONDS),
+                expires_at=now + timedelta(seconds=TTL_SECONDS),
+            ))
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        existing = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+        if existing is None:
+            continue
+        if existing.expires_at < now:
+            # Chave vencida: libera para a nova requisição
+            db.session.delete(existing)
+            db.session.commit()
+            continue
+        if _lease_expired(existing, now):
+            # Quem processava caiu sem terminar: assumir a chave (só uma requisição consegue)
+            taken = IdempotencyKey.query.filter(
+                IdempotencyKey.id == existing.id,
+                IdempotencyKey.status == 'processing',
+                db.or_(IdempotencyKey.locked_until.is_(None), IdempotencyKey.locked_until < now)
+            ).update({
+                'request_hash': request_hash,
+                'locked_until': now + timedelta(seconds=LEASE_SECONDS),
+            }, synchronize_session=False)
+            db.session.commit()
+            if taken:
+                return None
+            continue
+        return existing
+    return IdempotencyKey.query.filter_by(scope=scope, key=key).first() or Pending('processing', request_hash)
+
+
+def _wait(scope, key):
+    """Aguardar a primeira requisição terminar (outro worker ou thread)"""
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        db.session.rollback()  # Nova transação: enxergar o commit da outra requisição
+        record = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+        if record is None or record.status != 'processing' or _lease_expired(record, datetime.utcnow()):
+            return record
+    return IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+
+
+def _release(scope, key):
+    """Apagar a chave após erro: o cliente pode tentar de novo com a mesma"""
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+    db.session.commit()
+
+
+def idempotent(view):
+    """Suporte ao header Idempotency-Key em rotas POST.
+
+    A primeira requisição com a chave executa a rota e guarda a resposta (exceto erros 5xx);
+    repetições devolvem a resposta guardada sem executar de novo, e repetições simultâneas
+    esperam a primeira terminar. Sem o header, a rota executa normalmente.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER, '').strip()
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} inválida (máximo {MAX_KEY_LENGTH} caracteres)'}), 400
+
+        scope = _scope()
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        existing = _claim(scope, key, request_hash)
+        if existing is not None and existing.status == 'processing':
+            existing = _wait(scope, key)
+            if existing is None or _lease_expired(existing, datetime.utcnow()):
+                # A primeira falhou (liberou a chave ou o prazo venceu): esta assume
+                existing = _claim(scope, key, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return jsonify({'error': f'{HEADER} já usada com outra requisição'}), 422
+            if existing.status == 'processing':
+                response = jsonify({'error': 'Requisição igual ainda em processamento'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            return _replay(existing)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            _release(scope, key)
+            raise
+
+        if response.status_code >= 500:
+            _release(scope, key)
+            return response
+
+        try:
+            IdempotencyKey.query.filter_by(scope=scope, key=key).update({
+                'status': 'completed',
+                'response_status': response.status_code,
+                'response_body': response.get_data(as_text=True),
+            })
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'[Idempotency] Erro ao guardar resposta: {e}')
+        return response
+
+    return wrapper
+
+
+def purge_expired():
+    """Apagar chaves vencidas; retorna quantas foram removidas"""
+    result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,146 @@
+import threading
+import time
+import uuid
+from collections import deque
+from flask import current_app
+from app.services.cache import get_redis, redis_failed
+
+# Falhas de login por dimensão: (janela em segundos, falhas toleradas, espera inicial, espera máxima).
+# A partir do limite cada nova falha dobra a espera. Sobrescrever com app.config['LOGIN_THROTTLE'].
+LOGIN_THROTTLE = {
+    'email': (900, 5, 1, 900),
+    'ip': (900, 20, 1, 900),
+}
+
+# Registrar a falha em cada janela deslizante (sorted set por timestamp) e, acima do limite,
+# gravar o bloqueio com backoff exponencial. KEYS: pares (janela, bloqueio) por dimensão.
+# ARGV: agora, membro único, depois (janela, limite, espera inicial, espera máxima) por dimensão.
+RECORD_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local longest = 0
+for i = 1, #KEYS, 2 do
+    local offset = 3 + (i - 1) * 2
+    local window = tonumber(ARGV[offset])
+    local threshold = tonumber(ARGV[offset + 1])
+    local base = tonumber(ARGV[offset + 2])
+    local max_delay = tonumber(ARGV[offset + 3])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    redis.call('ZADD', KEYS[i], now, ARGV[2])
+    redis.call('EXPIRE', KEYS[i], math.ceil(window))
+    local failures = redis.call('ZCARD', KEYS[i])
+    if failures >= threshold then
+        local delay = math.min(max_delay, base * 2 ^ (failures - threshold))
+        redis.call('SET', KEYS[i + 1], tostring(now + delay), 'PX', math.ceil(delay * 1000))
+        longest = math.max(longest, delay)
+    end
+end
+return tostring(longest)
+"""
+
+_script = {'client': None, 'script': None}
+
+
+class LocalFailures:
+    """Janelas de falhas e bloqueios em memória do processo (usado sem Redis)"""
+
+    def __init__(self, max_items=100000):
+        self.max_items = max_items
+        self._failures = {}
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def blocked(self, keys, now):
+        wait = 0.0
+        for key in keys:
+            until = self._blocked.get(key)
+            if until:
+                wait = max(wait, until - now)
+        return wait
+
+    def record(self, dimensions, now):
+        """dimensions: [(chave, janela, limite, espera inicial, espera máxima)]"""
+        longest = 0.0
+        with self._lock:
+            if len(self._failures) >= self.max_items:
+                self._failures.clear()
+                self._blocked = {k: v for k, v in self._blocked.items() if v > now}
+            for key, window, threshold, base, max_delay in dimensions:
+                log = self._failures.setdefault(key, deque())
+                while log and log[0] <= now - window:
+                    log.popleft()
+                log.append(now)
+                if len(log) >= threshold:
+                    delay = min(max_delay, base * 2 ** (len(log) - threshold))
+                    self._blocked[key] = now + delay
+                    longest = max(longest, delay)
+        return longest
+
+    def clear(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._blocked.pop(key, None)
+
+
+_local = LocalFailures()
+
+
+def _dimensions(email, ip):
+    limits = dict(LOGIN_THROTTLE)
+    limits.update(current_app.config.get('LOGIN_THROTTLE') or {})
+    identities = {'email': email, 'ip': ip}
+    return [(f'login_fail:{name}:{identities[name]}', *limits[name]) for name in limits if identities.get(name)]
+
+
+def login_blocked(email, ip):
+    """Segundos de espera se o email ou o IP estiver bloqueado (0 = liberado).
+
+    Só lê as chaves de bloqueio (um MGET): rejeitar custa microssegundos, sem bcrypt.
+    """
+    keys = [key for key, *_ in _dimensions(email, ip)]
+    if not keys:
+        return 0.0
+    now = time.time()
+    client = get_redis()
+    if client is not None:
+        try:
+            values = client.mget([f'{key}:block' for key in keys])
+            return max([float(v) - now for v in values if v] + [0.0])
+        except Exception as e:
+            redis_failed(e)
+    return _local.blocked(keys, now)
+
+
+def record_login_failure(email, ip):
+    """Registrar senha errada; retorna a espera imposta (0 se ainda abaixo do limite)"""
+    dimensions = _dimensions(email, ip)
+    if not dimensions:
+        return 0.0
+    now = time.time()
+    client = get_redis()
+    if client is not None:
+        try:
+            if _script['client'] is not client:
+                _script['script'] = client.register_script(RECORD_FAILURE_SCRIPT)
+                _script['client'] = client
+            keys, args = [], [now, uuid.uuid4().hex]
+            for key, window, threshold, base, max_delay in dimensions:
+                keys += [key, f'{key}:block']
+                args += [window, threshold, base, max_delay]
+            return float(_script['script'](keys=keys, args=args))
+        except Exception as e:
+            redis_failed(e)
+    return _local.record(dimensions, now)
+
+
+def clear_login_failures(email):
+    """Login com sucesso zera as falhas do email (as do IP continuam: IP pode ser compartilhado)"""
+    if not email:
+        return
+    key = f'login_fail:email:{email}'
+    client = get_redis()
+    if client is not None:
+        try:
+            client.delete(key, f'{key}:block')
+        except Exception as e:
+            redis_failed(e)
+    _local.clear(key)
@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from flask import current_app
+
+DEFAULT_ROUNDS = 12     # Custo do bcrypt (cada +1 dobra o tempo); BCRYPT_ROUNDS na configuração
+DEFAULT_WORKERS = 1     # Hashes simultâneos por processo (o restante da CPU fica para a API)
+DEFAULT_QUEUE = 1       # Pedidos aguardando; acima disso responde 503 em vez de acumular
+DEFAULT_THREADS = 4     # Threads do gunicorn por processo (WEB_THREADS)
+
+_pool = {'executor': None, 'slots': None}
+_pool_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """Fila de verificação de senhas cheia (a rota deve responder 503)"""
+
+
+def _admission(workers, queue, threads):
+    """Limitar workers + fila a menos que as threads da requisição (ao menos uma fica livre)"""
+    limit = max(1, threads - 1)
+    if workers + queue > limit:
+        print(f'[Passwords] PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE ({workers + queue}) '
+              f'precisa ser menor que WEB_THREADS ({threads}); usando {limit}')
+        workers = max(1, min(workers, limit))
+        queue = max(0, limit - workers)
+    return workers, queue
+
+
+def _executor():
+    if _pool['executor'] is None:
+        with _pool_lock:
+            if _pool['executor'] is None:
+                workers = current_app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS)
+                queue = current_app.config.get('PASSWORD_HASH_QUEUE', DEFAULT_QUEUE)
+                workers, queue = _admission(workers, queue, current_app.config.get('WEB_THREADS', DEFAULT_THREADS))
+                _pool['slots'] = threading.BoundedSemaphore(workers + queue)
+                _pool['executor'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+    return _pool['executor'], _pool['slots']
+
+
+def _run(fn, *args):
+    """Executar no pool do bcrypt (libera o GIL); PasswordHasherBusy se a fila estiver cheia"""
+    executor, slots = _executor()
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def _rounds():
+    return current_app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
+
+
+def hash_password(password):
+    salt = bcrypt.gensalt(rounds=_rounds())
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password, password_hash):
+    if not password_hash:
+        return False
+    return _run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash):
+    """Custo gravado no hash ("$2b$12$..." -> 12), ou None se não for bcrypt"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    """Hash gravado com custo diferente do configurado (refazer após login com sucesso)"""
+    return hash_rounds(password_hash) != _rounds()
+
+
+def benchmark_rounds(rounds=range(10, 15), samples=3):
+    """Tempo médio (ms) de uma verificação para cada custo, medido nesta máquina"""
+    results = {}
+    for cost in rounds:
+        hashed = bcrypt.hashpw(b'benchmark-password', bcrypt.gensalt(rounds=cost))
+        start = time.perf_counter()
+        for _ in range(samples):
+            bcrypt.checkpw(b'benchmark-password', hashed)
+        results[cost] = (time.perf_counter() - start) / samples * 1000
+    return results
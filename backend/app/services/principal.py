@@ -0,0 +1,68 @@
+from collections import namedtuple
+from flask_jwt_extended import create_access_token, current_user
+from app.models.user import User
+from app.services.cache import TwoTierCache
+
+LOCAL_TTL = 30    # Desativação em outro worker aparece em até 30s (no mesmo worker, na hora)
+REDIS_TTL = 3600
+
+# Usuário autenticado da requisição (carregado uma vez por requisição pelo flask_jwt_extended)
+Principal = namedtuple('Principal', 'id company_id role')
+
+# Estado atual do usuário ({'active', 'company_id', 'role'}) para validar os claims do token
+_users = TwoTierCache('principal:', LOCAL_TTL, REDIS_TTL)
+
+
+def token_claims(user):
+    """Claims extras do access token: empresa e papel dispensam consultar o usuário"""
+    return {'company_id': user.company_id, 'role': user.role}
+
+
+def issue_access_token(user):
+    return create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+
+
+def _user_state(user_id):
+    key = str(user_id)
+    state = _users.get(key)
+    if state is None:
+        row = User.query.with_entities(User.is_active, User.company_id, User.role).filter_by(id=user_id).first()
+        state = {'active': bool(row and row.is_active), 'company_id': row.company_id if row else None,
+                 'role': row.role if row else None}
+        _users.set(key, state)
+    return state
+
+
+def resolve_principal(jwt_data):
+    """Principal a partir dos claims do token, ou None se o token não vale mais.
+
+    Usuário removido/inativo, ou empresa/papel diferentes dos do token (mudaram depois
+    da emissão), invalidam o token. Tokens antigos sem claims usam o estado em cache.
+    """
+    try:
+        user_id = int(jwt_data['sub'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    state = _user_state(user_id)
+    if not state['active']:
+        return None
+
+    company_id = jwt_data.get('company_id', state['company_id'])
+    role = jwt_data.get('role', state['role'])
+    if company_id != state['company_id'] or role != state['role']:
+        return None
+    return Principal(user_id, company_id, role)
+
+
+def invalidate_principal(*user_ids):
+    """Descartar o estado em cache (chamar após desativar, remover ou trocar papel/empresa)"""
+    _users.delete(*[str(user_id) for user_id in user_ids if user_id])
+
+
+def get_user_company_id():
+    """Obter company_id do usuário logado"""
+    principal = current_user
+    if not principal or not principal.company_id:
+        return None
+    return principal.company_id
@@ -0,0 +1,82 @@
+import hashlib
+from flask import current_app
+from app.models.company import Company
+from app.models.product import Product
+from app.services.public_snapshot import publish_snapshot
+from app.services.tenant_cache import get_tenant, get_public_page
+
+FEATURED_PRODUCTS = 12  # Produtos embutidos na página pública
+
+
+def public_product(p, config):
+    """Produto da vitrine, respeitando as opções de exibição de preço e estoque"""
+    data = {
+        'id': p.id,
+        'name': p.name,
+        'description': p.description,
+        'image_url': getattr(p, 'image_url', None),
+        'category': p.category,
+    }
+    if config['show_product_prices']:
+        data['price'] = p.sale_price
+    if config['show_product_stock']:
+        data['quantity'] = p.quantity
+        data['unit'] = p.unit
+    return data
+
+
+def build_payload(tenant):
+    config = tenant['config']
+
+    # Vitrine: só os primeiros destaques; o restante vem de /public/<slug>/products
+    products = Product.query.filter_by(
+        company_id=tenant['company_id'], is_active=True
+    ).order_by(
+        Product.is_featured.desc(), Product.name, Product.id
+    ).limit(FEATURED_PRODUCTS + 1).all()
+
+    return {
+        'company': dict(
+            tenant['company'],
+            opening_hours=config['opening_hours'],
+            welcome_text=config['welcome_text'],
+            footer_text=config['footer_text'],
+        ),
+        'services': config['services'],
+        'products': [public_product(p, config) for p in products[:FEATURED_PRODUCTS]],
+        'has_more_products': len(products) > FEATURED_PRODUCTS,
+    }
+
+
+def _render(slug, tenant):
+    body = current_app.json.dumps(build_payload(tenant))
+    page = {
+        'body': body,
+        'etag': hashlib.sha256(body.encode()).hexdigest()[:32],
+        'title': tenant['company']['name'],
+    }
+    publish_snapshot(slug, page)
+    return page
+
+
+def get_page(slug):
+    """Página pública pronta ({'body', 'etag', 'title'}) ou None se a empresa não existir.
+
+    Na falta do cache, uma requisição monta a página e publica o snapshot estático;
+    as simultâneas esperam o resultado.
+    """
+    tenant = get_tenant(slug)
+    if not tenant:
+        return None
+    return get_public_page(slug, lambda: _render(slug, tenant))
+
+
+def publish_all():
+    """Republicar os snapshots de todas as empresas ativas"""
+    slugs = [c.slug for c in Company.query.with_entities(Company.slug).filter_by(is_active=True) if c.slug]
+    published = 0
+    for slug in slugs:
+        page = get_page(slug)
+        if page is not None and publish_snapshot(slug, page):
+            published += 1
+    return published
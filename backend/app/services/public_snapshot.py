@@ -0,0 +1,111 @@
+import html
+import os
+import re
+import tempfile
+import threading
+from flask import current_app
+
+SLUG_PATTERN = re.compile(r'[\w-]+')
+DATA_SCRIPT_ID = 'public-data'
+
+_template = {'path': None, 'parts': None}
+_template_lock = threading.Lock()
+
+
+def snapshot_dir():
+    """Diretório dos snapshots (None = desativado)"""
+    return current_app.config.get('PUBLIC_SNAPSHOT_DIR') or None
+
+
+def snapshot_path(slug, ext):
+    directory = snapshot_dir()
+    if not directory or not SLUG_PATTERN.fullmatch(slug or ''):
+        return None
+    return os.path.join(directory, f'{slug}.{ext}')
+
+
+def _index_template():
+    """index.html do frontend dividido em partes, lido do disco uma única vez
+
+    Partes: antes do <title>, o título original, depois do </title> até o </head>
+    e do </head> em diante; o título e o bloco de dados entram por concatenação.
+    """
+    path = os.path.join(current_app.root_path, '..', 'frontend_dist', 'index.html')
+    if _template['path'] != path:
+        with _template_lock:
+            if _template['path'] != path:
+                with open(path, encoding='utf-8') as f:
+                    source = f.read()
+                head_end = source.index('</head>')
+                title = re.search(r'<title>(.*?)</title>', source[:head_end], re.S)
+                if title:
+                    parts = (source[:title.start()], title.group(1), source[title.end():head_end], source[head_end:])
+                else:
+                    parts = (source[:head_end], '', '', source[head_end:])
+                _template['parts'] = parts
+                _template['path'] = path
+    return _template['parts']
+
+
+def load_index_template():
+    """Carregar o template na inicialização (evita a leitura no primeiro acesso)"""
+    try:
+        _index_template()
+    except (OSError, ValueError) as e:
+        print(f'[Snapshot] index.html indisponível: {e}')
+
+
+def render_shell(body, title):
+    """index.html com o JSON da página embutido em <script type="application/json">"""
+    before_title, default_title, head_rest, tail = _index_template()
+    # "<" escapado dentro do JSON: o conteúdo não consegue fechar o <script>
+    data = body.replace('<', '\\u003c')
+    return ''.join((
+        before_title,
+        '<title>', html.escape(title) if title else default_title, '</title>',
+        head_rest,
+        f'<script type="application/json" id="{DATA_SCRIPT_ID}">', data, '</script>\n',
+        tail,
+    ))
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def publish_snapshot(slug, page):
+    """Gravar <slug>.json e <slug>.html (escrita atômica); falhas não afetam a requisição"""
+    json_path, html_path = snapshot_path(slug, 'json'), snapshot_path(slug, 'html')
+    if not json_path:
+        return False
+    try:
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        _write_atomic(json_path, page['body'])
+        _write_atomic(html_path, render_shell(page['body'], page.get('title')))
+        return True
+    except Exception as e:
+        print(f'[Snapshot] Erro ao publicar {slug}: {e}')
+        return False
+
+
+def remove_snapshots(*slugs):
+    """Apagar os arquivos (o próximo acesso cai no endpoint dinâmico e republica)"""
+    for slug in slugs:
+        for ext in ('json', 'html'):
+            path = snapshot_path(slug, ext) if slug else None
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f'[Snapshot] Erro ao remover {path}: {e}')
@@ -0,0 +1,145 @@
+import math
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from app.services.cache import get_redis, redis_failed
+
+# Limites por rota: {dimensão: (requisições, período em segundos)}.
+# Cada dimensão é um token bucket (capacidade = requisições, recarga contínua no período).
+# Sobrescrever por rota com app.config['RATE_LIMITS'] = {'public_book': {'ip': (5, 60)}}.
+RATE_LIMITS = {
+    'public_page': {'ip': (120, 60), 'slug': (1200, 60)},
+    'public_products': {'ip': (120, 60), 'slug': (1200, 60)},
+    'public_availability': {'ip': (60, 60), 'slug': (600, 60)},
+    'public_book': {'ip': (10, 60), 'slug': (120, 60)},
+}
+
+# Confere todos os buckets e só consome se todos tiverem ficha (atômico no Redis).
+# ARGV: agora, depois (capacidade, recarga/s) por chave. Retorna a espera em segundos ("0" = liberado).
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 't', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    available = math.min(capacity, available + elapsed * rate)
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 't', tokens[i] - 1, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return '0'
+"""
+
+_script = {'client': None, 'script': None}
+
+
+class LocalBuckets:
+    """Token buckets em memória do processo (usado sem Redis; o limite vale por worker)"""
+
+    def __init__(self, max_items=100000):
+        self.max_items = max_items
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets, now):
+        """buckets: [(chave, capacidade, recarga/s)]. Retorna a espera em segundos (0 = liberado)"""
+        with self._lock:
+            wait, tokens = 0.0, []
+            for key, capacity, rate in buckets:
+                available, stamp = self._buckets.get(key, (capacity, now))
+                available = min(capacity, available + max(0.0, now - stamp) * rate)
+                if available < 1:
+                    wait = max(wait, (1 - available) / rate)
+                tokens.append(available)
+            if wait > 0:
+                return wait
+
+            if len(self._buckets) + len(buckets) > self.max_items:
+                # Descarta os mais antigos inseridos (buckets cheios de novo na prática)
+                for key in list(self._buckets)[:len(self._buckets) // 10 + len(buckets)]:
+                    del self._buckets[key]
+            for (key, _, _), available in zip(buckets, tokens):
+                self._buckets.pop(key, None)
+                self._buckets[key] = (available - 1, now)
+            return 0.0
+
+
+_local = LocalBuckets()
+
+
+def _bucket_script(client):
+    if _script['client'] is not client:
+        _script['script'] = client.register_script(TOKEN_BUCKET_SCRIPT)
+        _script['client'] = client
+    return _script['script']
+
+
+def client_ip():
+    """IP do cliente: o último X-Forwarded-For é o que o proxy (Railway) viu; o resto é do cliente"""
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded:
+        return forwarded.rsplit(',', 1)[-1].strip()
+    return request.remote_addr or 'unknown'
+
+
+def _limits(name):
+    limits = dict(RATE_LIMITS.get(name, {}))
+    limits.update((current_app.config.get('RATE_LIMITS') or {}).get(name, {}))
+    return limits
+
+
+def check_rate_limit(name, **identities):
+    """Consumir uma ficha de cada bucket da rota. Retorna a espera em segundos (0 = liberado)"""
+    buckets = []
+    for dimension, (count, period) in _limits(name).items():
+        identity = identities.get(dimension)
+        if identity is not None and count:
+            buckets.append((f'rl:{name}:{dimension}:{identity}', count, count / period))
+    if not buckets:
+        return 0.0
+
+    now = time.time()
+    client = get_redis()
+    if client is not None:
+        try:
+            args = [now]
+            for _, capacity, rate in buckets:
+                args += [capacity, rate]
+            return float(_bucket_script(client)(keys=[b[0] for b in buckets], args=args))
+        except Exception as e:
+            redis_failed(e)
+    return _local.take(buckets, now)
+
+
+def rate_limit(name):
+    """Limitar a rota por IP e por slug (token bucket no Redis, com fallback em memória).
+
+    Acima do limite responde 429 com Retry-After, sem executar a rota.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_app.config.get('RATE_LIMIT_ENABLED', True):
+                wait = check_rate_limit(name, ip=client_ip(), slug=kwargs.get('slug'))
+                if wait > 0:
+                    response = jsonify({'error': 'Muitas requisições. Tente novamente em instantes.'})
+                    response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+                    return response, 429
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,18 @@
+from app.services.single_flight import SingleFlightCache
+
+REPORT_TTL = 60          # Relatórios são invalidados nas alterações; o TTL só limita a memória
+REPORT_STALE_TTL = 300
+
+# Chaves agrupadas por empresa: invalidate_reports() descarta todos os relatórios dela
+_reports = SingleFlightCache('report:', REPORT_TTL, REPORT_STALE_TTL)
+
+
+def cached_report(company_id, name, params, build):
+    """Relatório em cache por empresa + parâmetros; na falta, só uma requisição chama build()"""
+    key = ':'.join([name] + [str(p) for p in params])
+    return _reports.get_or_compute(key, build, group=str(company_id))
+
+
+def invalidate_reports(company_id):
+    """Descartar os relatórios da empresa (chamar após alterar transações e contas)"""
+    _reports.invalidate_group(str(company_id))
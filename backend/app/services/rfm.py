@@ -0,0 +1,133 @@
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, delete, insert, func, union_all
+from app import db
+from app.models.appointment import Appointment
+from app.models.customer import Customer
+from app.models.customer_metrics import CustomerMetrics, RFM_SEGMENTS
+from app.models.financial import Transaction
+
+WINDOW_DAYS = 365
+
+
+def _to_date(value):
+    # func.max de datas devolve texto no SQLite
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _quintiles(values, reverse=False):
+    """Nota 1-5 pela posição de cada valor (empates recebem a mesma nota)"""
+    ordered = sorted(set(values), reverse=reverse)
+    n = len(ordered)
+    position = {v: i for i, v in enumerate(ordered)}
+    return [1 + (5 * position[v]) // n if n else 1 for v in values]
+
+
+def _segment(r, f, frequency):
+    if frequency == 0:
+        return 'no_activity'
+    if r >= 4 and f >= 4:
+        return 'champions'
+    if r >= 4 and frequency == 1:
+        return 'new'
+    if r >= 4:
+        return 'potential_loyal'
+    if f >= 4 and r >= 3:
+        return 'loyal'
+    if r <= 2 and f >= 3:
+        return 'at_risk'
+    if r <= 2:
+        return 'hibernating'
+    return 'needs_attention'
+
+
+def compute_rfm(company_id, window_days=WINDOW_DAYS):
+    """Recalcular as métricas RFM de todos os clientes ativos da empresa"""
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=window_days)
+
+    # Visitas: dias com atendimento concluído ou receita avulsa (um GROUP BY sobre a união).
+    # A receita gerada ao concluir um agendamento (appointment_id) é a mesma visita: fica de fora
+    visits = union_all(
+        select(Appointment.customer_id.label('customer_id'), Appointment.appointment_date.label('day')).where(
+            Appointment.company_id == company_id,
+            Appointment.status == 'completed',
+            Appointment.appointment_date >= start
+        ),
+        select(Transaction.customer_id, Transaction.transaction_date).where(
+            Transaction.company_id == company_id,
+            Transaction.customer_id.isnot(None),
+            Transaction.appointment_id.is_(None),
+            Transaction.type == 'income',
+            Transaction.status == 'completed',
+            Transaction.transaction_date >= start
+        )
+    ).subquery()
+    activity = {
+        customer_id: (count, _to_date(last))
+        for customer_id, count, last in db.session.execute(
+            select(visits.c.customer_id, func.count(func.distinct(visits.c.day)), func.max(visits.c.day))
+            .group_by(visits.c.customer_id)
+        )
+    }
+
+    spent = dict(db.session.execute(
+        select(Transaction.customer_id, func.sum(Transaction.amount)).where(
+            Transaction.company_id == company_id,
+            Transaction.customer_id.isnot(None),
+            Transaction.type == 'income',
+            Transaction.status == 'completed',
+            Transaction.transaction_date >= start
+        ).group_by(Transaction.customer_id)
+    ).all())
+
+    customer_ids = db.session.execute(
+        select(Customer.id).where(Customer.company_id == company_id, Customer.is_active == True)
+        .order_by(Customer.id)
+    ).scalars().all()
+
+    db.session.execute(delete(CustomerMetrics).where(CustomerMetrics.company_id == company_id))
+    if not customer_ids:
+        db.session.commit()
+        return 0
+
+    frequency = [activity.get(cid, (0, None))[0] for cid in customer_ids]
+    last_visit = [activity.get(cid, (0, None))[1] for cid in customer_ids]
+    recency = [(today - d).days if d else window_days + 1 for d in last_visit]
+    monetary = [float(spent.get(cid) or 0) for cid in customer_ids]
+
+    # Notas só entre clientes com atividade (os demais ficam em "no_activity")
+    active = [i for i, f in enumerate(frequency) if f]
+    r_scores, f_scores, m_scores = {}, {}, {}
+    if active:
+        for i, r, f, m in zip(
+            active,
+            _quintiles([recency[i] for i in active], reverse=True),
+            _quintiles([frequency[i] for i in active]),
+            _quintiles([monetary[i] for i in active])
+        ):
+            r_scores[i], f_scores[i], m_scores[i] = r, f, m
+
+    now = datetime.utcnow()
+    rows = []
+    for i, customer_id in enumerate(customer_ids):
+        segment = _segment(r_scores.get(i, 1), f_scores.get(i, 1), frequency[i])
+        rows.append({
+            'customer_id': customer_id,
+            'company_id': company_id,
+            'last_visit': last_visit[i],
+            'recency_days': (today - last_visit[i]).days if last_visit[i] else None,
+            'frequency': frequency[i],
+            'monetary': monetary[i],
+            'r_score': r_scores.get(i),
+            'f_score': f_scores.get(i),
+            'm_score': m_scores.get(i),
+            'segment': segment,
+            'segment_rank': RFM_SEGMENTS.index(segment),
+            'computed_at': now,
+        })
+
+    db.session.execute(insert(CustomerMetrics), rows)
+    db.session.commit()
+    return len(rows)
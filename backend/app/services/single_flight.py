@@ -0,0 +1,215 @@
+import json
+import threading
+import time
+import uuid
+from app import db
+from app.services.cache import Generations, LocalCache, get_redis, redis_failed
+
+LOCK_TTL = 10        # Segundos: a trava entre workers expira sozinha se o processo cair
+POLL_INTERVAL = 0.05
+
+# Só apaga a trava se ainda for a nossa (pode ter expirado e passado para outro worker)
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Flight:
+    """Recomputação em andamento no processo (as demais threads esperam o evento)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.done = False
+        self.value = None
+
+
+class SingleFlightCache:
+    """Cache em que só uma requisição recomputa cada chave; as outras esperam o resultado.
+
+    - No processo: a primeira thread calcula, as demais aguardam o mesmo cálculo.
+    - Entre workers: trava curta no Redis (SET NX PX); quem não pega a trava espera
+      o valor aparecer no Redis (até LOCK_TTL) antes de calcular por conta própria.
+    - Stale-while-revalidate: depois de `ttl` o valor fica "vencido" por mais `stale_ttl`
+      segundos; nesse intervalo uma requisição recalcula e as outras recebem o valor antigo.
+
+    Chaves podem pertencer a um grupo (ex.: empresa): invalidate_group() descarta todas
+    de uma vez trocando a geração do grupo, que entra no nome da chave. A geração é
+    compartilhada entre workers mesmo sem Redis (ver Generations).
+
+    Os valores precisam ser serializáveis em JSON e não devem ser alterados por quem recebe.
+    Sem Redis os valores ficam só no processo.
+    """
+
+    def __init__(self, prefix, ttl, stale_ttl=0, local_ttl=None, lock_ttl=LOCK_TTL, max_items=10000):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.local_ttl = local_ttl or ttl
+        self.lock_ttl = lock_ttl
+        self.local = LocalCache(ttl + stale_ttl, max_items)
+        self._flights = {}
+        self._generations = Generations(f'{prefix}gen:')
+        self._lock = threading.Lock()
+        self._release = {'client': None, 'script': None}
+
+    # ─── Armazenamento ──────────────────────────────────────────────────────
+
+    def _get(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry
+
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self.prefix + key)
+        except Exception as e:
+            redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        self.local.set(key, entry, ttl=self.local_ttl)
+        return entry
+
+    def _set(self, key, value):
+        entry = {'value': value, 'fresh_until': time.time() + self.ttl}
+        client = get_redis()
+        # Com Redis, o nível local dura pouco (mudanças de outros workers aparecem em local_ttl)
+        self.local.set(key, entry, ttl=self.local_ttl if client is not None else self.ttl + self.stale_ttl)
+        if client is not None:
+            try:
+                client.set(self.prefix + key, json.dumps(entry), ex=self.ttl + self.stale_ttl)
+            except Exception as e:
+                redis_failed(e)
+
+    def delete(self, *keys):
+        keys = [k for k in keys if k]
+        if not keys:
+            return
+        self.local.delete(*keys)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(*[self.prefix + k for k in keys])
+            except Exception as e:
+                redis_failed(e)
+
+    def invalidate_group(self, group):
+        """Descartar todas as chaves do grupo, em todos os workers (as entradas antigas expiram sozinhas)"""
+        self._generations.bump(group)
+
+    # ─── Trava entre workers ────────────────────────────────────────────────
+
+    def _acquire(self, key):
+        """Token da trava no Redis, True se não há Redis, ou None se outro worker está calculando"""
+        client = get_redis()
+        if client is None:
+            return True
+        token = uuid.uuid4().hex
+        try:
+            if client.set(f'{self.prefix}lock:{key}', token, nx=True, px=int(self.lock_ttl * 1000)):
+                return token
+            return None
+        except Exception as e:
+            redis_failed(e)
+            return True
+
+    def _unlock(self, key, token):
+        if token is True:
+            return
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            if self._release['client'] is not client:
+                self._release['script'] = client.register_script(RELEASE_SCRIPT)
+                self._release['client'] = client
+            self._release['script'](keys=[f'{self.prefix}lock:{key}'], args=[token])
+        except Exception as e:
+            redis_failed(e)
+
+    def _compute(self, key, compute, token):
+        try:
+            value = compute()
+            self._set(key, value)
+            return value
+        finally:
+            self._unlock(key, token)
+
+    def _wait_other_worker(self, key):
+        """Esperar outro worker publicar o valor; None se a trava expirar antes"""
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = self._get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    # ─── API ────────────────────────────────────────────────────────────────
+
+    def get_or_compute(self, key, compute, group=None):
+        """Valor da chave; na falta (ou vencido) apenas uma requisição chama compute()"""
+        if group is not None:
+            key = f'{group}:{self._generations.get(group)}:{key}'
+
+        entry = self._get(key)
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                return entry['value']
+            return self._revalidate(key, compute, entry)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.event.wait(self.lock_ttl)
+            if flight.done:
+                return flight.value
+            return compute()  # O primeiro falhou ou demorou demais
+
+        try:
+            token = self._acquire(key)
+            if token is None:
+                entry = self._wait_other_worker(key)
+                if entry is not None:
+                    flight.value, flight.done = entry['value'], True
+                    return entry['value']
+                token = True  # Trava expirou sem resultado: calcular aqui
+            flight.value = self._compute(key, compute, token)
+            flight.done = True
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _revalidate(self, key, compute, entry):
+        """Valor vencido: quem pega a trava recalcula; os demais recebem o valor antigo"""
+        with self._lock:
+            if key in self._flights:
+                return entry['value']
+            flight = self._flights[key] = _Flight()
+        try:
+            token = self._acquire(key)
+            if token is None:
+                return entry['value']
+            flight.value = self._compute(key, compute, token)
+            flight.done = True
+            return flight.value
+        except Exception as e:
+            db.session.rollback()
+            print(f'[SingleFlight] Erro ao recalcular {self.prefix}{key}: {e}')
+            return entry['value']
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
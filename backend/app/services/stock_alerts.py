@@ -0,0 +1,152 @@
+from datetime import datetime
+from sqlalchemy import insert, select, update, and_, exists
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.company import Company
+from app.models.product import Product
+from app.models.stock_alert import LowStockAlert
+from app.services.email import send_low_stock_digest
+
+# Dialetos com INSERT ... ON CONFLICT
+_CONFLICT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def _is_low(quantity, min_quantity):
+    return (quantity or 0) <= (min_quantity or 0)
+
+
+def _open_alert(product):
+    """Abrir alerta para o produto; se outra transação já abriu (índice único parcial), nada a fazer"""
+    values = dict(
+        company_id=product.company_id,
+        product_id=product.id,
+        quantity=product.quantity,
+        min_quantity=product.min_quantity,
+        created_at=datetime.utcnow()
+    )
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _CONFLICT_INSERTS:
+        db.session.execute(
+            _CONFLICT_INSERTS[dialect](LowStockAlert).values(**values).on_conflict_do_nothing(
+                index_elements=['product_id'],
+                index_where=LowStockAlert.resolved_at.is_(None)
+            )
+        )
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(LowStockAlert(**values))
+    except IntegrityError:
+        pass
+
+
+def record_stock_change(product, previous_quantity, previous_min_quantity=None):
+    """Detectar cruzamento do estoque mínimo após uma alteração do produto.
+
+    Só toca na tabela de alertas quando o produto muda de lado do limite;
+    não faz commit (roda na mesma transação da movimentação).
+    """
+    if previous_min_quantity is None:
+        previous_min_quantity = product.min_quantity
+
+    was_low = previous_quantity is not None and _is_low(previous_quantity, previous_min_quantity)
+    is_low = _is_low(product.quantity, product.min_quantity)
+
+    if is_low and not was_low:
+        _open_alert(product)
+    elif was_low and not is_low:
+        db.session.execute(
+            update(LowStockAlert).where(
+                LowStockAlert.product_id == product.id,
+                LowStockAlert.resolved_at.is_(None)
+            ).values(resolved_at=datetime.utcnow()).execution_options(synchronize_session=False)
+        )
+
+
+def sync_low_stock_alerts(company_id, product_ids=None):
+    """Reconciliar alertas em lote (após atualizações em massa de quantidade)"""
+    low = and_(
+        Product.company_id == company_id,
+        Product.is_active == True,
+        Product.quantity <= db.func.coalesce(Product.min_quantity, 0)
+    )
+    if product_ids is not None:
+        low = and_(low, Product.id.in_(product_ids))
+
+    open_alert = exists().where(
+        LowStockAlert.product_id == Product.id,
+        LowStockAlert.resolved_at.is_(None)
+    )
+
+    # Abrir alertas para produtos baixos sem alerta aberto
+    db.session.execute(
+        insert(LowStockAlert).from_select(
+            ['company_id', 'product_id', 'quantity', 'min_quantity', 'created_at'],
+            select(Product.company_id, Product.id, Product.quantity, Product.min_quantity,
+                   db.literal(datetime.utcnow())).where(low, ~open_alert)
+        )
+    )
+
+    # Resolver alertas de produtos que voltaram acima do mínimo (ou foram desativados)
+    still_low = select(Product.id).where(low)
+    resolve = update(LowStockAlert).where(
+        LowStockAlert.company_id == company_id,
+        LowStockAlert.resolved_at.is_(None),
+        LowStockAlert.product_id.notin_(still_low)
+    )
+    if product_ids is not None:
+        resolve = resolve.where(LowStockAlert.product_id.in_(product_ids))
+    db.session.execute(
+        resolve.values(resolved_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    )
+
+
+def open_alerts_query(company_id):
+    """Alertas abertos da empresa, com produto ativo"""
+    return LowStockAlert.query.join(Product, Product.id == LowStockAlert.product_id).filter(
+        LowStockAlert.company_id == company_id,
+        LowStockAlert.resolved_at.is_(None),
+        Product.is_active == True
+    )
+
+
+def send_low_stock_digests():
+    """Enviar um email por empresa com os alertas abertos ainda não notificados"""
+    pending = db.session.query(LowStockAlert, Product.name, Product.quantity, Product.min_quantity, Product.unit).join(
+        Product, Product.id == LowStockAlert.product_id
+    ).filter(
+        LowStockAlert.resolved_at.is_(None),
+        LowStockAlert.notified_at.is_(None),
+        Product.is_active == True
+    ).order_by(LowStockAlert.company_id, Product.name).all()
+
+    by_company = {}
+    for alert, name, quantity, min_quantity, unit in pending:
+        by_company.setdefault(alert.company_id, []).append((alert, {
+            'name': name,
+            'quantity': quantity,
+            'min_quantity': min_quantity,
+            'unit': unit or 'un',
+        }))
+
+    companies = {}
+    if by_company:
+        companies = {c.id: c for c in Company.query.filter(Company.id.in_(by_company.keys())).all()}
+
+    sent = 0
+    now = datetime.utcnow()
+    for company_id, entries in by_company.items():
+        company = companies.get(company_id)
+        if not company or not company.email:
+            continue
+        if send_low_stock_digest(company.email, company.name, [item for _, item in entries]):
+            for alert, _ in entries:
+                alert.notified_at = now
+            sent += 1
+
+    db.session.commit()
+    return sent
@@ -0,0 +1,210 @@
+from datetime import datetime, time, timedelta
+from sqlalchemy import case, func, select, insert, delete, exists, and_, union_all
+from app import db
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.models.stock_snapshot import StockSnapshot, StockMovementArchive
+from app.services.abc_analysis import MAX_WINDOW_DAYS as ABC_MAX_WINDOW_DAYS
+from app.services.forecast import WINDOW_DAYS as FORECAST_WINDOW_DAYS
+
+ARCHIVE_COLUMNS = ['id', 'product_id', 'company_id', 'user_id', 'movement_type',
+                   'quantity', 'unit_price', 'reason', 'notes', 'created_at']
+
+# Previsão, curva ABC e histórico do produto leem só stock_movements: nada dentro da maior
+# janela dessas análises pode ser arquivado, senão os resultados mudam depois da compactação
+MIN_KEEP_DAYS = max(FORECAST_WINDOW_DAYS, ABC_MAX_WINDOW_DAYS)
+
+
+def _end_of_day(day):
+    """Primeiro instante do dia seguinte (limite exclusivo)"""
+    return datetime.combine(day + timedelta(days=1), time.min)
+
+
+def _signed(model):
+    """Quantidade com sinal: entrada soma, saída subtrai"""
+    return case((model.movement_type == 'entrada', model.quantity), else_=-model.quantity)
+
+
+def movement_deltas(company_id, start, end=None, product_id=None):
+    """Soma das movimentações por produto em [start, end), incluindo as arquivadas"""
+    selects = []
+    for model in (StockMovement, StockMovementArchive):
+        stmt = select(model.product_id.label('product_id'), _signed(model).label('delta')).where(
+            model.company_id == company_id,
+            model.created_at >= start
+        )
+        if end is not None:
+            stmt = stmt.where(model.created_at < end)
+        if product_id is not None:
+            stmt = stmt.where(model.product_id == product_id)
+        selects.append(stmt)
+
+    movements = union_all(*selects).subquery()
+    rows = db.session.execute(
+        select(movements.c.product_id, func.sum(movements.c.delta)).group_by(movements.c.product_id)
+    ).all()
+    return {product_id: int(delta or 0) for product_id, delta in rows}
+
+
+def take_snapshots(snapshot_date=None, company_id=None):
+    """Gravar o estoque de fechamento de snapshot_date (padrão: ontem) para todos os produtos"""
+    today = datetime.utcnow().date()
+    snapshot_date = snapshot_date or (today - timedelta(days=1))
+    end = _end_of_day(snapshot_date)
+
+    # Estoque no fechamento = estoque atual - movimentações posteriores ao dia
+    later = select(
+        StockMovement.product_id,
+        func.sum(_signed(StockMovement)).label('delta')
+    ).where(StockMovement.created_at >= end).group_by(StockMovement.product_id).subquery()
+
+    query = db.session.query(
+        Product.id, Product.company_id, Product.quantity, Product.cost_price, later.c.delta
+    ).outerjoin(later, later.c.product_id == Product.id).filter(
+        db.or_(Product.created_at < end, Product.created_at.is_(None))
+    )
+    if company_id:
+        query = query.filter(Product.company_id == company_id)
+
+    rows = []
+    for product_id, product_company_id, quantity, cost_price, delta in query:
+        qty = (quantity or 0) - int(delta or 0)
+        rows.append({
+            'company_id': product_company_id,
+            'product_id': product_id,
+            'snapshot_date': snapshot_date,
+            'quantity': qty,
+            'value': qty * (cost_price or 0),
+        })
+
+    # Reexecutar o job para a mesma data substitui o snapshot anterior
+    cleanup = delete(StockSnapshot).where(StockSnapshot.snapshot_date == snapshot_date)
+    if company_id:
+        cleanup = cleanup.where(StockSnapshot.company_id == company_id)
+    db.session.execute(cleanup)
+    if rows:
+        db.session.execute(insert(StockSnapshot), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def _snapshot_quantities(company_id, snapshot_date, product_id=None):
+    query = db.session.query(StockSnapshot.product_id, StockSnapshot.quantity).filter(
+        StockSnapshot.company_id == company_id,
+        StockSnapshot.snapshot_date == snapshot_date
+    )
+    if product_id is not None:
+        query = query.filter(StockSnapshot.product_id == product_id)
+    return dict(query.all())
+
+
+def stock_at(company_id, target_date, product_id=None):
+    """Estoque de cada produto ao final de target_date.
+
+    Parte do ponto de referência mais próximo (snapshot anterior, snapshot
+    posterior ou estoque atual) e aplica apenas as movimentações entre ele e a data.
+    """
+    today = datetime.utcnow().date()
+    end = _end_of_day(target_date)
+
+    products_query = db.session.query(
+        Product.id, Product.name, Product.sku, Product.quantity, Product.cost_price
+    ).filter(
+        Product.company_id == company_id,
+        db.or_(Product.created_at < end, Product.created_at.is_(None))
+    )
+    if product_id is not None:
+        products_query = products_query.filter(Product.id == product_id)
+    products = products_query.order_by(Product.name).all()
+
+    prev_date = db.session.query(func.max(StockSnapshot.snapshot_date)).filter(
+        StockSnapshot.company_id == company_id,
+        StockSnapshot.snapshot_date <= target_date
+    ).scalar()
+    next_date = db.session.query(func.min(StockSnapshot.snapshot_date)).filter(
+        StockSnapshot.company_id == company_id,
+        StockSnapshot.snapshot_date > target_date
+    ).scalar()
+
+    # Escolher a âncora mais próxima da data pedida
+    candidates = [('current', today, (today - target_date).days)]
+    if prev_date:
+        candidates.append(('snapshot_before', prev_date, (target_date - prev_date).days))
+    if next_date:
+        candidates.append(('snapshot_after', next_date, (next_date - target_date).days))
+    anchor, anchor_date, _ = min(candidates, key=lambda c: c[2])
+
+    quantities = {}
+    if anchor == 'snapshot_before':
+        base = _snapshot_quantities(company_id, anchor_date, product_id)
+        deltas = movement_deltas(company_id, _end_of_day(anchor_date), end, product_id)
+        quantities = {pid: qty + deltas.get(pid, 0) for pid, qty in base.items()}
+    elif anchor == 'snapshot_after':
+        base = _snapshot_quantities(company_id, anchor_date, product_id)
+        deltas = movement_deltas(company_id, end, _end_of_day(anchor_date), product_id)
+        quantities = {pid: qty - deltas.get(pid, 0) for pid, qty in base.items()}
+
+    # Produtos sem snapshot na âncora: voltar a partir do estoque atual
+    missing = [p for p in products if p.id not in quantities]
+    if missing:
+        deltas = movement_deltas(company_id, end, product_id=product_id)
+        for p in missing:
+            quantities[p.id] = (p.quantity or 0) - deltas.get(p.id, 0)
+
+    items = []
+    for p in products:
+        qty = quantities[p.id]
+        items.append({
+            'product_id': p.id,
+            'name': p.name,
+            'sku': p.sku,
+            'quantity': qty,
+            'value': qty * (p.cost_price or 0),
+        })
+
+    return {
+        'date': target_date.isoformat(),
+        'anchor': {'type': anchor, 'date': anchor_date.isoformat()},
+        'products': items,
+        'total_quantity': sum(i['quantity'] for i in items),
+        'total_value': sum(i['value'] for i in items),
+    }
+
+
+def compact_movements(keep_days=MIN_KEEP_DAYS, company_id=None):
+    """Arquivar movimentações com mais de keep_days já cobertas por um snapshot.
+
+    keep_days abaixo de MIN_KEEP_DAYS é elevado a ele (as análises não leem o arquivo).
+    """
+    keep_days = max(keep_days, MIN_KEEP_DAYS)
+    cutoff = datetime.utcnow().date() - timedelta(days=keep_days)
+
+    coverage = db.session.query(
+        StockSnapshot.company_id, func.max(StockSnapshot.snapshot_date)
+    ).filter(StockSnapshot.snapshot_date <= cutoff)
+    if company_id:
+        coverage = coverage.filter(StockSnapshot.company_id == company_id)
+    coverage = coverage.group_by(StockSnapshot.company_id).all()
+
+    archived = 0
+    for covered_company_id, covered_date in coverage:
+        covered = exists().where(
+            StockSnapshot.product_id == StockMovement.product_id,
+            StockSnapshot.snapshot_date == covered_date
+        )
+        condition = and_(
+            StockMovement.company_id == covered_company_id,
+            StockMovement.created_at < _end_of_day(covered_date),
+            covered
+        )
+        columns = [getattr(StockMovement, c) for c in ARCHIVE_COLUMNS]
+        result = db.session.execute(
+            insert(StockMovementArchive).from_select(ARCHIVE_COLUMNS, select(*columns).where(condition))
+        )
+        db.session.execute(
+            delete(StockMovement).where(condition).execution_options(synchronize_session=False)
+        )
+        archived += result.rowcount or 0
+
+    db.session.commit()
+    return archived
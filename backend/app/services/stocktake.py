@@ -0,0 +1,104 @@
+from datetime import datetime
+from sqlalchemy import select, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.models.stocktake import StocktakeLine
+from app.services.stock_alerts import sync_low_stock_alerts
+
+STOCKTAKE_REASON = 'Inventário'
+
+# Dialetos com INSERT ... ON CONFLICT
+_CONFLICT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert_lines(session_id, counts, mode):
+    """Gravar contagens {product_id: quantidade} em um INSERT ... ON CONFLICT em lote.
+
+    Em "set" a contagem substitui a anterior; em "add" soma a ela. Dois leitores
+    registrando o mesmo produto ao mesmo tempo caem no mesmo UPDATE, sem erro de unicidade.
+    """
+    if not counts:
+        return
+    now = datetime.utcnow()
+    stmt = _CONFLICT_INSERTS[db.session.get_bind().dialect.name](StocktakeLine)
+    counted = stmt.excluded.counted_quantity
+    if mode == 'add':
+        counted = StocktakeLine.counted_quantity + stmt.excluded.counted_quantity
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['session_id', 'product_id'],
+        set_={'counted_quantity': counted, 'updated_at': stmt.excluded.updated_at}
+    )
+    db.session.execute(stmt, [
+        {'session_id': session_id, 'product_id': pid, 'counted_quantity': qty, 'updated_at': now}
+        for pid, qty in counts.items()
+    ])
+
+
+def close_session(session, user_id):
+    """Fechar o inventário: ajustar o estoque de todos os itens contados em uma transação.
+
+    As diferenças saem de um único JOIN entre as linhas contadas e os produtos
+    (travados até o commit); movimentações e quantidades são gravadas em lote.
+    """
+    rows = db.session.execute(
+        select(Product.id, Product.quantity, Product.cost_price, StocktakeLine.counted_quantity)
+        .join(StocktakeLine, StocktakeLine.product_id == Product.id)
+        .where(
+            StocktakeLine.session_id == session.id,
+            Product.company_id == session.company_id,
+            StocktakeLine.counted_quantity != Product.quantity
+        )
+        .with_for_update(of=Product)
+    ).all()
+
+    now = datetime.utcnow()
+    notes = f'Ajuste do inventário #{session.id}'
+    movements = []
+    differences = []
+    for product_id, quantity, cost_price, counted in rows:
+        delta = counted - (quantity or 0)
+        movements.append({
+            'product_id': product_id,
+            'company_id': session.company_id,
+            'user_id': user_id,
+            'movement_type': 'entrada' if delta > 0 else 'saida',
+            'quantity': abs(delta),
+            'unit_price': cost_price,
+            'reason': STOCKTAKE_REASON,
+            'notes': notes,
+            'created_at': now,
+        })
+        differences.append({
+            'product_id': product_id,
+            'previous_quantity': quantity,
+            'counted_quantity': counted,
+            'difference': delta,
+        })
+
+    if movements:
+        db.session.execute(insert(StockMovement), movements)
+
+        changed_ids = [d['product_id'] for d in differences]
+        counted = select(StocktakeLine.counted_quantity).where(
+            StocktakeLine.session_id == session.id,
+            StocktakeLine.product_id == Product.id
+        ).scalar_subquery()
+        db.session.execute(
+            update(Product).where(Product.id.in_(changed_ids))
+            .values(quantity=counted, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        sync_low_stock_alerts(session.company_id, changed_ids)
+
+    session.status = 'closed'
+    session.closed_at = now
+    session.closed_by_id = user_id
+    session.adjustments_count = len(movements)
+    db.session.commit()
+
+    return differences
@@ -0,0 +1,124 @@
+from app.models.business_config import BusinessConfig
+from app.models.company import Company
+from app.services.cache import TwoTierCache
+from app.services.single_flight import SingleFlightCache
+from app.services.public_snapshot import remove_snapshots
+
+LOCAL_TTL = 30    # Cache do processo (outros workers enxergam mudanças em até 30s)
+REDIS_TTL = 600   # Segundo nível compartilhado entre workers
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+PAGE_STALE_TTL = 3600   # Página vencida por tempo (sem alteração) ainda serve enquanto recalcula
+AVAILABILITY_TTL = 15   # Horários ocupados: agendamentos feitos fora da API aparecem em até 15s
+AVAILABILITY_STALE_TTL = 45
+
+_tenants = TwoTierCache('tenant:', LOCAL_TTL, REDIS_TTL)
+# Resposta pronta de GET /public/<slug> (uma requisição monta; as outras esperam ou recebem a anterior)
+_pages = SingleFlightCache('public_page:v2:', REDIS_TTL, PAGE_STALE_TTL, local_ttl=LOCAL_TTL)
+# Horários ocupados por empresa e dia, para /public/<slug>/availability
+_occupied = SingleFlightCache('occupied:', AVAILABILITY_TTL, AVAILABILITY_STALE_TTL)
+
+
+def _minutes(value):
+    hours, minutes = map(int, value.split(':'))
+    return hours * 60 + minutes
+
+
+def _compile_hours(opening_hours):
+    """{weekday 0-6: [abre, fecha]} em minutos; dias fechados ficam de fora"""
+    hours = {}
+    for index, day in enumerate(WEEKDAYS):
+        day_config = (opening_hours or {}).get(day) or {}
+        open_time, close_time = day_config.get('open', ''), day_config.get('close', '')
+        if not open_time or not close_time or open_time == close_time:
+            continue
+        try:
+            hours[str(index)] = [_minutes(open_time), _minutes(close_time)]
+        except ValueError:
+            continue
+    return hours
+
+
+def _build(slug):
+    """Montar a entrada do cache a partir do banco (empresa ativa + configuração)"""
+    company = Company.query.filter_by(slug=slug, is_active=True).first()
+    if not company:
+        return None
+    config = BusinessConfig.query.filter_by(company_id=company.id).first()
+
+    opening_hours = (config.business_hours if config and config.business_hours else company.opening_hours) or {}
+    stamps = [s for s in (company.updated_at, config.updated_at if config else None) if s]
+
+    return {
+        'company_id': company.id,
+        'version': int(max(stamps).timestamp() * 1000) if stamps else 0,
+        'company': {
+            'id': company.id,
+            'name': company.name,
+            'slug': company.slug,
+            'business_type': company.business_type,
+            'email': company.email,
+            'phone': company.phone,
+            'address': company.address,
+            'primary_color': company.primary_color,
+            'logo_url': company.logo_url,
+            'header_image_url': company.header_image_url,
+        },
+        'config': {
+            'opening_hours': opening_hours,
+            'hours': _compile_hours(opening_hours),
+            'services': (config.services_list if config else None) or [],
+            'welcome_text': config.public_welcome_text if config else '',
+            'footer_text': config.public_footer_text if config else '',
+            'allow_online_booking': config.allow_online_booking if config else True,
+            'show_product_prices': config.show_product_prices if config else True,
+            'show_product_stock': config.show_product_stock if config else False,
+        },
+    }
+
+
+def get_tenant(slug):
+    """Empresa pública pelo slug: processo -> Redis -> banco. None se não existir/inativa"""
+    entry = _tenants.get(slug)
+    if entry is None:
+        entry = _build(slug)
+        if entry is not None:
+            _tenants.set(slug, entry)
+    return entry
+
+
+def get_public_page(slug, build):
+    """Corpo já serializado da página pública, ETag e título ({'body', 'etag', 'title'});
+    na falta, só uma requisição chama build()"""
+    return _pages.get_or_compute(slug, build)
+
+
+def get_occupied_slots(company_id, day, build):
+    """Horários ('HH:MM') ocupados no dia; na falta, só uma requisição chama build()"""
+    return _occupied.get_or_compute(f'{company_id}:{day.isoformat()}', build)
+
+
+def invalidate_availability(company_id, *days):
+    """Descartar horários ocupados (chamar após criar/alterar/cancelar agendamento)"""
+    _occupied.delete(*[f'{company_id}:{d.isoformat()}' for d in days if d])
+
+
+def invalidate_tenant(*slugs):
+    """Descartar empresa e página pública (chamar após alterar empresa/configuração)"""
+    _tenants.delete(*slugs)
+    _pages.delete(*slugs)
+    remove_snapshots(*slugs)
+
+
+def invalidate_company(company_id):
+    """Descartar pelo id da empresa (busca o slug atual)"""
+    slug = Company.query.with_entities(Company.slug).filter_by(id=company_id).scalar()
+    invalidate_tenant(slug)
+
+
+def invalidate_public_page(company_id):
+    """Descartar só a página pública (produtos mudaram; empresa continua válida)"""
+    slug = Company.query.with_entities(Company.slug).filter_by(id=company_id).scalar()
+    _pages.delete(slug)
+    remove_snapshots(slug)
@@ -0,0 +1,54 @@
+import re
+import unicodedata
+
+PHONE_SEARCH_MIN_DIGITS = 3
+
+
+def fold_accents(text):
+    """Remover acentos (mesma normalização NFKD usada nos slugs)"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def make_slug(text):
+    """Gerar slug a partir do nome (ex.: 'Barbearia São João' -> 'barbearia-sao-joao')"""
+    text = fold_accents(text).lower().strip()
+    text = text.replace(' ', '-')
+    text = ''.join(c for c in text if c.isalnum() or c == '-')
+    return '-'.join(p for p in text.split('-') if p)
+
+
+def fold_name(text):
+    """Chave de busca de nome: sem acentos, minúscula, espaços colapsados"""
+    return ' '.join(fold_accents(text).lower().split()) or None
+
+
+def normalize_email(email):
+    """Chave de busca de email: minúsculo e sem espaços"""
+    return (email or '').strip().lower() or None
+
+
+def normalize_phone(phone):
+    """Telefone apenas com dígitos, no formato nacional (E.164 sem o +55).
+
+    '(11) 98765-4321', '+55 11 98765-4321' e '011 98765-4321' viram '11987654321'.
+    """
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('55') and len(digits) in (12, 13):
+        digits = digits[2:]
+    digits = digits.lstrip('0')
+    return digits or None
+
+
+def phone_search_digits(text, min_digits=PHONE_SEARCH_MIN_DIGITS):
+    """Dígitos para busca por telefone, ou None se o termo não parece um telefone.
+
+    Só dígitos e formatação ('(11) 9876', '+55 11-98'), com pelo menos min_digits dígitos:
+    'joao2' ou 'Rua 1' não viram busca pelo dígito solto.
+    """
+    if not text or re.search(r'[^\d\s()+\-.]', text):
+        return None
+    digits = normalize_phone(text)
+    if not digits or len(digits) < min_digits:
+        return None
+    return digits
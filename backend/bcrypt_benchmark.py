@@ -0,0 +1,21 @@
+"""Medir o custo do bcrypt nesta máquina para escolher BCRYPT_ROUNDS.
+
+Uso: python bcrypt_benchmark.py [alvo_ms]
+Sugere o maior custo cuja verificação fica abaixo do alvo (padrão 250 ms).
+"""
+import sys
+from app.services.passwords import benchmark_rounds
+
+def main():
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+    results = benchmark_rounds()
+    for rounds, ms in results.items():
+        print(f"  rounds={rounds:<3} {ms:8.1f} ms")
+    within = [rounds for rounds, ms in results.items() if ms <= target]
+    if within:
+        print(f"✅ Sugestão: BCRYPT_ROUNDS={max(within)} (alvo {target:.0f} ms)")
+    else:
+        print(f"⚠️ Nenhum custo abaixo de {target:.0f} ms; use BCRYPT_ROUNDS={min(results)}")
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,32 @@ class Config:
     # Redis
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     
+    # Gerações de invalidação do cache sem Redis (arquivos compartilhados pelos workers da máquina)
+    CACHE_GENERATION_DIR = os.getenv('CACHE_GENERATION_DIR')
+
+    # Snapshots estáticos da página pública (servidos pelo proxy/CDN sem passar pelo Python)
+    PUBLIC_SNAPSHOT_DIR = os.getenv(
+        'PUBLIC_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_snapshots')
+    )
+    PUBLIC_SNAPSHOT_MAX_AGE = int(os.getenv('PUBLIC_SNAPSHOT_MAX_AGE', 60))  # Navegador
+    # CDN/proxy: guarda por s-maxage e, vencido, serve a cópia antiga enquanto revalida pelo ETag
+    PUBLIC_SNAPSHOT_SHARED_MAX_AGE = int(os.getenv('PUBLIC_SNAPSHOT_SHARED_MAX_AGE', 3600))
+    PUBLIC_SNAPSHOT_STALE_WHILE_REVALIDATE = int(os.getenv('PUBLIC_SNAPSHOT_STALE_WHILE_REVALIDATE', 86400))
+
+    # Rate limit das rotas públicas e do login (limites em app/services/rate_limit.py e
+    # app/services/login_throttle.py; RATE_LIMITS / LOGIN_THROTTLE sobrescrevem)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    
+    # Threads por processo do gunicorn (--threads no Procfile/railway.json, mesma variável)
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 4))
+    
+    # Senhas: custo do bcrypt (medir com `python bcrypt_benchmark.py`) e pool de verificação por processo.
+    # WORKERS + QUEUE é quantas requisições podem estar no bcrypt ao mesmo tempo; precisa ficar abaixo
+    # de WEB_THREADS para sobrar thread para o resto da API (acima disso o login responde 503)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 1))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 1))
+    
     # CORS
     CORS_HEADERS = 'Content-Type'
 
@@ -44,6 +70,9 @@ class TestingConfig(Config):
     """Configurações de teste"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    REDIS_URL = os.getenv('TEST_REDIS_URL')  # Sem Redis nos testes, salvo se configurado
+    PUBLIC_SNAPSHOT_DIR = os.getenv('TEST_PUBLIC_SNAPSHOT_DIR')
+    BCRYPT_ROUNDS = 4
 
 # Dicionário de configurações
 config = {
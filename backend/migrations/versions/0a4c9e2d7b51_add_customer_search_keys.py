@@ -0,0 +1,75 @@
+"""add normalized customer search keys
+
+Revision ID: 0a4c9e2d7b51
+Revises: f2b7c4d8e913
+Create Date: 2026-10-19 19:47:02.318840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.text import fold_name, normalize_email, normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4c9e2d7b51'
+down_revision = 'f2b7c4d8e913'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _backfill(bind):
+    """Recalcular as chaves em Python (mesma normalização do modelo), em lotes por id"""
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, name, email, phone FROM customers WHERE id > :last ORDER BY id LIMIT :n"
+        ), {'last': last_id, 'n': BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(sa.text(
+            "UPDATE customers SET name_folded = :name, email_normalized = :email, phone_digits = :phone WHERE id = :id"
+        ), [
+            {'id': r[0], 'name': fold_name(r[1]), 'email': normalize_email(r[2]), 'phone': normalize_phone(r[3])}
+            for r in rows
+        ])
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_normalized', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('name_folded', sa.String(length=100), nullable=True))
+
+    bind = op.get_bind()
+    _backfill(bind)
+
+    if bind.dialect.name == 'postgresql':
+        # Busca de nome passa a usar a coluna sem acentos
+        op.execute("DROP INDEX IF EXISTS idx_customers_company_name_prefix")
+        op.execute("DROP INDEX IF EXISTS idx_customers_name_trgm")
+        op.execute("CREATE INDEX idx_customers_company_name_folded ON customers (company_id, name_folded varchar_pattern_ops)")
+        op.execute("CREATE INDEX idx_customers_name_folded_trgm ON customers USING gin (name_folded gin_trgm_ops)")
+        op.execute("CREATE INDEX idx_customers_email_normalized_trgm ON customers USING gin (email_normalized gin_trgm_ops)")
+    else:
+        op.create_index('idx_customers_company_name_folded', 'customers', ['company_id', 'name_folded'])
+    op.create_index('idx_customers_company_email_normalized', 'customers', ['company_id', 'email_normalized'])
+
+
+def downgrade():
+    op.drop_index('idx_customers_company_email_normalized', table_name='customers')
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_customers_email_normalized_trgm")
+        op.execute("DROP INDEX IF EXISTS idx_customers_name_folded_trgm")
+        op.execute("DROP INDEX IF EXISTS idx_customers_company_name_folded")
+        op.execute("CREATE INDEX idx_customers_company_name_prefix ON customers (company_id, lower(name) varchar_pattern_ops)")
+        op.execute("CREATE INDEX idx_customers_name_trgm ON customers USING gin (lower(name) gin_trgm_ops)")
+    else:
+        op.drop_index('idx_customers_company_name_folded', table_name='customers')
+
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_column('name_folded')
+        batch_op.drop_column('email_normalized')
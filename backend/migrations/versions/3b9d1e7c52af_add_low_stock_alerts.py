@@ -0,0 +1,51 @@
+"""add low stock alerts
+
+Revision ID: 3b9d1e7c52af
+Revises: 6fde4b74e5b5
+Create Date: 2026-10-19 11:04:52.617430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d1e7c52af'
+down_revision = '6fde4b74e5b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('low_stock_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('min_quantity', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('notified_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_low_stock_alerts_open_product', 'low_stock_alerts', ['product_id'], unique=True,
+                    postgresql_where=sa.text('resolved_at IS NULL'),
+                    sqlite_where=sa.text('resolved_at IS NULL'))
+    op.create_index('idx_low_stock_alerts_company_open', 'low_stock_alerts', ['company_id', 'resolved_at'])
+
+    # Abrir alertas para produtos que já estão abaixo do mínimo
+    # (notified_at preenchido para não disparar um resumo com o catálogo inteiro)
+    op.execute("""
+        INSERT INTO low_stock_alerts (company_id, product_id, quantity, min_quantity, created_at, notified_at)
+        SELECT company_id, id, quantity, min_quantity, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM products
+        WHERE is_active = TRUE AND quantity <= COALESCE(min_quantity, 0)
+    """)
+
+
+def downgrade():
+    op.drop_index('idx_low_stock_alerts_company_open', table_name='low_stock_alerts')
+    op.drop_index('uq_low_stock_alerts_open_product', table_name='low_stock_alerts')
+    op.drop_table('low_stock_alerts')
@@ -0,0 +1,49 @@
+"""add customer duplicates and merged_into_id
+
+Revision ID: 5e2b8d41c6a3
+Revises: 0a4c9e2d7b51
+Create Date: 2026-10-19 20:36:45.190274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8d41c6a3'
+down_revision = '0a4c9e2d7b51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customer_duplicates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('duplicate_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('matched_on', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['duplicate_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('customer_id', 'duplicate_id', name='uq_customer_duplicates_pair')
+    )
+    op.create_index('idx_customer_duplicates_company_status', 'customer_duplicates', ['company_id', 'status', 'score'])
+
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('merged_into_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_customers_merged_into_id', 'customers', ['merged_into_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_customers_merged_into_id', type_='foreignkey')
+        batch_op.drop_column('merged_into_id')
+
+    op.drop_index('idx_customer_duplicates_company_status', table_name='customer_duplicates')
+    op.drop_table('customer_duplicates')
@@ -0,0 +1,62 @@
+"""add stock snapshots and movement archive
+
+Revision ID: 6fde4b74e5b5
+Revises: 08f972b57a78
+Create Date: 2026-10-19 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6fde4b74e5b5'
+down_revision = '08f972b57a78'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id', 'snapshot_date', name='uq_stock_snapshots_product_date')
+    )
+    op.create_index('idx_stock_snapshots_company_date', 'stock_snapshots', ['company_id', 'snapshot_date'])
+
+    op.create_table('stock_movements_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('movement_type', sa.String(length=20), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=True),
+    sa.Column('reason', sa.String(length=100), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_stock_movements_archive_product_date', 'stock_movements_archive',
+                    ['company_id', 'product_id', 'created_at'])
+
+    # Consultas por intervalo de datas (stock-at, snapshots)
+    op.create_index('idx_stock_movements_company_product_date', 'stock_movements',
+                    ['company_id', 'product_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_stock_movements_company_product_date', table_name='stock_movements')
+    op.drop_index('idx_stock_movements_archive_product_date', table_name='stock_movements_archive')
+    op.drop_table('stock_movements_archive')
+    op.drop_index('idx_stock_snapshots_company_date', table_name='stock_snapshots')
+    op.drop_table('stock_snapshots')
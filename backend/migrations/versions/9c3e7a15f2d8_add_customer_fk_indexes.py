@@ -0,0 +1,30 @@
+"""add customer_id indexes
+
+Revision ID: 9c3e7a15f2d8
+Revises: 5e2b8d41c6a3
+Create Date: 2026-10-19 21:12:09.774031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e7a15f2d8'
+down_revision = '5e2b8d41c6a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_appointments_customer_date', 'appointments', ['customer_id', 'appointment_date'])
+    op.create_index('idx_transactions_customer', 'transactions', ['customer_id'])
+    op.create_index('idx_accounts_receivable_customer', 'accounts_receivable', ['customer_id'])
+    op.create_index('idx_invoices_customer', 'invoices', ['customer_id'])
+
+
+def downgrade():
+    op.drop_index('idx_invoices_customer', table_name='invoices')
+    op.drop_index('idx_accounts_receivable_customer', table_name='accounts_receivable')
+    op.drop_index('idx_transactions_customer', table_name='transactions')
+    op.drop_index('idx_appointments_customer_date', table_name='appointments')
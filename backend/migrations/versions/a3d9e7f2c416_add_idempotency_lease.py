@@ -0,0 +1,24 @@
+"""add idempotency lease
+
+Revision ID: a3d9e7f2c416
+Revises: f1c6d2a8b354
+Create Date: 2026-10-21 10:04:18.552031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9e7f2c416'
+down_revision = 'f1c6d2a8b354'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('idempotency_keys', sa.Column('locked_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('idempotency_keys', 'locked_until')
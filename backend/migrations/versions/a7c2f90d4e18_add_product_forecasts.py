@@ -0,0 +1,42 @@
+"""add product forecasts
+
+Revision ID: a7c2f90d4e18
+Revises: 3b9d1e7c52af
+Create Date: 2026-10-19 13:27:08.915536
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2f90d4e18'
+down_revision = '3b9d1e7c52af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_forecasts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('avg_daily_demand', sa.Float(), nullable=True),
+    sa.Column('ema_daily_demand', sa.Float(), nullable=True),
+    sa.Column('demand_std', sa.Float(), nullable=True),
+    sa.Column('lead_time_days', sa.Integer(), nullable=False),
+    sa.Column('safety_stock', sa.Float(), nullable=True),
+    sa.Column('reorder_point', sa.Float(), nullable=True),
+    sa.Column('suggested_quantity', sa.Integer(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id')
+    )
+    op.create_index(op.f('ix_product_forecasts_company_id'), 'product_forecasts', ['company_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_product_forecasts_company_id'), table_name='product_forecasts')
+    op.drop_table('product_forecasts')
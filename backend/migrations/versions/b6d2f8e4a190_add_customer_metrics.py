@@ -0,0 +1,44 @@
+"""add customer rfm metrics
+
+Revision ID: b6d2f8e4a190
+Revises: 9c3e7a15f2d8
+Create Date: 2026-10-19 21:58:40.051372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2f8e4a190'
+down_revision = '9c3e7a15f2d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customer_metrics',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('last_visit', sa.Date(), nullable=True),
+    sa.Column('recency_days', sa.Integer(), nullable=True),
+    sa.Column('frequency', sa.Integer(), nullable=True),
+    sa.Column('monetary', sa.Float(), nullable=True),
+    sa.Column('r_score', sa.SmallInteger(), nullable=True),
+    sa.Column('f_score', sa.SmallInteger(), nullable=True),
+    sa.Column('m_score', sa.SmallInteger(), nullable=True),
+    sa.Column('segment', sa.String(length=20), nullable=False),
+    sa.Column('segment_rank', sa.SmallInteger(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_index('idx_customer_metrics_company_segment', 'customer_metrics', ['company_id', 'segment', 'customer_id'])
+    op.create_index('idx_customer_metrics_company_rank', 'customer_metrics', ['company_id', 'segment_rank', 'monetary', 'customer_id'])
+
+
+def downgrade():
+    op.drop_index('idx_customer_metrics_company_rank', table_name='customer_metrics')
+    op.drop_index('idx_customer_metrics_company_segment', table_name='customer_metrics')
+    op.drop_table('customer_metrics')
@@ -0,0 +1,34 @@
+"""add customer custom_data
+
+Revision ID: c81e4f6a2b37
+Revises: b6d2f8e4a190
+Create Date: 2026-10-19 22:41:17.603958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81e4f6a2b37'
+down_revision = 'b6d2f8e4a190'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('custom_data', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Filtros custom_data @> '{"campo": valor}'
+        op.execute("CREATE INDEX idx_customers_custom_data ON customers USING gin (custom_data jsonb_path_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_customers_custom_data")
+
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_column('custom_data')
@@ -0,0 +1,88 @@
+"""unique active customer email per company
+
+Revision ID: d4a7b9c1e5f6
+Revises: c81e4f6a2b37
+Create Date: 2026-10-19 23:20:51.448213
+
+"""
+import os
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7b9c1e5f6'
+down_revision = 'c81e4f6a2b37'
+branch_labels = None
+depends_on = None
+
+CUSTOMER_REFERENCES = ('appointments', 'transactions', 'accounts_receivable', 'invoices')
+
+# Clientes ativos com o mesmo email impedem o índice único. Por padrão a migração lista os
+# conflitos e para (mesclar pela tela de duplicados / POST /customers/<id>/merge e rodar de novo).
+# Com MERGE_DUPLICATE_CUSTOMER_EMAILS=1 ela mescla no cliente mais antigo: move agendamentos,
+# transações, contas a receber e notas fiscais e desativa os demais (merged_into_id).
+MERGE_ENV = 'MERGE_DUPLICATE_CUSTOMER_EMAILS'
+
+
+def _resolve_existing_duplicates(bind):
+    """Parar com a lista de emails duplicados, ou mesclá-los se MERGE_ENV=1"""
+    rows = bind.execute(sa.text("""
+        SELECT c.id, c.company_id, c.email_normalized
+        FROM customers c
+        JOIN (
+            SELECT company_id, email_normalized
+            FROM customers
+            WHERE is_active = :active AND email_normalized IS NOT NULL
+            GROUP BY company_id, email_normalized
+            HAVING COUNT(*) > 1
+        ) d ON d.company_id = c.company_id AND d.email_normalized = c.email_normalized
+        WHERE c.is_active = :active
+        ORDER BY c.company_id, c.email_normalized, c.id
+    """), {'active': True}).fetchall()
+
+    keep = {}
+    merges = []
+    for customer_id, company_id, email in rows:
+        key = (company_id, email)
+        if key in keep:
+            merges.append({'dup': customer_id, 'keep': keep[key]})
+        else:
+            keep[key] = customer_id
+
+    if not merges:
+        return
+    if os.environ.get(MERGE_ENV) != '1':
+        groups = {}
+        for m in merges:
+            groups.setdefault(m['keep'], []).append(m['dup'])
+        listing = '\n'.join(f'  cliente {primary}: duplicados {dups}' for primary, dups in sorted(groups.items()))
+        raise RuntimeError(
+            f'{len(groups)} email(s) com mais de um cliente ativo na mesma empresa:\n{listing}\n'
+            f'Mescle esses clientes (POST /customers/<id>/merge) ou rode com {MERGE_ENV}=1 '
+            'para mesclar automaticamente no mais antigo.'
+        )
+    print(f'[Migration] Mesclando {len(merges)} cliente(s) com email duplicado')
+    for table in CUSTOMER_REFERENCES:
+        bind.execute(sa.text(f"UPDATE {table} SET customer_id = :keep WHERE customer_id = :dup"), merges)
+    bind.execute(sa.text(
+        "UPDATE customers SET is_active = :inactive, merged_into_id = :keep WHERE id = :dup"
+    ), [dict(m, inactive=False) for m in merges])
+
+
+def upgrade():
+    bind = op.get_bind()
+    _resolve_existing_duplicates(bind)
+
+    op.drop_index('idx_customers_company_email_normalized', table_name='customers')
+    if bind.dialect.name == 'postgresql':
+        op.create_index('uq_customers_company_email', 'customers', ['company_id', 'email_normalized'],
+                        unique=True, postgresql_where=sa.text('is_active = true'))
+    else:
+        op.create_index('uq_customers_company_email', 'customers', ['company_id', 'email_normalized'],
+                        unique=True, sqlite_where=sa.text('is_active = 1'))
+
+
+def downgrade():
+    op.drop_index('uq_customers_company_email', table_name='customers')
+    op.create_index('idx_customers_company_email_normalized', 'customers', ['company_id', 'email_normalized'])
@@ -0,0 +1,53 @@
+"""add stocktake sessions
+
+Revision ID: d51e8a3f0b92
+Revises: a7c2f90d4e18
+Create Date: 2026-10-19 15:42:19.208734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd51e8a3f0b92'
+down_revision = 'a7c2f90d4e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stocktake_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('closed_by_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('adjustments_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['closed_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stocktake_sessions_company_id'), 'stocktake_sessions', ['company_id'], unique=False)
+
+    op.create_table('stocktake_lines',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('counted_quantity', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['stocktake_sessions.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id', 'product_id', name='uq_stocktake_lines_session_product')
+    )
+
+
+def downgrade():
+    op.drop_table('stocktake_lines')
+    op.drop_index(op.f('ix_stocktake_sessions_company_id'), table_name='stocktake_sessions')
+    op.drop_table('stocktake_sessions')
@@ -0,0 +1,30 @@
+"""add product is_featured and showcase index
+
+Revision ID: e5b0c3d9f471
+Revises: d4a7b9c1e5f6
+Create Date: 2026-10-20 00:05:38.926417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b0c3d9f471'
+down_revision = 'd4a7b9c1e5f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_featured', sa.Boolean(), nullable=True, server_default=sa.false()))
+
+    op.create_index('idx_products_company_showcase', 'products', ['company_id', 'is_active', 'name', 'id'])
+
+
+def downgrade():
+    op.drop_index('idx_products_company_showcase', table_name='products')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('is_featured')
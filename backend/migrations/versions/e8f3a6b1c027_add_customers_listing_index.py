@@ -0,0 +1,24 @@
+"""add customers listing index
+
+Revision ID: e8f3a6b1c027
+Revises: d51e8a3f0b92
+Create Date: 2026-10-19 17:05:44.731952
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f3a6b1c027'
+down_revision = 'd51e8a3f0b92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_customers_company_created', 'customers', ['company_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('idx_customers_company_created', table_name='customers')
@@ -0,0 +1,38 @@
+"""add idempotency keys
+
+Revision ID: f1c6d2a8b354
+Revises: e5b0c3d9f471
+Create Date: 2026-10-20 01:12:44.307521
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6d2a8b354'
+down_revision = 'e5b0c3d9f471'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=255), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key')
+    )
+    op.create_index('idx_idempotency_keys_expires', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('idx_idempotency_keys_expires', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
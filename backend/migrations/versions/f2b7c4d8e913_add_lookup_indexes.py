@@ -0,0 +1,60 @@
+"""add customer phone digits and lookup indexes
+
+Revision ID: f2b7c4d8e913
+Revises: e8f3a6b1c027
+Create Date: 2026-10-19 18:31:10.552604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7c4d8e913'
+down_revision = 'e8f3a6b1c027'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phone_digits', sa.String(length=20), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("UPDATE customers SET phone_digits = NULLIF(regexp_replace(phone, '\\D', '', 'g'), '')")
+
+        # Prefixo (btree com pattern_ops) + "contém" (trigram)
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX idx_customers_company_phone_digits ON customers (company_id, phone_digits varchar_pattern_ops)")
+        op.execute("CREATE INDEX idx_customers_company_name_prefix ON customers (company_id, lower(name) varchar_pattern_ops)")
+        op.execute("CREATE INDEX idx_customers_name_trgm ON customers USING gin (lower(name) gin_trgm_ops)")
+        op.execute("CREATE INDEX idx_customers_phone_digits_trgm ON customers USING gin (phone_digits gin_trgm_ops)")
+        op.execute("CREATE INDEX idx_products_company_name_prefix ON products (company_id, lower(name) varchar_pattern_ops)")
+        op.execute("CREATE INDEX idx_products_company_sku_prefix ON products (company_id, lower(sku) varchar_pattern_ops)")
+        op.execute("CREATE INDEX idx_products_company_barcode ON products (company_id, barcode)")
+        op.execute("CREATE INDEX idx_products_name_trgm ON products USING gin (lower(name) gin_trgm_ops)")
+        op.execute("CREATE INDEX idx_products_sku_trgm ON products USING gin (lower(sku) gin_trgm_ops)")
+    else:
+        rows = bind.execute(sa.text("SELECT id, phone FROM customers")).fetchall()
+        for customer_id, phone in rows:
+            digits = ''.join(ch for ch in (phone or '') if ch.isdigit()) or None
+            bind.execute(sa.text("UPDATE customers SET phone_digits = :d WHERE id = :id"), {'d': digits, 'id': customer_id})
+        op.create_index('idx_customers_company_phone_digits', 'customers', ['company_id', 'phone_digits'])
+        op.create_index('idx_products_company_barcode', 'products', ['company_id', 'barcode'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for name in ('idx_products_sku_trgm', 'idx_products_name_trgm', 'idx_products_company_barcode',
+                     'idx_products_company_sku_prefix', 'idx_products_company_name_prefix',
+                     'idx_customers_phone_digits_trgm', 'idx_customers_name_trgm',
+                     'idx_customers_company_name_prefix', 'idx_customers_company_phone_digits'):
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+    else:
+        op.drop_index('idx_products_company_barcode', table_name='products')
+        op.drop_index('idx_customers_company_phone_digits', table_name='customers')
+
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_column('phone_digits')
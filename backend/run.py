@@ -30,6 +30,12 @@ with app.app_context():
             conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS role VARCHAR(20) NOT NULL DEFAULT 'owner'"))
             conn.execute(text("ALTER TABLE appointments ADD COLUMN IF NOT EXISTS employee_id INTEGER REFERENCES users(id)"))
             conn.execute(text("ALTER TABLE companies ADD COLUMN IF NOT EXISTS header_image_url TEXT"))
+            conn.execute(text("ALTER TABLE customers ADD COLUMN IF NOT EXISTS phone_digits VARCHAR(20)"))
+            conn.execute(text("ALTER TABLE customers ADD COLUMN IF NOT EXISTS email_normalized VARCHAR(120)"))
+            conn.execute(text("ALTER TABLE customers ADD COLUMN IF NOT EXISTS name_folded VARCHAR(100)"))
+            conn.execute(text("ALTER TABLE customers ADD COLUMN IF NOT EXISTS merged_into_id INTEGER REFERENCES customers(id)"))
+            conn.execute(text("ALTER TABLE customers ADD COLUMN IF NOT EXISTS custom_data JSONB"))
+            conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS is_featured BOOLEAN DEFAULT FALSE"))
             conn.commit()
             logging.info("Colunas verificadas/criadas com sucesso")
     except Exception as e:
@@ -42,7 +42,7 @@ export default function Appointments() {
 
   const loadCustomers = async () => {
     try {
-      const response = await api.get('/customers');
+      const response = await api.get('/customers?all=1&fields=id,name,phone');
       setCustomers(response.data.customers || []);
     } catch { toast.error('Erro ao carregar clientes'); }
   };
@@ -22,6 +22,8 @@ export default function Customers() {
   const [customers, setCustomers] = useState<Customer[]>([]);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [editingCustomer, setEditingCustomer] = useState<Customer | null>(null);
   const [deleteModal, setDeleteModal] = useState<{ isOpen: boolean; customer: Customer | null }>({ isOpen: false, customer: null });
@@ -34,6 +36,7 @@ export default function Customers() {
       setLoading(true);
       const res = await api.get('/customers');
       setCustomers(res.data.customers || []);
+      setNextCursor(res.data.next_cursor || null);
     } catch { toast.error('Erro ao carregar clientes'); }
     finally { setLoading(false); }
   };
@@ -41,12 +44,24 @@ export default function Customers() {
   const handleSearch = async () => {
     try {
       setLoading(true);
-      const res = await api.get(`/customers?search=${search}`);
+      const res = await api.get('/customers', { params: { search } });
       setCustomers(res.data.customers || []);
+      setNextCursor(res.data.next_cursor || null);
     } catch { toast.error('Erro ao buscar clientes'); }
     finally { setLoading(false); }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const res = await api.get('/customers', { params: { search: search || undefined, cursor: nextCursor } });
+      setCustomers(prev => [...prev, ...(res.data.customers || [])]);
+      setNextCursor(res.data.next_cursor || null);
+    } catch { toast.error('Erro ao carregar clientes'); }
+    finally { setLoadingMore(false); }
+  };
+
   const handleOpenModal = (customer?: Customer) => {
     if (customer) {
       setEditingCustomer(customer);
@@ -204,6 +219,14 @@ export default function Customers() {
         </table>
       </div>
 
+      {nextCursor && (
+        <div className="flex justify-center">
+          <button onClick={handleLoadMore} disabled={loadingMore} className="px-4 py-2 bg-gray-100 hover:bg-gray-200 text-gray-700 rounded-lg transition text-sm disabled:opacity-50">
+            {loadingMore ? 'Carregando...' : 'Carregar mais'}
+          </button>
+        </div>
+      )}
+
       {/* Modal */}
       {showModal && (
         <div className="fixed inset-0 bg-black bg-opacity-50 flex items-end sm:items-center justify-center p-0 sm:p-4 z-50">
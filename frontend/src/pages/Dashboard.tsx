@@ -58,7 +58,7 @@ export default function Dashboard() {
       
       // Carregar dados básicos
       const [customersRes, appointmentsTodayRes, productsRes, lowStockRes] = await Promise.all([
-        api.get('/customers'),
+        api.get('/customers?fields=id&limit=1&include_total=1'),
         api.get('/appointments/today'),
         api.get('/products'),
         api.get('/products/low-stock')
@@ -104,7 +104,7 @@ export default function Dashboard() {
       const revenue = completedAppointments.reduce((sum: number, app: any) => sum + (app.service_price || 0), 0);
 
       setStats({
-        customers: customersRes.data.customers?.length || 0,
+        customers: customersRes.data.total || 0,
         appointments_today: appointmentsTodayRes.data.appointments?.length || 0,
         appointments_week: appointments.length || 0,
         products: productsRes.data.products?.length || 0,
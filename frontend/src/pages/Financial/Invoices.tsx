@@ -89,7 +89,7 @@ export default function Invoices() {
       setLoading(true);
       const [invRes, custRes] = await Promise.all([
         api.get('/financial/invoices'),
-        api.get('/customers'),
+        api.get('/customers?all=1&fields=id,name'),
       ]);
       const invs = invRes.data.invoices ?? invRes.data ?? [];
       const custs = custRes.data.customers ?? custRes.data ?? [];
@@ -82,7 +82,7 @@ export default function Receivables() {
       const [recRes, catRes, custRes] = await Promise.all([
         api.get('/financial/receivables'),
         api.get('/financial/categories'),
-        api.get('/customers'),
+        api.get('/customers?all=1&fields=id,name'),
       ]);
       const recs = recRes.data.receivables ?? recRes.data ?? [];
       const cats = catRes.data.categories ?? catRes.data ?? [];
@@ -43,7 +43,7 @@ export default function Transactions() {
       const [transactionsRes, categoriesRes, customersRes] = await Promise.all([
         api.get('/financial/transactions'),
         api.get('/financial/categories'),
-        api.get('/customers')
+        api.get('/customers?all=1&fields=id,name')
       ]);
       
       setTransactions(transactionsRes.data.transactions || []);
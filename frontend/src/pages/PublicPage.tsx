@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import {
   MapPin, Phone, Mail, Clock, Calendar, ChevronRight,
@@ -33,6 +33,8 @@ interface Product {
   name: string;
   description?: string;
   price?: number;
+  quantity?: number;
+  unit?: string;
   category?: string;
 }
 
@@ -61,12 +63,28 @@ function formatDate(d: Date) {
   return d.toISOString().split('T')[0];
 }
 
+// Dados da página embutidos pelo servidor no index.html (evita o fetch inicial)
+function readInlineData(slug: string) {
+  const el = document.getElementById('public-data');
+  if (!el?.textContent) return null;
+  try {
+    const data = JSON.parse(el.textContent);
+    return data?.company?.slug === slug ? data : null;
+  } catch {
+    return null;
+  }
+}
+
 
 export default function PublicPage() {
   const { slug } = useParams<{ slug: string }>();
   const [company, setCompany] = useState<CompanyData | null>(null);
   const [services, setServices] = useState<Service[]>([]);
   const [products, setProducts] = useState<Product[]>([]);
+  const [hasMoreProducts, setHasMoreProducts] = useState(false);
+  const [productsCursor, setProductsCursor] = useState<string | null>(null);
+  const [showingAllProducts, setShowingAllProducts] = useState(false);
+  const [loadingProducts, setLoadingProducts] = useState(false);
   const [loading, setLoading] = useState(true);
   const [notFound, setNotFound] = useState(false);
 
@@ -80,6 +98,8 @@ export default function PublicPage() {
   const [form, setForm] = useState({ name: '', email: '', phone: '', notes: '' });
   const [submitting, setSubmitting] = useState(false);
   const [bookingResult, setBookingResult] = useState<any>(null);
+  // Mesma chave nas repetições após falha de conexão: o servidor não agenda duas vezes
+  const bookingKey = useRef<string | null>(null);
 
   const days = getNext30Days();
   const [dayOffset, setDayOffset] = useState(0);
@@ -89,19 +109,30 @@ export default function PublicPage() {
 
   useEffect(() => {
     if (!slug) return;
+
+    const applyData = (data: any) => {
+      setCompany(data.company);
+      setServices(data.services || []);
+      setProducts(data.products || []);
+      setHasMoreProducts(!!data.has_more_products);
+
+      // Aplicar cor primária como CSS var
+      document.documentElement.style.setProperty('--primary', data.company.primary_color || '#3B82F6');
+    };
+
+    const inline = readInlineData(slug);
+    if (inline) {
+      applyData(inline);
+      setLoading(false);
+      return;
+    }
+
     fetch(`${API}/${slug}`)
       .then(r => {
         if (!r.ok) throw new Error('not found');
         return r.json();
       })
-      .then(data => {
-        setCompany(data.company);
-        setServices(data.services || []);
-        setProducts(data.products || []);
-
-        // Aplicar cor primária como CSS var
-        document.documentElement.style.setProperty('--primary', data.company.primary_color || '#3B82F6');
-      })
+      .then(applyData)
       .catch(() => setNotFound(true))
       .finally(() => setLoading(false));
   }, [slug]);
@@ -116,6 +147,24 @@ export default function PublicPage() {
       .finally(() => setLoadingSlots(false));
   }, [selectedDate, selectedService, slug]);
 
+  // A página traz só os destaques; a lista completa vem paginada
+  const loadMoreProducts = async () => {
+    if (!slug || loadingProducts) return;
+    setLoadingProducts(true);
+    try {
+      const params = new URLSearchParams();
+      if (showingAllProducts && productsCursor) params.set('cursor', productsCursor);
+      const res = await fetch(`${API}/${slug}/products?${params.toString()}`);
+      const data = await res.json();
+      setProducts(prev => (showingAllProducts ? [...prev, ...(data.products || [])] : data.products || []));
+      setProductsCursor(data.next_cursor || null);
+      setHasMoreProducts(!!data.has_more);
+      setShowingAllProducts(true);
+    } finally {
+      setLoadingProducts(false);
+    }
+  };
+
   const handleBook = async () => {
     if (!slug || !selectedService || !selectedDate || !selectedTime) return;
     if (!form.name || !form.email || !form.phone) {
@@ -123,10 +172,11 @@ export default function PublicPage() {
       return;
     }
     setSubmitting(true);
+    const idempotencyKey = (bookingKey.current ??= crypto.randomUUID());
     try {
       const res = await fetch(`${API}/${slug}/book`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey },
         body: JSON.stringify({
           name: form.name,
           email: form.email,
@@ -139,6 +189,7 @@ export default function PublicPage() {
           time: selectedTime,
         }),
       });
+      bookingKey.current = null;
       const data = await res.json();
       if (res.ok) {
         setBookingResult(data.appointment);
@@ -296,9 +347,23 @@ export default function PublicPage() {
                           {new Intl.NumberFormat('pt-BR', { style: 'currency', currency: 'BRL' }).format(p.price)}
                         </p>
                       )}
+                      {p.quantity !== undefined && (
+                        <p className="text-gray-400 text-xs mt-1">
+                          {p.quantity > 0 ? `${p.quantity} ${p.unit || 'un'} em estoque` : 'Sem estoque'}
+                        </p>
+                      )}
                     </div>
                   ))}
                 </div>
+                {hasMoreProducts && (
+                  <button
+                    onClick={loadMoreProducts}
+                    disabled={loadingProducts}
+                    className="w-full mt-3 py-2 text-sm font-medium rounded-xl border border-gray-200 bg-white text-gray-600 disabled:opacity-50"
+                  >
+                    {loadingProducts ? 'Carregando...' : showingAllProducts ? 'Carregar mais' : 'Ver todos os produtos'}
+                  </button>
+                )}
               </div>
             )}
 
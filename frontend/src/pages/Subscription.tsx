@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Check, Crown, CreditCard, AlertCircle, Clock } from 'lucide-react';
 import api from '../services/api';
 import { toast } from 'sonner';
@@ -15,6 +15,7 @@ export default function Subscription() {
   const [subscription, setSubscription] = useState<Subscription | null>(null);
   const [loading, setLoading] = useState(true);
   const [checkingOut, setCheckingOut] = useState(false);
+  const checkoutKey = useRef<string | null>(null);
 
   useEffect(() => {
     loadData();
@@ -45,10 +46,15 @@ export default function Subscription() {
 
   const handleCheckout = async () => {
     setCheckingOut(true);
+    const idempotencyKey = (checkoutKey.current ??= crypto.randomUUID());
     try {
-      const res = await api.post('/payments/create-checkout', { plan: 'premium' });
+      const res = await api.post('/payments/create-checkout', { plan: 'premium' }, {
+        headers: { 'Idempotency-Key': idempotencyKey },
+      });
       window.location.href = res.data.checkout_url;
-    } catch {
+    } catch (err: any) {
+      // Só repete com a mesma chave se a resposta não chegou
+      if (err?.response) checkoutKey.current = null;
       toast.error('Erro ao criar link de pagamento');
     } finally {
       setCheckingOut(false);